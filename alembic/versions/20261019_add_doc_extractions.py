@@ -0,0 +1,34 @@
+"""add document extractions table
+
+Revision ID: 20261019_add_doc_extractions
+Revises: 20250914_add_earnings_tables
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261019_add_doc_extractions'
+down_revision = '20250914_add_earnings_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document_extractions',
+        sa.Column('doc_id', sa.String(length=64), primary_key=True),
+        sa.Column('extractor_version', sa.Integer(), nullable=False),
+        sa.Column('metrics', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('series', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('guidance', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('buybacks', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['doc_id'], ['documents.id'], name='fk_document_extractions_doc', ondelete='CASCADE'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('document_extractions')
@@ -0,0 +1,32 @@
+"""add shared http response cache table
+
+Revision ID: 20261020_add_http_cache
+Revises: 20261019_add_doc_extractions
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261020_add_http_cache'
+down_revision = '20261019_add_doc_extractions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'http_cache',
+        sa.Column('key', sa.Text(), primary_key=True),
+        sa.Column('value', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('etag', sa.Text(), nullable=True),
+        sa.Column('last_modified', sa.Text(), nullable=True),
+        sa.Column('stored_at', sa.Float(), nullable=False),
+        sa.Column('ttl_seconds', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('http_cache')
@@ -0,0 +1,23 @@
+"""add size_bytes to http_cache
+
+Revision ID: 20261021_add_http_cache_size
+Revises: 20261020_add_http_cache
+Create Date: 2026-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261021_add_http_cache_size'
+down_revision = '20261020_add_http_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('http_cache', sa.Column('size_bytes', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('http_cache', 'size_bytes')
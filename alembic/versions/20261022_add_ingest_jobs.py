@@ -0,0 +1,51 @@
+"""add ingest job queue table
+
+Revision ID: 20261022_add_ingest_jobs
+Revises: 20261021_add_http_cache_size
+Create Date: 2026-10-22 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261022_add_ingest_jobs'
+down_revision = '20261021_add_http_cache_size'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingest_jobs',
+        sa.Column('id', sa.String(length=64), primary_key=True),
+        sa.Column('batch_id', sa.String(length=64), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('doc_id', sa.String(length=64), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_ingest_jobs_batch_id', 'ingest_jobs', ['batch_id'])
+    op.create_index('ix_ingest_jobs_status', 'ingest_jobs', ['status'])
+    op.create_index('ix_ingest_jobs_run_after', 'ingest_jobs', ['run_after'])
+    op.create_index('ix_ingest_jobs_created_at', 'ingest_jobs', ['created_at'])
+    # Partial index for the claim query: only runnable rows are scanned
+    op.create_index('ix_ingest_jobs_queued', 'ingest_jobs', ['run_after', 'created_at'], postgresql_where=sa.text("status = 'queued'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingest_jobs_queued', table_name='ingest_jobs')
+    op.drop_index('ix_ingest_jobs_created_at', table_name='ingest_jobs')
+    op.drop_index('ix_ingest_jobs_run_after', table_name='ingest_jobs')
+    op.drop_index('ix_ingest_jobs_status', table_name='ingest_jobs')
+    op.drop_index('ix_ingest_jobs_batch_id', table_name='ingest_jobs')
+    op.drop_table('ingest_jobs')
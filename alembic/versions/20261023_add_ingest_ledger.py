@@ -0,0 +1,30 @@
+"""add per-ticker ingest ledger
+
+Revision ID: 20261023_add_ingest_ledger
+Revises: 20261022_add_ingest_jobs
+Create Date: 2026-10-23 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261023_add_ingest_ledger'
+down_revision = '20261022_add_ingest_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingest_ledger',
+        sa.Column('ticker', sa.String(length=32), primary_key=True),
+        sa.Column('accession', sa.String(length=32), nullable=True),
+        sa.Column('source_url', sa.Text(), nullable=True),
+        sa.Column('doc_id', sa.String(length=64), nullable=True),
+        sa.Column('ingested_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_ledger')
@@ -0,0 +1,38 @@
+"""unique (ticker, event_date) on earnings_events
+
+Revision ID: 20261024_unique_earnings_events
+Revises: 20261023_add_ingest_ledger
+Create Date: 2026-10-24 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261024_unique_earnings_events'
+down_revision = '20261023_add_ingest_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Drop duplicates left by the old check-then-insert refresh, keeping the oldest row
+    op.execute(
+        """
+        DELETE FROM earnings_events e
+        USING earnings_events k
+        WHERE e.ticker = k.ticker AND e.event_date = k.event_date
+          AND (e.created_at, e.id) > (k.created_at, k.id)
+        """
+    )
+    op.create_index(
+        'uq_earnings_events_ticker_date',
+        'earnings_events',
+        ['ticker', 'event_date'],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_earnings_events_ticker_date', table_name='earnings_events')
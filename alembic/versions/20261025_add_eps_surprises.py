@@ -0,0 +1,30 @@
+"""add eps_surprises cache table
+
+Revision ID: 20261025_add_eps_surprises
+Revises: 20261024_unique_earnings_events
+Create Date: 2026-10-25 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261025_add_eps_surprises'
+down_revision = '20261024_unique_earnings_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'eps_surprises',
+        sa.Column('ticker', sa.String(length=32), primary_key=True),
+        sa.Column('items', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('sources', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('fetched_at', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('eps_surprises')
@@ -0,0 +1,24 @@
+"""index documents.created_at
+
+Revision ID: 20261026_docs_created_at_idx
+Revises: 20261025_add_eps_surprises
+Create Date: 2026-10-26 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261026_docs_created_at_idx'
+down_revision = '20261025_add_eps_surprises'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Newest-first scans (dashboard report links) read the top of this index
+    op.create_index('ix_documents_created_at', 'documents', ['created_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_created_at', table_name='documents')
@@ -0,0 +1,29 @@
+"""add dashboard_snapshots
+
+Revision ID: 20261027_add_dashboard_snapshots
+Revises: 20261026_docs_created_at_idx
+Create Date: 2026-10-27 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261027_add_dashboard_snapshots'
+down_revision = '20261026_docs_created_at_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dashboard_snapshots',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('built_at', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('dashboard_snapshots')
@@ -0,0 +1,34 @@
+"""add resource_versions and row version stamps
+
+Revision ID: 20261028_add_resource_versions
+Revises: 20261027_add_dashboard_snapshots
+Create Date: 2026-10-28 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261028_add_resource_versions'
+down_revision = '20261027_add_dashboard_snapshots'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'resource_versions',
+        sa.Column('name', sa.String(length=32), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+    )
+    # Existing rows predate versioning: stamped 0, so any delta includes them
+    for table in ('earnings_events', 'highlights'):
+        op.add_column(table, sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'))
+        op.create_index(f'ix_{table}_version', table, ['version'])
+
+
+def downgrade() -> None:
+    for table in ('earnings_events', 'highlights'):
+        op.drop_index(f'ix_{table}_version', table_name=table)
+        op.drop_column(table, 'version')
+    op.drop_table('resource_versions')
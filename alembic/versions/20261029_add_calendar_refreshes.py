@@ -0,0 +1,27 @@
+"""add calendar_refreshes (per-day provider refresh times)
+
+Revision ID: 20261029_add_calendar_refreshes
+Revises: 20261028_add_resource_versions
+Create Date: 2026-10-29 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261029_add_calendar_refreshes'
+down_revision = '20261028_add_resource_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'calendar_refreshes',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('refreshed_at', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('calendar_refreshes')
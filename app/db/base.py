@@ -64,6 +64,37 @@ def init_db() -> None:
             ))
     except Exception as e:
         logger.warning("db: could not ensure documents extra columns: %s", e)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE http_cache ADD COLUMN IF NOT EXISTS size_bytes INTEGER"))
+    except Exception as e:
+        logger.warning("db: could not ensure http_cache columns: %s", e)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_documents_created_at ON documents (created_at)"))
+    except Exception as e:
+        logger.warning("db: could not ensure documents created_at index: %s", e)
+    try:
+        with engine.begin() as conn:
+            for table in ("earnings_events", "highlights"):
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0"))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_version ON {table} (version)"))
+    except Exception as e:
+        logger.warning("db: could not ensure version columns: %s", e)
+    # Only built here when the table is already clean; removing duplicate rows is
+    # left to the 20261024_unique_earnings_events migration (Procfile release step).
+    # Until then, event writes fall back to select-then-insert (persistence.has_events_unique_index).
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_earnings_events_ticker_date ON earnings_events (ticker, event_date)"
+            ))
+    except Exception as e:
+        logger.warning(
+            "db: could not ensure earnings_events unique index (%s); "
+            "run `alembic upgrade head` (20261024_unique_earnings_events drops duplicate rows first)",
+            e,
+        )
     logger.info("db: initialized and tables ensured")
 
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import DateTime, Date, ForeignKey, Integer, String, Text, Float, func
+from sqlalchemy import BigInteger, DateTime, Date, ForeignKey, Index, Integer, String, Text, Float, func, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.dialects.postgresql import JSONB
@@ -15,7 +15,7 @@ class Document(Base):
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
     # P1 metadata
     ticker: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
     company: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -62,6 +62,12 @@ class EarningsEvent(Base):
     status: Mapped[str | None] = mapped_column(String(16), nullable=True)  # upcoming/reported
     source: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0", index=True)  # "events" version of the last write
+
+    __table_args__ = (
+        # Conflict target of the calendar bulk upsert
+        Index("uq_earnings_events_ticker_date", "ticker", "event_date", unique=True),
+    )
 
 
 class Highlight(Base):
@@ -73,6 +79,7 @@ class Highlight(Base):
     summary_json: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     rank_score: Mapped[float | None] = mapped_column(Float, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0", index=True)  # "highlights" version of the insert
 
 
 class Watchlist(Base):
@@ -82,3 +89,91 @@ class Watchlist(Base):
     user_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     ticker: Mapped[str] = mapped_column(String(32), index=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class DocumentExtraction(Base):
+    __tablename__ = "document_extractions"
+
+    doc_id: Mapped[str] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    extractor_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    metrics: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    series: Mapped[dict | None] = mapped_column(JSONB, nullable=True)  # metric kind -> {labels, values, citations}
+    guidance: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    buybacks: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class HttpCacheEntry(Base):
+    __tablename__ = "http_cache"
+
+    key: Mapped[str] = mapped_column(Text, primary_key=True)  # request URL
+    value: Mapped[dict | None] = mapped_column(JSONB, nullable=True)  # parsed JSON body or {"text": ...}
+    etag: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(Text, nullable=True)
+    stored_at: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds of last fetch/revalidation
+    ttl_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)  # downloaded body size (bytes saved per 304)
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (
+        # Claim query scans only runnable rows
+        Index("ix_ingest_jobs_queued", "run_after", "created_at", postgresql_where=text("status = 'queued'")),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    batch_id: Mapped[str] = mapped_column(String(64), index=True)
+    kind: Mapped[str] = mapped_column(String(16))  # symbol | url
+    payload: Mapped[dict] = mapped_column(JSONB)  # IngestSymbolRequest / IngestUrlRequest fields
+    status: Mapped[str] = mapped_column(String(16), index=True, default="queued")  # queued | running | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    run_after: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)  # retry backoff
+    locked_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    locked_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    doc_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class IngestLedger(Base):
+    __tablename__ = "ingest_ledger"
+
+    ticker: Mapped[str] = mapped_column(String(32), primary_key=True)
+    accession: Mapped[str | None] = mapped_column(String(32), nullable=True)  # latest SEC filing seen when ingested
+    source_url: Mapped[str | None] = mapped_column(Text, nullable=True)  # resolved document URL
+    doc_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    ingested_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class EpsSurprise(Base):
+    __tablename__ = "eps_surprises"
+
+    ticker: Mapped[str] = mapped_column(String(32), primary_key=True)
+    items: Mapped[list | None] = mapped_column(JSONB, nullable=True)  # [{period, reported_eps, estimated_eps, surprise, surprise_pct, provider}], newest first
+    sources: Mapped[list | None] = mapped_column(JSONB, nullable=True)  # providers queried
+    fetched_at: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds of the provider fetch
+
+
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # e.g. "overview"
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)  # precomputed sections (services.dashboard)
+    built_at: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds of the last update
+
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)  # events | documents | highlights | watchlist
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)  # bumped by every write (services.versions)
+
+
+class CalendarRefresh(Base):
+    __tablename__ = "calendar_refreshes"
+
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    refreshed_at: Mapped[float] = mapped_column(Float, nullable=False)  # epoch seconds of the last provider refresh covering the day
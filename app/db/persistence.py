@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
+from datetime import date, timedelta
+import logging
 import uuid
 import numpy as np
+from sqlalchemy import func, inspect, or_, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.db.base import db_session
 from app.db import base as db_base
-from app.db.models import Document, ChunkModel
+from app.db.models import Document, CalendarRefresh, ChunkModel, DashboardSnapshot, DocumentExtraction, EarningsEvent, EpsSurprise, HttpCacheEntry, IngestJob, IngestLedger, ResourceVersion
 from app.models.types import Chunk
 
+logger = logging.getLogger(__name__)
 
 def is_db_enabled() -> bool:
     # Important: reference SessionLocal on the module to avoid stale binding
@@ -71,6 +76,9 @@ def save_document(
                     embedding=emb,
                 )
             )
+        s.flush()
+        # Last statement before commit: the resource_versions row lock is held only until then
+        bump_versions(s, "documents")
         # commit happens in db_session context manager
 
 
@@ -109,3 +117,522 @@ def load_document(doc_id: str) -> Optional[dict]:
                 # Fallback: try numpy conversion if needed
                 embs.append(np.array(r.embedding).tolist())
         return {"chunks": chunks, "embeddings": np.array(embs, dtype=np.float32)}
+
+
+def save_extractions(doc_id: str, version: int, data: dict) -> None:
+    """Persist precomputed extractor output for a document (replaces any prior version)."""
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.query(DocumentExtraction).filter(DocumentExtraction.doc_id == doc_id).delete()
+        s.add(
+            DocumentExtraction(
+                doc_id=doc_id,
+                extractor_version=version,
+                metrics=data.get("metrics"),
+                series=data.get("series"),
+                guidance=data.get("guidance"),
+                buybacks=data.get("buybacks"),
+            )
+        )
+
+
+def load_extractions(doc_id: str, version: int) -> Optional[dict]:
+    """Return stored extractor output, or None if missing or produced by another version."""
+    if not is_db_enabled():
+        return None
+    with db_session() as s:
+        r = s.get(DocumentExtraction, doc_id)
+        if r is None or r.extractor_version != version:
+            return None
+        return {
+            "metrics": r.metrics or {},
+            "series": r.series or {},
+            "guidance": r.guidance or {},
+            "buybacks": r.buybacks or {},
+        }
+
+
+def load_extractions_many(doc_ids: List[str], version: int) -> Dict[str, dict]:
+    """Bulk variant of load_extractions: one query, current-version rows only."""
+    if not is_db_enabled() or not doc_ids:
+        return {}
+    with db_session() as s:
+        rows = (
+            s.query(DocumentExtraction)
+            .filter(DocumentExtraction.doc_id.in_(doc_ids), DocumentExtraction.extractor_version == version)
+            .all()
+        )
+        return {
+            r.doc_id: {
+                "metrics": r.metrics or {},
+                "series": r.series or {},
+                "guidance": r.guidance or {},
+                "buybacks": r.buybacks or {},
+            }
+            for r in rows
+        }
+
+
+def save_extractions_many(version: int, items: Dict[str, dict]) -> None:
+    """Persist extractor output for several documents in one transaction."""
+    if not is_db_enabled() or not items:
+        return
+    with db_session() as s:
+        s.query(DocumentExtraction).filter(DocumentExtraction.doc_id.in_(list(items))).delete(synchronize_session=False)
+        for doc_id, data in items.items():
+            s.add(
+                DocumentExtraction(
+                    doc_id=doc_id,
+                    extractor_version=version,
+                    metrics=data.get("metrics"),
+                    series=data.get("series"),
+                    guidance=data.get("guidance"),
+                    buybacks=data.get("buybacks"),
+                )
+            )
+
+
+def load_chunks_many(doc_ids: List[str]) -> Dict[str, List[Chunk]]:
+    """Load chunk text (no embeddings) for several documents in one query."""
+    if not is_db_enabled() or not doc_ids:
+        return {}
+    out: Dict[str, List[Chunk]] = {}
+    with db_session() as s:
+        rows = (
+            s.query(ChunkModel.id, ChunkModel.doc_id, ChunkModel.text, ChunkModel.section, ChunkModel.page_start, ChunkModel.page_end)
+            .filter(ChunkModel.doc_id.in_(doc_ids))
+            .order_by(ChunkModel.doc_id.asc(), ChunkModel.page_start.asc(), ChunkModel.id.asc())
+            .all()
+        )
+        for cid, did, text, section, page_start, page_end in rows:
+            out.setdefault(did, []).append(
+                Chunk(id=cid, text=text, section=section, page_start=page_start, page_end=page_end)
+            )
+    return out
+
+
+def latest_doc_ids_for_tickers(tickers: List[str]) -> Dict[str, str]:
+    """Map each ticker to its most recently created document id (one query)."""
+    if not is_db_enabled() or not tickers:
+        return {}
+    out: Dict[str, str] = {}
+    with db_session() as s:
+        rows = (
+            s.query(Document.ticker, Document.id)
+            .filter(Document.ticker.in_(tickers))
+            .order_by(Document.ticker.asc(), Document.created_at.desc(), Document.id.desc())
+            .all()
+        )
+        for tk, did in rows:
+            out.setdefault(tk, did)
+    return out
+
+
+def load_http_cache(key: str) -> Optional[dict]:
+    """Return the stored response-cache row for `key` as a dict, or None."""
+    if not is_db_enabled():
+        return None
+    with db_session() as s:
+        r = s.get(HttpCacheEntry, key)
+        if r is None:
+            return None
+        return {
+            "value": r.value,
+            "etag": r.etag,
+            "last_modified": r.last_modified,
+            "stored_at": r.stored_at,
+            "ttl_seconds": r.ttl_seconds,
+            "size_bytes": r.size_bytes,
+        }
+
+
+def save_http_cache(
+    key: str,
+    value: Optional[dict],
+    etag: Optional[str],
+    last_modified: Optional[str],
+    stored_at: float,
+    ttl_seconds: int,
+    size_bytes: Optional[int] = None,
+) -> None:
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.merge(HttpCacheEntry(
+            key=key, value=value, etag=etag, last_modified=last_modified,
+            stored_at=stored_at, ttl_seconds=ttl_seconds, size_bytes=size_bytes,
+        ))
+
+
+def touch_http_cache(key: str, stored_at: float) -> None:
+    """Mark a cached response as revalidated (304) without rewriting its body."""
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.query(HttpCacheEntry).filter(HttpCacheEntry.key == key).update({"stored_at": stored_at}, synchronize_session=False)
+
+
+# Ingestion job queue (services.ingest_queue)
+def enqueue_ingest_jobs(batch_id: str, jobs: List[Tuple[str, str, dict]], max_attempts: int) -> None:
+    """jobs: (job_id, kind, payload)."""
+    if not is_db_enabled() or not jobs:
+        return
+    with db_session() as s:
+        s.add_all([
+            IngestJob(id=jid, batch_id=batch_id, kind=kind, payload=payload, status="queued", attempts=0, max_attempts=max_attempts)
+            for jid, kind, payload in jobs
+        ])
+
+
+def claim_ingest_job(worker_id: str) -> Optional[dict]:
+    """Atomically take the oldest runnable job; concurrent workers skip rows another one has locked."""
+    if not is_db_enabled():
+        return None
+    with db_session() as s:
+        row = s.execute(text(
+            """
+            UPDATE ingest_jobs
+               SET status = 'running', attempts = attempts + 1, locked_by = :w, locked_at = now(), updated_at = now()
+             WHERE id = (
+                   SELECT id FROM ingest_jobs
+                    WHERE status = 'queued' AND run_after <= now()
+                    ORDER BY run_after, created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1)
+            RETURNING id, batch_id, kind, payload, attempts, max_attempts
+            """
+        ), {"w": worker_id}).mappings().first()
+        return dict(row) if row else None
+
+
+def finish_ingest_job(job_id: str, doc_id: Optional[str] = None, error: Optional[str] = None, retry_in: Optional[float] = None) -> None:
+    """done (doc_id), re-queued after `retry_in` seconds, or failed (error, no retry)."""
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        if error is None:
+            values: Dict[str, Any] = {"status": "done", "doc_id": doc_id, "error": None}
+        elif retry_in is not None:
+            values = {"status": "queued", "error": error, "run_after": func.now() + timedelta(seconds=float(retry_in))}
+        else:
+            values = {"status": "failed", "error": error}
+        s.query(IngestJob).filter(IngestJob.id == job_id).update(
+            {**values, "locked_by": None, "locked_at": None}, synchronize_session=False
+        )
+
+
+def requeue_stale_ingest_jobs(lease_seconds: int) -> int:
+    """Jobs left 'running' by a crashed worker go back to the queue (their attempt still counts)."""
+    if not is_db_enabled():
+        return 0
+    with db_session() as s:
+        res = s.execute(text(
+            """
+            UPDATE ingest_jobs
+               SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                   error = COALESCE(error, 'worker lease expired'), locked_by = NULL, locked_at = NULL, updated_at = now()
+             WHERE status = 'running' AND locked_at < now() - make_interval(secs => :lease)
+            """
+        ), {"lease": int(lease_seconds)})
+        return int(res.rowcount or 0)
+
+
+def load_ingest_jobs(job_ids: Optional[List[str]] = None, batch_id: Optional[str] = None) -> List[dict]:
+    if not is_db_enabled():
+        return []
+    with db_session() as s:
+        q = s.query(IngestJob)
+        if job_ids is not None:
+            q = q.filter(IngestJob.id.in_(job_ids))
+        if batch_id is not None:
+            q = q.filter(IngestJob.batch_id == batch_id)
+        rows = q.order_by(IngestJob.created_at.asc(), IngestJob.id.asc()).all()
+        return [
+            {
+                "id": r.id,
+                "batch_id": r.batch_id,
+                "kind": r.kind,
+                "payload": r.payload,
+                "status": r.status,
+                "attempts": r.attempts,
+                "max_attempts": r.max_attempts,
+                "doc_id": r.doc_id,
+                "error": r.error,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+            }
+            for r in rows
+        ]
+
+
+def load_ingest_ledger(tickers: List[str]) -> Dict[str, dict]:
+    if not is_db_enabled() or not tickers:
+        return {}
+    with db_session() as s:
+        rows = s.query(IngestLedger).filter(IngestLedger.ticker.in_(tickers)).all()
+        return {
+            r.ticker: {"accession": r.accession, "source_url": r.source_url, "doc_id": r.doc_id, "ingested_at": r.ingested_at}
+            for r in rows
+        }
+
+
+def save_ingest_ledger(ticker: str, accession: Optional[str], source_url: Optional[str], doc_id: Optional[str]) -> None:
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.merge(IngestLedger(ticker=ticker, accession=accession, source_url=source_url, doc_id=doc_id, ingested_at=func.now()))
+
+
+# Rows per INSERT statement (7 bind params each; well under Postgres' 65535 limit)
+EARNINGS_UPSERT_CHUNK = 1000
+_EVENT_FILL_COLUMNS = ("company", "time_of_day", "status")
+
+
+def earnings_event_rows(items: List[dict], source: str) -> List[dict]:
+    """Provider calendar items -> insertable rows, one per (ticker, event_date).
+    Items with a bad date are dropped; duplicates within the batch fill each other's gaps
+    (ON CONFLICT cannot touch the same row twice in one statement).
+    """
+    rows: Dict[Tuple[str, date], dict] = {}
+    for it in items:
+        try:
+            ev_date = date.fromisoformat(it["event_date"])  # YYYY-MM-DD
+            sym = it["ticker"].upper()
+        except Exception:
+            continue
+        row = rows.get((sym, ev_date))
+        if row is None:
+            rows[(sym, ev_date)] = {
+                "id": str(uuid.uuid4()),
+                "ticker": sym,
+                "event_date": ev_date,
+                "company": it.get("company") or None,
+                "time_of_day": it.get("time_of_day") or None,
+                "status": it.get("status") or None,
+                "source": it.get("source") or source,
+            }
+            continue
+        for col in _EVENT_FILL_COLUMNS:
+            if not row[col] and it.get(col):
+                row[col] = it[col]
+    out = list(rows.values())
+    for row in out:
+        row["status"] = row["status"] or "upcoming"
+    return out
+
+
+def earnings_upsert_stmt(rows: List[dict]):
+    """INSERT ... ON CONFLICT (ticker, event_date) DO UPDATE that only fills missing
+    company / time_of_day / status; rows with nothing to fill are left untouched
+    (and keep their version stamp). Returns the ids of the rows it wrote.
+    """
+    stmt = pg_insert(EarningsEvent).values(rows)
+    ex = stmt.excluded
+    tbl = EarningsEvent.__table__.c
+    set_ = {col: func.coalesce(func.nullif(tbl[col], ""), ex[col]) for col in _EVENT_FILL_COLUMNS}
+    changed = or_(*[(func.nullif(tbl[col], "").is_(None) & ex[col].isnot(None)) for col in _EVENT_FILL_COLUMNS])
+    stmt = stmt.on_conflict_do_update(index_elements=[tbl.ticker, tbl.event_date], set_=set_, where=changed)
+    return stmt.returning(tbl.id)
+
+
+EVENTS_UNIQUE_INDEX = "uq_earnings_events_ticker_date"
+_events_unique_index: Dict[Any, bool] = {}  # engine -> index seen (only a positive answer is cached)
+
+
+def has_events_unique_index(s: Any) -> bool:
+    """Whether ON CONFLICT (ticker, event_date) is usable. Databases that still hold
+    duplicate events lack the index until the 20261024_unique_earnings_events
+    migration has run; writes then fall back to select-then-insert.
+    """
+    bind = s.get_bind()
+    if _events_unique_index.get(bind):
+        return True
+    conn = s.connection()
+    if conn.dialect.name == "postgresql":
+        found = conn.execute(text(f"SELECT to_regclass('{EVENTS_UNIQUE_INDEX}')")).scalar() is not None
+    else:
+        found = any(ix["name"] == EVENTS_UNIQUE_INDEX for ix in inspect(conn).get_indexes("earnings_events"))
+    if found:
+        _events_unique_index[bind] = True
+    else:
+        logger.warning("db: %s missing; earnings events written without ON CONFLICT (run `alembic upgrade head`)", EVENTS_UNIQUE_INDEX)
+    return found
+
+
+def _upsert_events_without_index(s: Any, rows: List[dict]) -> List[str]:
+    """upsert_earnings_events' statement emulated with a SELECT per chunk: insert the new
+    (ticker, event_date) pairs, fill missing fields on every existing row for a pair
+    (duplicates included). Returns the ids written."""
+    existing: Dict[Tuple[str, date], List[EarningsEvent]] = {}
+    for i in range(0, len(rows), EARNINGS_UPSERT_CHUNK):
+        chunk = rows[i:i + EARNINGS_UPSERT_CHUNK]
+        q = s.query(EarningsEvent).filter(
+            EarningsEvent.ticker.in_({r["ticker"] for r in chunk}),
+            EarningsEvent.event_date.in_({r["event_date"] for r in chunk}),
+        )
+        for e in q:
+            existing.setdefault((e.ticker, e.event_date), []).append(e)
+    written: List[str] = []
+    for row in rows:
+        found = existing.get((row["ticker"], row["event_date"]))
+        if not found:
+            s.add(EarningsEvent(**row))
+            written.append(row["id"])
+            continue
+        for e in found:
+            missing = [col for col in _EVENT_FILL_COLUMNS if not getattr(e, col) and row[col]]
+            for col in missing:
+                setattr(e, col, row[col])
+            if missing:
+                written.append(e.id)
+    s.flush()
+    return written
+
+
+def ensure_earnings_event(s: Any, row: dict) -> Optional[str]:
+    """Insert the event unless one exists for its (ticker, event_date); returns the new id, or None."""
+    if has_events_unique_index(s):
+        return s.execute(
+            pg_insert(EarningsEvent)
+            .values(**row)
+            .on_conflict_do_nothing(index_elements=["ticker", "event_date"])
+            .returning(EarningsEvent.id)
+        ).scalar()
+    exists = (
+        s.query(EarningsEvent.id)
+        .filter(EarningsEvent.ticker == row["ticker"], EarningsEvent.event_date == row["event_date"])
+        .first()
+    )
+    if exists is not None:
+        return None
+    s.add(EarningsEvent(**row))
+    s.flush()
+    return row["id"]
+
+
+def upsert_earnings_events(items: List[dict], source: str) -> int:
+    """Bulk upsert a batch of calendar items (`source` unless an item names its own);
+    returns the number of distinct rows sent.
+    """
+    if not is_db_enabled():
+        return 0
+    rows = earnings_event_rows(items, source)
+    if not rows:
+        return 0
+    with db_session() as s:
+        written: List[str] = []
+        if has_events_unique_index(s):
+            for i in range(0, len(rows), EARNINGS_UPSERT_CHUNK):
+                written += s.execute(earnings_upsert_stmt(rows[i:i + EARNINGS_UPSERT_CHUNK])).scalars().all()
+        else:
+            written = _upsert_events_without_index(s, rows)
+        if written:
+            # Version taken after the upserts (its row lock is held until commit), then
+            # stamped on the rows inserted or filled
+            version = bump_versions(s, "events")["events"]
+            for i in range(0, len(written), EARNINGS_UPSERT_CHUNK):
+                s.execute(
+                    update(EarningsEvent)
+                    .where(EarningsEvent.id.in_(written[i:i + EARNINGS_UPSERT_CHUNK]))
+                    .values(version=version)
+                )
+    return len(rows)
+
+
+def _eps_entry(r: EpsSurprise) -> dict:
+    return {"items": r.items or [], "sources": r.sources or [], "fetched_at": r.fetched_at}
+
+
+def load_eps_surprises(tickers: List[str]) -> Dict[str, dict]:
+    """ticker -> {items, sources, fetched_at} for the cached tickers, in one query."""
+    if not is_db_enabled() or not tickers:
+        return {}
+    with db_session() as s:
+        rows = s.query(EpsSurprise).filter(EpsSurprise.ticker.in_(tickers)).all()
+        return {r.ticker: _eps_entry(r) for r in rows}
+
+
+def save_eps_surprises(ticker: str, items: List[dict], sources: List[str], fetched_at: float) -> None:
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.merge(EpsSurprise(ticker=ticker, items=items, sources=sources, fetched_at=fetched_at))
+
+
+def load_eps_for_day(day: date, limit: int) -> List[Tuple[str, Optional[str], Optional[dict]]]:
+    """[(ticker, company, cached EPS entry or None)] for the day's calendar, one query
+    (events LEFT JOIN eps_surprises), ordered by ticker.
+    """
+    if not is_db_enabled():
+        return []
+    with db_session() as s:
+        rows = (
+            s.query(EarningsEvent.ticker, EarningsEvent.company, EpsSurprise)
+            .outerjoin(EpsSurprise, EpsSurprise.ticker == EarningsEvent.ticker)
+            .filter(EarningsEvent.event_date == day)
+            .order_by(EarningsEvent.ticker.asc())
+            .limit(max(1, int(limit)))
+            .all()
+        )
+        return [(t, company, _eps_entry(eps) if eps is not None else None) for t, company, eps in rows]
+
+
+def load_dashboard_snapshot(key: str) -> Optional[dict]:
+    """The stored snapshot's data (with built_at), or None."""
+    if not is_db_enabled():
+        return None
+    with db_session() as s:
+        r = s.get(DashboardSnapshot, key)
+        if r is None:
+            return None
+        return {**(r.data or {}), "built_at": r.built_at}
+
+
+def save_dashboard_snapshot(key: str, data: dict, built_at: float) -> None:
+    if not is_db_enabled():
+        return
+    with db_session() as s:
+        s.merge(DashboardSnapshot(key=key, data=data, built_at=built_at))
+
+
+def mark_calendar_refreshed(start: date, end: date, refreshed_at: float) -> None:
+    """Record that a provider refresh covering [start, end] completed at `refreshed_at` (epoch seconds)."""
+    if not is_db_enabled():
+        return
+    days = [{"day": start + timedelta(days=i), "refreshed_at": refreshed_at} for i in range((end - start).days + 1)]
+    stmt = pg_insert(CalendarRefresh).values(days)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CalendarRefresh.day], set_={"refreshed_at": stmt.excluded.refreshed_at}
+    )
+    with db_session() as s:
+        s.execute(stmt)
+
+
+def load_calendar_refreshes(start: date, end: date) -> Dict[date, float]:
+    """day -> time of the last provider refresh covering it, for the days in [start, end] refreshed so far."""
+    if not is_db_enabled():
+        return {}
+    with db_session() as s:
+        rows = s.query(CalendarRefresh).filter(CalendarRefresh.day >= start, CalendarRefresh.day <= end).all()
+        return {r.day: float(r.refreshed_at) for r in rows}
+
+
+def bump_versions(s: Any, *names: str) -> Dict[str, int]:
+    """Increment resource versions in the writer's session (same transaction as the write)
+    and return the new values, for stamping the written rows. The row lock taken here is
+    held until commit, so versions become visible in order.
+    """
+    stmt = pg_insert(ResourceVersion).values([{"name": n, "version": 1} for n in names])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.name], set_={"version": ResourceVersion.version + 1}
+    ).returning(ResourceVersion.name, ResourceVersion.version)
+    return {name: int(v) for name, v in s.execute(stmt).all()}
+
+
+def load_versions() -> Dict[str, int]:
+    """name -> current version for every resource written so far."""
+    if not is_db_enabled():
+        return {}
+    with db_session() as s:
+        return {r.name: int(r.version) for r in s.query(ResourceVersion).all()}
@@ -14,7 +14,12 @@ from app.routes import watchlist
 from app.routes import market
 from app.routes import admin
 from app.routes import dashboard
+from app.routes import ingest_jobs
 from app.db.base import init_db
+from app.services.extractions import shutdown_pool
+from app.services.http_clients import init_clients, close_clients
+from app.services.quote_hub import stop_hub
+from app.services.ticker_index import load_index
 
 app = FastAPI(title="Earnings AI Backend")
 
@@ -40,12 +45,22 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Resource-Version"],  # conditional / delta polling (services.versions)
 )
 
 @app.on_event("startup")
-def _startup():
+async def _startup():
     # Initialize DB if configured (P1)
     init_db()
+    init_clients()
+    load_index()
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    shutdown_pool()
+    await stop_hub()
+    await close_clients()
 
 app.include_router(health.router)
 app.include_router(upload.router, prefix="/api")
@@ -57,6 +72,7 @@ app.include_router(watchlist.router, prefix="/api")
 app.include_router(market.router, prefix="/api")
 app.include_router(admin.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
+app.include_router(ingest_jobs.router, prefix="/api")
 
 @app.get("/")
 def root():
@@ -60,3 +60,23 @@ class GuidanceResponse(BaseModel):
 
 class BuybacksResponse(BaseModel):
     buybacks: Dict[str, Any]
+
+
+class BatchExtractionRequest(BaseModel):
+    doc_ids: List[str] = []
+    tickers: List[str] = []  # resolved to each ticker's latest document
+    include: List[str] = ["metrics", "guidance"]  # any of metrics, series, guidance, buybacks
+
+
+class BatchExtractionItem(BaseModel):
+    doc_id: Optional[str] = None
+    ticker: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+    data: Dict[str, Any] = {}
+
+
+class BatchExtractionResponse(BaseModel):
+    items: List[BatchExtractionItem]
+    requested: int
+    success: int
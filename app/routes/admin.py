@@ -12,16 +12,19 @@ from app.db.base import db_session
 from app.db.models import EarningsEvent, IngestionRun
 from app.db.persistence import is_db_enabled
 from app.routes.discovery import ingest_symbol, IngestSymbolRequest
+from app.services.ingest_queue import submit
 from app.services.metrics import begin_run, end_run
+from app.services.rate_limit import request_priority, PRIORITY_BACKGROUND
 
 router = APIRouter()
 log = logging.getLogger(__name__)
 
 
 @router.post("/admin/ingest_today")
-async def admin_ingest_today(limit: int = 50, batch: int = 6, prefer: str | None = None) -> Dict:
+async def admin_ingest_today(limit: int = 50, batch: int = 6, prefer: str | None = None, queue: bool = False) -> Dict:
     """Manually ingest today's earnings PDFs (press releases/transcripts).
     Mirrors the worker job but exposed as an admin endpoint for testing.
+    With queue=1 the tickers go to the ingestion job queue and the batch id is returned immediately.
     """
     today = date.today()
     # Collect tickers within session; return only plain strings
@@ -45,10 +48,16 @@ async def admin_ingest_today(limit: int = 50, batch: int = 6, prefer: str | None
 
     tickers = tickers[: max(1, min(int(limit), len(tickers)))]
 
+    if queue:
+        batch_id, jobs = submit(tickers, [], prefer)
+        return {"date": today.isoformat(), "requested": len(tickers), "batch_id": batch_id, "jobs": jobs, "tickers": tickers}
+
     sem = asyncio.Semaphore(max(1, min(int(batch), 10)))
     results: List[Dict] = []
 
     begin_run()
+    # Bulk ingestion yields provider rate limits to interactive requests
+    request_priority.set(PRIORITY_BACKGROUND)
 
     async def _run_one(t: str):
         async with sem:
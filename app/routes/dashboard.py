@@ -1,15 +1,14 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
 from pydantic import BaseModel
-from sqlalchemy import and_
 
-from app.db.base import db_session
-from app.db.models import Document, EarningsEvent, Watchlist
 from app.db.persistence import is_db_enabled
+from app.services.dashboard import SNAPSHOT_VERSIONS, get_snapshot, new_report_count, overview_for, snapshot_token
+from app.services.versions import conditional, make_etag, parse_token
 
 router = APIRouter()
 
@@ -57,33 +56,32 @@ class DashboardOverviewOut(BaseModel):
     watchlist_risk: List[RiskRowOut]
     alert_timeline: List[AlertItemOut]
     counts: dict
+    version: Optional[str] = None
+    unchanged: List[str] = []
 
 
-def _event_to_out(ev: EarningsEvent) -> DashboardEventOut:
+def _event_to_out(ev: dict) -> DashboardEventOut:
     return DashboardEventOut(
-        id=ev.id,
-        ticker=ev.ticker,
-        company=ev.company,
-        event_date=(ev.event_date.isoformat() if ev.event_date else ""),
-        time_of_day=ev.time_of_day,
-        status=ev.status,
+        id=ev["id"],
+        ticker=ev["ticker"],
+        company=ev["company"],
+        event_date=ev["event_date"] or "",
+        time_of_day=ev["time_of_day"],
+        status=ev["status"],
     )
 
 
-def _to_utc_dt_from_ms(ms: Optional[int]) -> Optional[datetime]:
-    if not ms:
-        return None
-    try:
-        return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
-    except Exception:
-        return None
-
-
 @router.get("/dashboard/overview", response_model=DashboardOverviewOut)
 async def dashboard_overview(
+    request: Request,
+    response: Response,
     limit: int = Query(default=8, ge=1, le=50),
     since_ts: Optional[int] = Query(default=None, description="Epoch milliseconds for new report detection"),
-) -> DashboardOverviewOut:
+    since_version: Optional[str] = Query(
+        default=None,
+        description="`version` of an earlier response: sections unchanged since then come back empty and are listed in `unchanged`",
+    ),
+):
     now = datetime.now(timezone.utc)
     today_d = now.date()
 
@@ -121,140 +119,133 @@ async def dashboard_overview(
             },
         )
 
-    since_dt = _to_utc_dt_from_ms(since_ts)
-
-    with db_session() as s:
-        range_start = today_d - timedelta(days=7)
-        range_end = today_d + timedelta(days=14)
-        rows: List[EarningsEvent] = (
-            s.query(EarningsEvent)
-            .filter(and_(EarningsEvent.event_date >= range_start, EarningsEvent.event_date <= range_end))
-            .order_by(EarningsEvent.event_date.asc(), EarningsEvent.ticker.asc())
-            .all()
-        )
-
-        today_rows = [r for r in rows if r.event_date == today_d][:limit]
-        upcoming_rows = [r for r in rows if r.event_date > today_d][:limit]
-        reported_rows = [
-            r for r in rows if (r.status or "").lower() == "reported" or (r.event_date and r.event_date < today_d)
-        ]
-        reported_rows = sorted(reported_rows, key=lambda r: r.event_date or today_d, reverse=True)[:limit]
-
-        docs: List[Document] = (
-            s.query(Document)
-            .filter(Document.source_url.isnot(None))
-            .order_by(Document.created_at.desc())
-            .limit(limit * 3)
-            .all()
-        )
-        report_links: List[ReportLinkOut] = []
-        seen = set()
-        for d in docs:
-            if not d.source_url:
-                continue
-            k = f"{d.ticker or ''}|{d.source_url}"
-            if k in seen:
-                continue
-            seen.add(k)
-            created = d.created_at if isinstance(d.created_at, datetime) else None
-            is_new = bool(since_dt and created and created.replace(tzinfo=timezone.utc) > since_dt)
-            report_links.append(
-                ReportLinkOut(
-                    ticker=(d.ticker or "").upper(),
-                    company=d.company,
-                    doc_id=d.id,
-                    source_url=d.source_url,
-                    form_type=d.form_type,
-                    created_at=(created.isoformat() if created else None),
-                    title=(f"{d.form_type} filing" if d.form_type else "Earnings source"),
-                    is_new=is_new,
-                )
-            )
-            if len(report_links) >= limit * 2:
-                break
-
-        watchlist_tickers = [w.ticker.upper() for w in s.query(Watchlist).all()]
-        if not watchlist_tickers:
-            watchlist_tickers = sorted(list({(r.ticker or "").upper() for r in rows if r.ticker}))[:limit]
-
-        risk_rows: List[RiskRowOut] = []
-        for tk in watchlist_tickers[:limit]:
-            tk_events = [r for r in rows if (r.ticker or "").upper() == tk]
-            tk_events = sorted(tk_events, key=lambda r: r.event_date or today_d)
-            ev = tk_events[0] if tk_events else None
-            if ev and ev.event_date:
-                eta_dt = datetime(ev.event_date.year, ev.event_date.month, ev.event_date.day, tzinfo=timezone.utc)
-                diff_hours = (eta_dt - now).total_seconds() / 3600.0
-                if diff_hours <= 24:
-                    risk = "High"
-                elif diff_hours <= 72:
-                    risk = "Medium"
-                else:
-                    risk = "Low"
-                eta_str = eta_dt.isoformat()
+    # Worker-maintained snapshot (services.dashboard): one key lookup, sliced to `limit`;
+    # the since_ts "new report" count is a bisect over its sorted link creation times
+    snap = await get_snapshot()
+    data = overview_for(snap, limit)
+    new_count = new_report_count(snap, since_ts)
+
+    today_rows = data["today"]
+    upcoming_rows = data["upcoming"]
+    reported_rows = data["reported"]
+
+    risk_rows: List[RiskRowOut] = []
+    for ev in data["risk"]:
+        if ev["event_date"]:
+            d = date.fromisoformat(ev["event_date"])
+            eta_dt = datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+            diff_hours = (eta_dt - now).total_seconds() / 3600.0
+            if diff_hours <= 24:
+                risk = "High"
+            elif diff_hours <= 72:
+                risk = "Medium"
             else:
                 risk = "Low"
-                eta_str = "No event in range"
-            risk_rows.append(
-                RiskRowOut(
-                    ticker=tk,
-                    company=(ev.company if ev else None),
-                    eta=eta_str,
-                    time_of_day=(ev.time_of_day if ev else None),
-                    risk=risk,
-                )
+            eta_str = eta_dt.isoformat()
+        else:
+            risk = "Low"
+            eta_str = "No event in range"
+        risk_rows.append(
+            RiskRowOut(
+                ticker=ev["ticker"],
+                company=ev["company"],
+                eta=eta_str,
+                time_of_day=ev["time_of_day"],
+                risk=risk,
             )
+        )
 
-        new_reports = [r for r in report_links if r.is_new]
-        wl_today = [r for r in today_rows if (r.ticker or "").upper() in set(watchlist_tickers)]
+    # The response is a function of the snapshot's versions, the parameters and the
+    # (time-dependent) risk levels: a matching If-None-Match gets a 304 from here
+    token = snapshot_token(snap)
+    etag = make_etag(
+        "dashboard", token, snap.get("day"), limit, min(new_count, limit * 2), since_version, [r.risk for r in risk_rows]
+    )
+    not_modified = conditional(request, response, etag, token)
+    if not_modified is not None:
+        return not_modified
+
+    report_links: List[ReportLinkOut] = []
+    for i, d in enumerate(data["report_links"]):
+        report_links.append(
+            ReportLinkOut(
+                ticker=d["ticker"],
+                company=d["company"],
+                doc_id=d["doc_id"],
+                source_url=d["source_url"],
+                form_type=d["form_type"],
+                created_at=d["created_at"],
+                title=(f"{d['form_type']} filing" if d["form_type"] else "Earnings source"),
+                is_new=i < new_count,  # links are newest first
+            )
+        )
 
-        timeline: List[AlertItemOut] = []
-        if wl_today:
-            timeline.append(
-                AlertItemOut(
-                    severity="high",
-                    title=f"{len(wl_today)} watchlist names report today",
-                    detail="Review BMO/AMC timing and prep scenario notes before market windows.",
-                )
+    new_reports = [r for r in report_links if r.is_new]
+    wl_today = data["today_on_watchlist"]
+
+    timeline: List[AlertItemOut] = []
+    if wl_today:
+        timeline.append(
+            AlertItemOut(
+                severity="high",
+                title=f"{len(wl_today)} watchlist names report today",
+                detail="Review BMO/AMC timing and prep scenario notes before market windows.",
             )
-        if new_reports:
-            timeline.append(
-                AlertItemOut(
-                    severity="medium",
-                    title=f"{len(new_reports)} new reports since last check",
-                    detail="Open source filings/transcripts and refresh context in workspace.",
-                )
+        )
+    if new_reports:
+        timeline.append(
+            AlertItemOut(
+                severity="medium",
+                title=f"{len(new_reports)} new reports since last check",
+                detail="Open source filings/transcripts and refresh context in workspace.",
             )
-        if not watchlist_tickers:
-            timeline.append(
-                AlertItemOut(
-                    severity="low",
-                    title="No watchlist configured",
-                    detail="Add core tickers to unlock portfolio risk monitoring.",
-                )
+        )
+    if not data["followed"]:
+        timeline.append(
+            AlertItemOut(
+                severity="low",
+                title="No watchlist configured",
+                detail="Add core tickers to unlock portfolio risk monitoring.",
             )
-        if not timeline:
-            timeline.append(
-                AlertItemOut(
-                    severity="low",
-                    title="No immediate risks detected",
-                    detail="Pipeline is quiet. Continue monitoring upcoming earnings.",
-                )
+        )
+    if not timeline:
+        timeline.append(
+            AlertItemOut(
+                severity="low",
+                title="No immediate risks detected",
+                detail="Pipeline is quiet. Continue monitoring upcoming earnings.",
             )
-
-        return DashboardOverviewOut(
-            as_of=now.isoformat(),
-            today=[_event_to_out(r) for r in today_rows],
-            upcoming=[_event_to_out(r) for r in upcoming_rows],
-            reported=[_event_to_out(r) for r in reported_rows],
-            report_links=report_links,
-            watchlist_risk=risk_rows,
-            alert_timeline=timeline,
-            counts={
-                "today": len(today_rows),
-                "upcoming": len(upcoming_rows),
-                "reported": len(reported_rows),
-                "report_links": len(report_links),
-                "watchlist_risk": len(risk_rows),
-            },
         )
+
+    counts = {
+        "today": len(today_rows),
+        "upcoming": len(upcoming_rows),
+        "reported": len(reported_rows),
+        "report_links": len(report_links),
+        "watchlist_risk": len(risk_rows),
+    }
+    # Delta: the client already has the event buckets / links from `since_version` if the
+    # versions they depend on haven't moved (counts, risk and alerts are always sent)
+    unchanged: List[str] = []
+    seen = parse_token(since_version, SNAPSHOT_VERSIONS)
+    current = snap.get("versions") or {}
+    if seen is not None:
+        if all(seen[n] == current.get(n) for n in ("events", "watchlist")):
+            unchanged += ["today", "upcoming", "reported"]
+            today_rows, upcoming_rows, reported_rows = [], [], []
+        if seen["documents"] == current.get("documents"):
+            unchanged.append("report_links")
+            report_links = []
+
+    return DashboardOverviewOut(
+        as_of=now.isoformat(),
+        today=[_event_to_out(r) for r in today_rows],
+        upcoming=[_event_to_out(r) for r in upcoming_rows],
+        reported=[_event_to_out(r) for r in reported_rows],
+        report_links=report_links,
+        watchlist_risk=risk_rows,
+        alert_timeline=timeline,
+        counts=counts,
+        version=token,
+        unchanged=unchanged,
+    )
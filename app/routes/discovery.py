@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import asyncio
 import httpx
 import uuid
 import logging
@@ -11,7 +12,6 @@ import re
 import time
 from datetime import datetime
 from sqlalchemy import func
-import hashlib
 
 from app.models.types import UploadResponse, Chunk
 from app.services.pdf_parser import extract_pages_from_pdf
@@ -19,11 +19,16 @@ from app.services.html_parser import extract_pages_from_html
 from app.services.chunker import chunk_pages
 from app.services.embedder import embed_texts
 from app.memory import store
-from app.db.persistence import is_db_enabled, save_document
+from app.db.persistence import bump_versions, is_db_enabled, save_document
 from app.db.base import db_session
 from app.db.models import Document, ChunkModel
 from app.services.highlights import create_highlight_and_event
+from app.services.extractions import materialise_extractions
 from app.services.metrics import now, elapsed_ms, record_http, record_fallback
+from app.services.http_clients import get_client, queued_ms
+from app.services.response_cache import fetch_cached
+from app.services.downloads import Download, DownloadError, download
+from app.services.ticker_index import TickerIndex, get_index, set_index
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -60,46 +65,36 @@ async def ingest_url(req: IngestUrlRequest) -> UploadResponse:
     if not req.url or not req.url.lower().startswith(("http://", "https://")):
         raise HTTPException(status_code=400, detail="Provide a valid http(s) URL to a PDF")
 
-    # Download PDF/HTML
+    # Download PDF/HTML (streamed, size-capped, type sniffed from the first bytes)
     try:
         # Use SEC headers if downloading from sec.gov
         headers = _sec_download_headers() if _is_sec_url(req.url) else None
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=headers) as client:
-            t0 = now()
-            resp = await client.get(req.url)
-            try:
-                provider = "edgar" if _is_sec_url(req.url) else "generic"
-                record_http(provider, "/download", resp.status_code, elapsed_ms(t0))
-            except Exception:
-                pass
-            if resp.status_code >= 400:
-                raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {resp.status_code}")
-            ctype = resp.headers.get("content-type", "").lower()
-            is_pdf = ("application/pdf" in ctype or "application/x-pdf" in ctype) or req.url.lower().endswith(".pdf")
-            is_html = ("text/html" in ctype) or req.url.lower().endswith((".htm", ".html"))
-            if not (is_pdf or is_html):
-                raise HTTPException(status_code=400, detail=f"URL is not PDF/HTML (content-type={ctype})")
-            data = resp.content
-            if not data or len(data) < 1000:
-                raise HTTPException(status_code=400, detail="Downloaded file seems too small to be a valid PDF")
-    except HTTPException:
-        raise
+        provider = "edgar" if _is_sec_url(req.url) else "generic"
+        dl = await download(get_client(provider), req.url, provider=provider, headers=headers, timeout=30.0)
+    except DownloadError as de:
+        raise HTTPException(status_code=400, detail=str(de))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching URL: {e}")
+    try:
+        if dl.size < 1000:
+            raise HTTPException(status_code=400, detail="Downloaded file seems too small to be a valid PDF")
+        data = dl.read()
+    finally:
+        dl.close()
 
     # Parse + chunk + embed
     try:
-        # Choose parser by content type or URL suffix
-        is_html = ("text/html" in ctype) or (req.url.lower().endswith((".htm", ".html")))
+        is_html = dl.kind == "html"
         pages = extract_pages_from_html(data) if is_html else extract_pages_from_pdf(data)
+        del data
         chunks = chunk_pages(pages)
         texts = [c.text for c in chunks]
         embs = embed_texts(texts)
         doc_id = str(uuid.uuid4())
-        # provenance
-        doc_hash = hashlib.sha256(data).hexdigest()
+        # provenance (hash and size computed while streaming)
+        doc_hash = dl.sha256
         page_count = len(pages)
-        file_size_bytes = len(data)
+        file_size_bytes = dl.size
         # store in memory
         store.documents[doc_id] = {
             "chunks": chunks,
@@ -131,6 +126,8 @@ async def ingest_url(req: IngestUrlRequest) -> UploadResponse:
                 )
         except Exception as pe:
             logger.warning("ingest_url: db persist error for doc_id=%s: %s", doc_id, pe)
+        # Ingest-time extraction stage: /metrics, /series, /guidance, /buybacks become lookups
+        materialise_extractions(doc_id, chunks)
         logger.info(
             "ingest_url: doc_id=%s chunks=%d embs_shape=%s ticker=%s url=%s",
             doc_id,
@@ -159,35 +156,35 @@ async def _try_fmp_pdf_url(ticker: str, prefer: Optional[str]) -> Optional[str]:
     # 1) Try press releases
     try:
         url = f"https://financialmodelingprep.com/api/v3/press-releases/{t}?apikey={api_key}&limit=20"
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            t0 = now()
-            r = await client.get(url)
-            try:
-                record_http("fmp", "/press-releases", r.status_code, elapsed_ms(t0))
-            except Exception:
-                pass
-            if r.status_code < 400:
-                items = r.json() or []
-                fallback_html: Optional[str] = None
-                # Look for any link containing .pdf; else keep first HTML link as fallback
-                for it in items:
-                    link = (it or {}).get("link") or (it or {}).get("url") or ""
-                    if isinstance(link, str) and link:
-                        if link.lower().endswith('.pdf') or 'pdf' in link.lower():
-                            return link
-                        if fallback_html is None and link.lower().startswith(('http://', 'https://')):
-                            # Prefer links with press/earnings keywords
-                            if re.search(r"press|earnings|results|release", link, flags=re.I):
-                                fallback_html = link
-                            elif fallback_html is None:
-                                fallback_html = link
-                    content = (it or {}).get("content") or ""
-                    if isinstance(content, str):
-                        m = re.search(r"https?://[^\s\"]+\.pdf", content, flags=re.I)
-                        if m:
-                            return m.group(0)
-                if fallback_html:
-                    return fallback_html
+        client = get_client("fmp")
+        t0 = now()
+        r = await client.get(url, timeout=20.0)
+        try:
+            record_http("fmp", "/press-releases", r.status_code, elapsed_ms(t0), queued_ms=queued_ms(r))
+        except Exception:
+            pass
+        if r.status_code < 400:
+            items = r.json() or []
+            fallback_html: Optional[str] = None
+            # Look for any link containing .pdf; else keep first HTML link as fallback
+            for it in items:
+                link = (it or {}).get("link") or (it or {}).get("url") or ""
+                if isinstance(link, str) and link:
+                    if link.lower().endswith('.pdf') or 'pdf' in link.lower():
+                        return link
+                    if fallback_html is None and link.lower().startswith(('http://', 'https://')):
+                        # Prefer links with press/earnings keywords
+                        if re.search(r"press|earnings|results|release", link, flags=re.I):
+                            fallback_html = link
+                        elif fallback_html is None:
+                            fallback_html = link
+                content = (it or {}).get("content") or ""
+                if isinstance(content, str):
+                    m = re.search(r"https?://[^\s\"]+\.pdf", content, flags=re.I)
+                    if m:
+                        return m.group(0)
+            if fallback_html:
+                return fallback_html
     except Exception:
         pass
     # 2) Could try sec_filings endpoint but many are HTML; skipping for MVP
@@ -207,33 +204,18 @@ def _curated_fallback_pdf(ticker: str) -> Optional[str]:
     return curated.get(t)
 
 
-_cik_cache: Dict[str, Dict[str, str]] = {}
-_tickers_cache_fetched = False
-SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+# Ticker/CIK/company lookups go through the compact index in services.ticker_index, rebuilt
+# from the cached company_tickers.json payload when it changes (and daily by the worker)
+_cik_cache_source: Optional[dict] = None
+SEC_WWW = "https://www.sec.gov"
+SEC_TICKERS_URL = f"{SEC_WWW}/files/company_tickers.json"
+SEC_SUBMISSIONS_BASE = "https://data.sec.gov/submissions"
+SEC_ARCHIVES_BASE = f"{SEC_WWW}/Archives/edgar/data"
 SEC_CACHE_TTL_SECONDS = int(os.getenv("SEC_CACHE_TTL_SECONDS", "21600") or "21600")  # 6h default
 SEC_HTML_CACHE_TTL_SECONDS = int(os.getenv("SEC_HTML_CACHE_TTL_SECONDS", "3600") or "3600")  # 1h default
 SEC_MAX_FILINGS_SCAN = int(os.getenv("SEC_MAX_FILINGS_SCAN", "15") or "15")  # limit scanned filings
-
-# simple in-process cache { key: (ts, ttl, data) }
-_sec_resp_cache: Dict[str, tuple] = {}
-
-
-def _cache_get(key: str):
-    e = _sec_resp_cache.get(key)
-    if not e:
-        return None
-    ts, ttl, data = e
-    if time.time() - ts > ttl:
-        try:
-            _sec_resp_cache.pop(key, None)
-        except Exception:
-            pass
-        return None
-    return data
-
-
-def _cache_set(key: str, ttl: int, data):
-    _sec_resp_cache[key] = (time.time(), ttl, data)
+SEC_SCAN_CONCURRENCY = int(os.getenv("SEC_SCAN_CONCURRENCY", "4") or "4")  # parallel filing-detail fetches
+# SEC responses go through the shared cross-process cache (services.response_cache)
 
 
 def _sec_headers() -> Dict[str, str]:
@@ -258,37 +240,25 @@ def _is_sec_url(url: str) -> bool:
     except Exception:
         return False
 
-async def _load_ticker_map() -> None:
-    global _tickers_cache_fetched
-    if _tickers_cache_fetched:
-        return
+async def _load_ticker_map(force: bool = False) -> None:
+    global _cik_cache_source
+    idx = get_index()
+    if not force and idx is not None and time.time() - idx.built_at < SEC_CACHE_TTL_SECONDS:
+        return  # loaded from the worker-built file, or rebuilt recently
     try:
-        cached = _cache_get(SEC_TICKERS_URL)
-        data = None
-        if cached is None:
-            async with httpx.AsyncClient(timeout=30.0, headers=_sec_headers()) as client:
-                t0 = now()
-                r = await client.get(SEC_TICKERS_URL)
-                try:
-                    record_http("edgar", "/files/company_tickers.json", r.status_code, elapsed_ms(t0))
-                except Exception:
-                    pass
-                if r.status_code < 400:
-                    data = r.json()
-                    _cache_set(SEC_TICKERS_URL, SEC_CACHE_TTL_SECONDS, data)
-        else:
-            data = cached
-        if data is not None:
-                # Format: { "0": {"ticker":"A","cik_str":123, "title":"..."}, ... }
-                for _, item in (data or {}).items():
-                    tic = (item or {}).get("ticker")
-                    if not tic:
-                        continue
-                    _cik_cache[tic.upper()] = {
-                        "cik": str((item or {}).get("cik_str") or "").strip(),
-                        "company": (item or {}).get("title") or None,
-                    }
-                _tickers_cache_fetched = True
+        data = await fetch_cached(
+            get_client("edgar"),
+            SEC_TICKERS_URL,
+            ttl=SEC_CACHE_TTL_SECONDS,
+            provider="edgar",
+            endpoint="/files/company_tickers.json",
+            headers=_sec_headers(),
+            timeout=30.0,
+        )
+        # Same object while the cached entry is fresh, so the index is only rebuilt on refresh
+        if data is not None and (force or data is not _cik_cache_source):
+            set_index(TickerIndex.from_sec_payload(data), persist=True)
+            _cik_cache_source = data
     except Exception:
         # silent fail; we'll try on-demand resolution later if needed
         pass
@@ -296,8 +266,188 @@ async def _load_ticker_map() -> None:
 
 async def _resolve_cik_and_company(ticker: str) -> Optional[Dict[str, str]]:
     await _load_ticker_map()
-    info = _cik_cache.get(ticker.upper())
-    return info
+    idx = get_index()
+    return idx.get(ticker) if idx is not None else None
+
+
+class AutocompleteItem(BaseModel):
+    ticker: str
+    cik: str
+    company: Optional[str] = None
+    match: str  # ticker | ticker_prefix | name | fuzzy
+
+
+@router.get("/autocomplete", response_model=List[AutocompleteItem])
+async def autocomplete(q: str = "", limit: int = 10) -> List[AutocompleteItem]:
+    """Ticker / company suggestions: exact ticker, ticker prefix, company-name prefix, else fuzzy name matches."""
+    q = (q or "").strip()[:64]
+    if not q:
+        return []
+    await _load_ticker_map()
+    idx = get_index()
+    if idx is None:
+        return []
+    # Off the event loop: a fuzzy fallback scans every company-name word
+    items = await asyncio.to_thread(idx.search, q, max(1, min(25, int(limit))))
+    return [AutocompleteItem(**it) for it in items]
+
+
+# Exhibit link scoring for filing detail pages: one pass over the page picks up
+# both PDF and HTML links; the extension group tells them apart.
+_EXHIBIT_HREF_RE = re.compile(r'href=["\']([^"\']+\.(pdf|html?))["\']', re.I)
+_EX99_RE = re.compile(r'ex-?99')
+_PDF_KEYWORD_RE = re.compile(r'press|earnings|release|results')
+_HTML_KEYWORD_RE = re.compile(r'pr|earnings|release|results')  # 'pr' also covers 'press'
+# An ex-99 PDF (score >= 4) is taken as the filing's answer without waiting for its other detail pages
+SEC_HIGH_CONFIDENCE_PDF_SCORE = 4
+
+
+def _abs_sec_url(href: str, base_dir: str) -> str:
+    if href.startswith("http"):
+        return href
+    if href.startswith("/"):
+        return SEC_WWW + href
+    return base_dir + href
+
+
+def _detail_candidates(html: str, base_dir: str) -> List[tuple]:
+    """Scored exhibit links on a filing detail page: [(kind, url, score)], PDFs first, in page order.
+    Score: ex-99 +3, press-release keywords +2 ('pr' counts for HTML), matching extension +1.
+    """
+    pdfs: List[tuple] = []
+    htmls: List[tuple] = []
+    for href, ext in _EXHIBIT_HREF_RE.findall(html):
+        name = href.lower()
+        score = 1 + (3 if _EX99_RE.search(name) else 0)
+        if ext.lower() == "pdf":
+            if _PDF_KEYWORD_RE.search(name):
+                score += 2
+            pdfs.append(("pdf", _abs_sec_url(href, base_dir), score))
+        else:
+            if _HTML_KEYWORD_RE.search(name):
+                score += 2
+            htmls.append(("html", _abs_sec_url(href, base_dir), score))
+    return pdfs + htmls
+
+
+def _pick_exhibit(pages: List[tuple]) -> Optional[tuple]:
+    """Best (url, referer) over [(detail_url, candidates)] in detail order: best PDF, else a strong HTML exhibit."""
+    best_pdf = best_html = None
+    best_score = -1
+    for detail, cands in pages:
+        for kind, url, score in cands:
+            if kind == "pdf" and score > best_score:
+                best_score, best_pdf = score, (url, detail)
+            elif kind == "html" and score > best_score and score >= 3:  # require minimal strength
+                best_score, best_html = score, (url, detail)
+    return best_pdf or best_html
+
+
+async def _scan_filings(client: httpx.AsyncClient, filings: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Resolve the first filing (in the given order) that yields a usable document.
+    Detail pages of all candidate filings are fetched concurrently (bounded by
+    SEC_SCAN_CONCURRENCY, and by the EDGAR rate limiter underneath). Filings are
+    still decided strictly in order; once the answer is known, outstanding
+    fetches are cancelled.
+    """
+    sem = asyncio.Semaphore(max(1, SEC_SCAN_CONCURRENCY))
+    pending_mark = object()
+    pages: List[List] = []  # per filing: per detail url, pending_mark or candidate list
+    tasks: Dict[asyncio.Task, tuple] = {}
+
+    async def _fetch(detail: str, base_dir: str) -> List[tuple]:
+        # Cache the scored exhibit list, not the page: cache hits skip parsing and index pages stay small
+        async with sem:
+            cands = await fetch_cached(
+                client, detail, ttl=SEC_HTML_CACHE_TTL_SECONDS, provider="edgar", endpoint="/archives-detail",
+                headers=_sec_headers(), timeout=12.0, parse=lambda html: _detail_candidates(html, base_dir),
+                key=f"exhibits:{detail}",
+            )
+        return cands or []
+
+    for i, fl in enumerate(filings):
+        if fl["primary"].lower().endswith('.pdf'):
+            pages.append([])
+            continue
+        pages.append([pending_mark] * len(fl["details"]))
+        for j, detail in enumerate(fl["details"]):
+            tasks[asyncio.create_task(_fetch(detail, fl["base_dir"]))] = (i, j)
+
+    outstanding = set(tasks)  # tasks whose page results are not recorded yet
+
+    def _decide(i: int):
+        """(decided, result) for filing i given the detail pages received so far."""
+        fl = filings[i]
+        referer = fl["details"][0]
+        if fl["primary"].lower().endswith('.pdf'):
+            return True, (fl["base_dir"] + fl["primary"], referer)
+        got: List[tuple] = []
+        for detail, cands in zip(fl["details"], pages[i]):
+            if cands is pending_mark:
+                return False, None
+            got.append((detail, cands))
+            if any(k == "pdf" and sc >= SEC_HIGH_CONFIDENCE_PDF_SCORE for k, _, sc in cands):
+                break
+        picked = _pick_exhibit(got)
+        if picked:
+            return True, picked
+        # Fallback: use primary document if it's HTML
+        if fl["primary"].lower().endswith((".htm", ".html")):
+            return True, (fl["base_dir"] + fl["primary"], referer)
+        return True, None
+
+    try:
+        i = 0
+        while i < len(filings):
+            decided, res = _decide(i)
+            if decided:
+                if res:
+                    return {"url": res[0], "form_type": filings[i]["form"], "referer": res[1]}
+                i += 1
+                continue
+            done, _ = await asyncio.wait(outstanding, return_when=asyncio.FIRST_COMPLETED)
+            outstanding -= done
+            for t in done:
+                fi, dj = tasks[t]
+                try:
+                    pages[fi][dj] = t.result()
+                except Exception:
+                    pages[fi][dj] = []
+        return None
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+async def _edgar_latest_filing(ticker: str, forms: Optional[List[str]] = None, ttl: Optional[int] = None) -> Optional[Dict[str, str]]:
+    """Most recent filing of the given forms as {accession, form, filed}, from the cached submissions feed.
+    A short `ttl` makes this a cheap "anything new?" probe: stale entries are revalidated with a conditional GET.
+    """
+    info = await _resolve_cik_and_company(ticker)
+    if not info or not info.get("cik"):
+        return None
+    want = {f.upper() for f in (forms or ["8-K", "10-Q", "10-K"])}
+    try:
+        j = await fetch_cached(
+            get_client("edgar"), f"{SEC_SUBMISSIONS_BASE}/CIK{info['cik'].zfill(10)}.json",
+            ttl=SEC_CACHE_TTL_SECONDS if ttl is None else ttl, provider="edgar", endpoint="/submissions",
+            headers=_sec_headers(), timeout=12.0,
+        )
+    except Exception:
+        return None
+    recent = ((j or {}).get("filings") or {}).get("recent") or {}
+    forms_l = recent.get("form") or []
+    accno = recent.get("accessionNumber") or []
+    filed = recent.get("filingDate") or []
+    best: Optional[Dict[str, str]] = None
+    for i, f in enumerate(forms_l):
+        if (f or "").upper() not in want or i >= len(accno) or not accno[i]:
+            continue
+        d = filed[i] if i < len(filed) else ""
+        if best is None or (d or "") > best["filed"]:
+            best = {"accession": accno[i], "form": f, "filed": d or ""}
+    return best
 
 
 async def _edgar_pdf_url_for_ticker(ticker: str, prefer_forms: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
@@ -308,27 +458,21 @@ async def _edgar_pdf_url_for_ticker(ticker: str, prefer_forms: Optional[List[str
     cik_str = info["cik"]
     try:
         cik10 = cik_str.zfill(10)
-        sub_url = f"https://data.sec.gov/submissions/CIK{cik10}.json"
+        sub_url = f"{SEC_SUBMISSIONS_BASE}/CIK{cik10}.json"
         # Reuse a single client and keep timeouts conservative
-        async with httpx.AsyncClient(timeout=12.0, headers=_sec_headers(), follow_redirects=True) as client:
-            j = _cache_get(sub_url)
-            if j is None:
-                t0 = now()
-                r = await client.get(sub_url)
-                try:
-                    record_http("edgar", "/submissions", r.status_code, elapsed_ms(t0))
-                except Exception:
-                    pass
-                if r.status_code >= 400:
-                    return None
-                j = r.json() or {}
-                _cache_set(sub_url, SEC_CACHE_TTL_SECONDS, j)
-            # Compute recent lists regardless of cache hit
-            recent = (j.get("filings") or {}).get("recent") or {}
-            forms = recent.get("form") or []
-            accno = recent.get("accessionNumber") or []
-            primary = recent.get("primaryDocument") or []
-            filed = recent.get("filingDate") or []
+        client = get_client("edgar")
+        j = await fetch_cached(
+            client, sub_url, ttl=SEC_CACHE_TTL_SECONDS, provider="edgar", endpoint="/submissions",
+            headers=_sec_headers(), timeout=12.0,
+        )
+        if j is None:
+            return None
+        # Compute recent lists regardless of cache hit
+        recent = (j.get("filings") or {}).get("recent") or {}
+        forms = recent.get("form") or []
+        accno = recent.get("accessionNumber") or []
+        primary = recent.get("primaryDocument") or []
+        filed = recent.get("filingDate") or []
 
         order = prefer_forms or ["8-K", "10-Q", "10-K"]
         # Build candidate indexes by form preference then recency
@@ -350,191 +494,127 @@ async def _edgar_pdf_url_for_ticker(ticker: str, prefer_forms: Optional[List[str
         cik_nozero = str(int(cik_str))  # remove leading zeros for path
         # Limit number of filings scanned to avoid long request bursts
         indexes = indexes[:SEC_MAX_FILINGS_SCAN]
+        filings: List[Dict[str, str]] = []
         for i in indexes:
-            f = (forms[i] or "").upper()
             an = (accno[i] or "").strip()
-            pd = (primary[i] or "").strip()
             if not an:
                 continue
             acc_nodash = an.replace("-", "")
-            base_dir = f"https://www.sec.gov/Archives/edgar/data/{cik_nozero}/{acc_nodash}/"
-            # If primary doc is a PDF, use it
-            if pd.lower().endswith('.pdf'):
-                referer = f"{base_dir}{an}-index.html"
-                return {"url": base_dir + pd, "form_type": f, "company": info.get("company"), "referer": referer}
-            # Otherwise, scan filing detail page(s) for PDF/HTML exhibits with caching
-            details = [f"{base_dir}{an}-index.html", f"{base_dir}{an}-index.htm", base_dir]
-            best_pdf = None
-            best_referer = None
-            best_html = None
-            best_html_referer = None
-            best_score = -1
-            for detail in details:
-                try:
-                    html = _cache_get(detail)
-                    if html is None:
-                        t0d = now()
-                        rr = await client.get(detail)
-                        try:
-                            record_http("edgar", "/archives-detail", rr.status_code, elapsed_ms(t0d))
-                        except Exception:
-                            pass
-                        if rr.status_code >= 400:
-                            continue
-                        html = rr.text or ""
-                        _cache_set(detail, SEC_HTML_CACHE_TTL_SECONDS, html)
-                    # find links ending .pdf
-                    for href in re.findall(r'href=["\']([^"\']+\.pdf)["\']', html, flags=re.I):
-                        href_clean = href
-                        if href_clean.startswith("http"):
-                            pdf_url = href_clean
-                        else:
-                            if href_clean.startswith("/"):
-                                pdf_url = "https://www.sec.gov" + href_clean
-                            else:
-                                pdf_url = base_dir + href_clean
-                        name = href_clean.lower()
-                        score = 0
-                        if 'ex99' in name or 'ex-99' in name:
-                            score += 3
-                        if 'press' in name or 'earnings' in name or 'release' in name or 'results' in name:
-                            score += 2
-                        if name.endswith('.pdf'):
-                            score += 1
-                        if score > best_score:
-                            best_score = score
-                            best_pdf = pdf_url
-                            best_referer = detail
-                    # find links ending .htm/.html with press/earnings keywords
-                    for href in re.findall(r'href=["\']([^"\']+\.(?:htm|html))["\']', html, flags=re.I):
-                        href_clean = href
-                        if href_clean.startswith("http"):
-                            html_url = href_clean
-                        else:
-                            if href_clean.startswith("/"):
-                                html_url = "https://www.sec.gov" + href_clean
-                            else:
-                                html_url = base_dir + href_clean
-                        name = href_clean.lower()
-                        score = 0
-                        if 'ex99' in name or 'ex-99' in name:
-                            score += 3
-                        if 'press' in name or 'earnings' in name or 'release' in name or 'results' in name or 'pr' in name:
-                            score += 2
-                        if name.endswith(('.htm', '.html')):
-                            score += 1
-                        if score > best_score and score >= 3:  # require minimal strength
-                            best_score = score
-                            best_html = html_url
-                            best_html_referer = detail
-                except Exception:
-                    continue
-            if best_pdf:
-                return {"url": best_pdf, "form_type": f, "company": info.get("company"), "referer": best_referer}
-            if best_html:
-                return {"url": best_html, "form_type": f, "company": info.get("company"), "referer": best_html_referer}
-            # Fallback: use primary document if it's HTML
-            if pd.lower().endswith((".htm", ".html")):
-                referer = f"{base_dir}{an}-index.html"
-                return {"url": base_dir + pd, "form_type": f, "company": info.get("company"), "referer": referer}
+            base_dir = f"{SEC_ARCHIVES_BASE}/{cik_nozero}/{acc_nodash}/"
+            filings.append({
+                "form": (forms[i] or "").upper(),
+                "primary": (primary[i] or "").strip(),
+                "base_dir": base_dir,
+                # Filing detail page(s) to scan for PDF/HTML exhibits; the first doubles as referer
+                "details": [f"{base_dir}{an}-index.html", f"{base_dir}{an}-index.htm", base_dir],
+            })
+        found = await _scan_filings(client, filings)
+        if found:
+            found["company"] = info.get("company")
+        return found
     except Exception:
         return None
-    return None
 
 
-@router.post("/ingest_symbol", response_model=UploadResponse)
-async def ingest_symbol(req: IngestSymbolRequest) -> UploadResponse:
-    if not req.ticker:
-        raise HTTPException(status_code=400, detail="ticker is required")
-    ticker = req.ticker.upper()
-
-    # Try provider(s)
-    pdf_url: Optional[str] = None
-    form_type: Optional[str] = None
-    company_name: Optional[str] = None
+class SymbolIngest:
+    """State of one ticker's ingestion as it moves through the stages below.
+    ingest_symbol runs them back to back; the worker pipelines them (services.ingest_pipeline).
+    """
+
+    def __init__(self, ticker: str, prefer: Optional[str] = None) -> None:
+        self.ticker = ticker.upper()
+        self.prefer = prefer
+        self.pdf_url: Optional[str] = None
+        self.form_type: Optional[str] = None
+        self.company_name: Optional[str] = None
+        self.referer_url: Optional[str] = None
+        self.last_provider: Optional[str] = None
+        self.used_source: str = "primary"
+        self.dl: Optional[Download] = None
+        self.pages: List[tuple] = []
+        self.chunks: List[Chunk] = []
+        self.embs = None
+        self.doc_id: Optional[str] = None
+
+
+async def resolve_symbol_source(job: SymbolIngest) -> SymbolIngest:
+    """Stage 1: find a document URL for the ticker (FMP / EDGAR / curated)."""
+    ticker = job.ticker
     # Provider order: if prefer=edgar, try EDGAR first, else try FMP first
-    referer_url: Optional[str] = None
-    last_provider: Optional[str] = None
-    used_source: str = "primary"
-    if (req.prefer or '').lower() == 'edgar':
+    if (job.prefer or '').lower() == 'edgar':
         ed = await _edgar_pdf_url_for_ticker(ticker)
         if ed and ed.get('url'):
-            pdf_url = ed['url']
-            form_type = ed.get('form_type')
-            company_name = ed.get('company')
-            referer_url = ed.get('referer')
-            last_provider = 'edgar'
-        if not pdf_url:
-            alt = await _try_fmp_pdf_url(ticker, req.prefer)
+            job.pdf_url = ed['url']
+            job.form_type = ed.get('form_type')
+            job.company_name = ed.get('company')
+            job.referer_url = ed.get('referer')
+            job.last_provider = 'edgar'
+        if not job.pdf_url:
+            alt = await _try_fmp_pdf_url(ticker, job.prefer)
             if alt:
-                pdf_url = alt
-                last_provider = 'fmp'
+                job.pdf_url = alt
+                job.last_provider = 'fmp'
     else:
-        alt = await _try_fmp_pdf_url(ticker, req.prefer)
+        alt = await _try_fmp_pdf_url(ticker, job.prefer)
         if alt:
-            pdf_url = alt
-            last_provider = 'fmp'
-        if not pdf_url:
+            job.pdf_url = alt
+            job.last_provider = 'fmp'
+        if not job.pdf_url:
             ed = await _edgar_pdf_url_for_ticker(ticker)
             if ed and ed.get('url'):
-                pdf_url = ed['url']
-                form_type = ed.get('form_type')
-                company_name = ed.get('company')
-                referer_url = ed.get('referer')
-                last_provider = 'edgar'
-    if not pdf_url:
-        pdf_url = _curated_fallback_pdf(ticker)
-    if not pdf_url:
+                job.pdf_url = ed['url']
+                job.form_type = ed.get('form_type')
+                job.company_name = ed.get('company')
+                job.referer_url = ed.get('referer')
+                job.last_provider = 'edgar'
+    if not job.pdf_url:
+        job.pdf_url = _curated_fallback_pdf(ticker)
+    if not job.pdf_url:
         raise HTTPException(status_code=404, detail=f"No PDF source found for {ticker}")
+    return job
+
+
+def _headers_for(url: str, referer: Optional[str]):
+    if _is_sec_url(url):
+        h = _sec_download_headers()
+        if referer:
+            h["Referer"] = referer
+        return h
+    return None
+
 
-    # Reuse ingest_url pipeline with robust fallback; allow HTML as well.
-    def _headers_for(url: str, referer: Optional[str]):
-        if _is_sec_url(url):
-            h = _sec_download_headers()
-            if referer:
-                h["Referer"] = referer
-            return h
+async def _download_any(url: str, referer: Optional[str]) -> Optional[Download]:
+    provider = "edgar" if _is_sec_url(url) else ("fmp" if "financialmodelingprep.com" in (url or "") else "generic")
+    try:
+        dl = await download(get_client(provider), url, provider=provider, headers=_headers_for(url, referer), timeout=30.0)
+    except DownloadError as de:
+        logger.info("ingest_symbol: skipped %s: %s", url, de)
+        return None
+    except Exception:
+        return None
+    if dl.size < 1000:
+        dl.close()
         return None
+    return dl
 
-    async def _download_any(url: str, referer: Optional[str]) -> Optional[tuple[bytes, str]]:
-        try:
-            headers = _headers_for(url, referer)
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True, headers=headers) as client:
-                t0 = now()
-                r = await client.get(url)
-                try:
-                    prov = "edgar" if _is_sec_url(url) else ("fmp" if "financialmodelingprep.com" in (url or "") else "generic")
-                    record_http(prov, "/download", r.status_code, elapsed_ms(t0))
-                except Exception:
-                    pass
-                if r.status_code >= 400:
-                    return None
-                ctype = (r.headers.get("content-type", "") or "").lower()
-                data = r.content
-                if not data or len(data) < 1000:
-                    return None
-                # accept any content-type; parser will decide
-                return data, ctype
-        except Exception:
-            return None
 
-    first = await _download_any(pdf_url, referer_url)
-    data: Optional[bytes] = first[0] if first else None
-    ctype: Optional[str] = first[1] if first else None
-    if data is None:
+async def download_symbol_source(job: SymbolIngest) -> SymbolIngest:
+    """Stage 2: download the resolved URL, falling back to the other provider, then curated."""
+    ticker = job.ticker
+    dl = await _download_any(job.pdf_url, job.referer_url)
+    if dl is None:
         # Try the alternate provider, then curated
-        if last_provider == 'edgar':
-            alt = await _try_fmp_pdf_url(ticker, req.prefer)
+        if job.last_provider == 'edgar':
+            alt = await _try_fmp_pdf_url(ticker, job.prefer)
             if alt:
                 try:
                     record_fallback("to_fmp")
                 except Exception:
                     pass
-                got = await _download_any(alt, None)
-                if got is not None:
-                    data, ctype = got
-                    pdf_url = alt
-        elif last_provider == 'fmp':
+                dl = await _download_any(alt, None)
+                if dl is not None:
+                    job.pdf_url = alt
+        elif job.last_provider == 'fmp':
             ed = await _edgar_pdf_url_for_ticker(ticker)
             if ed and ed.get('url'):
                 alt = ed['url']
@@ -542,76 +622,109 @@ async def ingest_symbol(req: IngestSymbolRequest) -> UploadResponse:
                     record_fallback("to_edgar")
                 except Exception:
                     pass
-                got = await _download_any(alt, ed.get('referer'))
-                if got is not None:
-                    data, ctype = got
-                    pdf_url = alt
-                    form_type = ed.get('form_type')
-                    company_name = ed.get('company')
-        if data is None:
+                dl = await _download_any(alt, ed.get('referer'))
+                if dl is not None:
+                    job.pdf_url = alt
+                    job.form_type = ed.get('form_type')
+                    job.company_name = ed.get('company')
+        if dl is None:
             alt2 = _curated_fallback_pdf(ticker)
             if alt2:
                 try:
                     record_fallback("to_curated")
                 except Exception:
                     pass
-                got = await _download_any(alt2, None)
-                if got is not None:
-                    data, ctype = got
-                    pdf_url = alt2
-            used_source = "curated"
-        if data is None:
+                dl = await _download_any(alt2, None)
+                if dl is not None:
+                    job.pdf_url = alt2
+            job.used_source = "curated"
+        if dl is None:
             raise HTTPException(status_code=400, detail="Failed to fetch URL from providers (EDGAR/FMP) and fallback")
+    job.dl = dl
+    return job
+
 
+def parse_symbol_document(job: SymbolIngest) -> SymbolIngest:
+    """Stage 3 (CPU): parse the download and chunk it."""
     try:
-        # Choose parser by content-type or URL suffix
-        is_html = bool((ctype or "").startswith("text/html") or pdf_url.lower().endswith((".htm", ".html")))
-        pages = extract_pages_from_html(data) if is_html else extract_pages_from_pdf(data)
-        chunks = chunk_pages(pages)
-        texts = [c.text for c in chunks]
-        embs = embed_texts(texts)
-        doc_id = str(uuid.uuid4())
-        # provenance
-        doc_hash = hashlib.sha256(data).hexdigest()
-        page_count = len(pages)
-        file_size_bytes = len(data)
-        store.documents[doc_id] = {
-            "chunks": chunks,
-            "embeddings": embs,
-            "meta": {
-                "ticker": ticker,
-                "company": company_name,
-                "source_url": pdf_url,
-                "filename": ticker,
-                "is_sample": (used_source == "curated"),
-                "doc_hash": doc_hash,
-                "page_count": page_count,
-                "file_size_bytes": file_size_bytes,
-                "pdf_vs_html": ("html" if pdf_url.lower().endswith((".htm", ".html")) else "pdf"),
-            },
-        }
+        data = job.dl.read()
+    finally:
+        job.dl.close()
+    # Parser chosen by the kind sniffed from the first bytes of the download
+    job.pages = extract_pages_from_html(data) if job.dl.kind == "html" else extract_pages_from_pdf(data)
+    job.chunks = chunk_pages(job.pages)
+    return job
+
+
+def embed_symbol_document(job: SymbolIngest) -> SymbolIngest:
+    """Stage 4: embed the chunks."""
+    job.embs = embed_texts([c.text for c in job.chunks])
+    return job
+
+
+def persist_symbol_document(job: SymbolIngest) -> SymbolIngest:
+    """Stage 5: register the document in memory and the DB, and materialise its extractions."""
+    ticker, dl = job.ticker, job.dl
+    doc_id = job.doc_id = str(uuid.uuid4())
+    store.documents[doc_id] = {
+        "chunks": job.chunks,
+        "embeddings": job.embs,
+        "meta": {
+            "ticker": ticker,
+            "company": job.company_name,
+            "source_url": job.pdf_url,
+            "filename": ticker,
+            "is_sample": (job.used_source == "curated"),
+            # provenance (hash and size computed while streaming)
+            "doc_hash": dl.sha256,
+            "page_count": len(job.pages),
+            "file_size_bytes": dl.size,
+            "pdf_vs_html": dl.kind,
+        },
+    }
+    try:
+        if is_db_enabled():
+            save_document(
+                doc_id,
+                ticker,
+                job.chunks,
+                job.embs,
+                ticker=ticker,
+                company=job.company_name,
+                form_type=job.form_type,
+                source_url=job.pdf_url,
+                ingest_status=("curated_fallback" if job.used_source == "curated" else "ingested_symbol"),
+            )
+    except Exception as pe:
+        logger.warning("ingest_symbol: db persist error for doc_id=%s: %s", doc_id, pe)
+    materialise_extractions(doc_id, job.chunks)
+    logger.info("ingest_symbol: ticker=%s url=%s doc_id=%s chunks=%d", ticker, job.pdf_url, doc_id, len(job.chunks))
+    return job
+
+
+def highlight_symbol_document(job: SymbolIngest) -> SymbolIngest:
+    """Stage 6: create the highlight and ensure today's earnings event (DB only)."""
+    if is_db_enabled():
         try:
-            if is_db_enabled():
-                save_document(
-                    doc_id,
-                    ticker,
-                    chunks,
-                    embs,
-                    ticker=ticker,
-                    company=company_name,
-                    form_type=form_type,
-                    source_url=pdf_url,
-                    ingest_status=("curated_fallback" if used_source == "curated" else "ingested_symbol"),
-                )
-                # Create highlight + ensure event
-                try:
-                    create_highlight_and_event(ticker=ticker, company=company_name, doc_id=doc_id, chunks=chunks)
-                except Exception:
-                    pass
-        except Exception as pe:
-            logger.warning("ingest_symbol: db persist error for doc_id=%s: %s", doc_id, pe)
-        logger.info("ingest_symbol: ticker=%s url=%s doc_id=%s chunks=%d", ticker, pdf_url, doc_id, len(chunks))
-        return UploadResponse(doc_id=doc_id, chunk_count=len(chunks))
+            create_highlight_and_event(ticker=job.ticker, company=job.company_name, doc_id=job.doc_id, chunks=job.chunks)
+        except Exception:
+            pass
+    return job
+
+
+@router.post("/ingest_symbol", response_model=UploadResponse)
+async def ingest_symbol(req: IngestSymbolRequest) -> UploadResponse:
+    if not req.ticker:
+        raise HTTPException(status_code=400, detail="ticker is required")
+    job = SymbolIngest(req.ticker, req.prefer)
+    await resolve_symbol_source(job)
+    await download_symbol_source(job)
+    try:
+        parse_symbol_document(job)
+        embed_symbol_document(job)
+        persist_symbol_document(job)
+        highlight_symbol_document(job)
+        return UploadResponse(doc_id=job.doc_id, chunk_count=len(job.chunks))
     except HTTPException:
         raise
     except Exception as e:
@@ -671,6 +784,8 @@ async def delete_doc(doc_id: str):
                 d = s.get(Document, doc_id)
                 if d is not None:
                     s.delete(d)
+                    s.flush()
+                    bump_versions(s, "documents")
                     deleted_doc = True
             except Exception as e:
                 logger.warning("delete_doc: db error for doc_id=%s: %s", doc_id, e)
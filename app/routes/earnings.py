@@ -1,23 +1,22 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
 from datetime import date, datetime, timedelta
-from sqlalchemy import and_, func
+from sqlalchemy import func
 import os
 import uuid
 
 from app.db.base import db_session
 from app.db.models import EarningsEvent, Highlight
-from app.db.persistence import is_db_enabled
+from app.db.persistence import is_db_enabled, load_eps_for_day
+from app.services.earnings_calendar import CALENDAR_MAX_RANGE_DAYS, get_calendar, revalidate_if_stale
 from app.services.providers.fmp import fetch_earnings_calendar as fetch_earnings_calendar_fmp
-from app.services.providers.finnhub import (
-    fetch_earnings_calendar as fetch_earnings_calendar_finnhub,
-    fetch_eps_surprises as finnhub_eps,
-)
-from app.services.providers.alpha_vantage import fetch_quarterly_earnings as av_eps
+from app.services.providers.finnhub import fetch_earnings_calendar as fetch_earnings_calendar_finnhub
+from app.services.eps_surprises import get_entries as get_eps_entries, get_entry as get_eps_entry
+from app.services.versions import conditional, get_versions, make_etag, version_token
 
 router = APIRouter()
 
@@ -80,9 +79,33 @@ def _pick_latest(items: List[dict]) -> Optional[dict]:
     return items_sorted[0] if items_sorted else None
 
 
+def _calendar_range(start: Optional[str], end: Optional[str]) -> tuple[date, date]:
+    try:
+        start_d = date.fromisoformat(start) if start else date.today() - timedelta(days=3)
+        end_d = date.fromisoformat(end) if end else date.today() + timedelta(days=7)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid date format; use YYYY-MM-DD")
+    # Ranges key the calendar cache and size provider refreshes
+    if (end_d - start_d).days + 1 > CALENDAR_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range too long; at most {CALENDAR_MAX_RANGE_DAYS} days")
+    return start_d, end_d
+
+
+def _is_explicit(refresh: Optional[str]) -> bool:
+    return bool(refresh and refresh.strip().lower() in ("1", "true", "yes"))
+
+
+_SINCE_VERSION_DOC = "Only rows written after this version (the X-Resource-Version of an earlier response)"
+
+
 # ---------- Endpoints ----------
-@router.get("/earnings/calendar", response_model=List[EarningsEventOut])
-async def earnings_calendar(start: Optional[str] = None, end: Optional[str] = None, refresh: Optional[str] = None) -> List[EarningsEventOut]:
+async def earnings_calendar(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    refresh: Optional[str] = None,
+    since_version: Optional[int] = None,
+    version: Optional[int] = None,
+) -> List[EarningsEventOut]:
     # Fallback curated sample if DB disabled
     if not is_db_enabled():
         today = date.today()
@@ -92,121 +115,56 @@ async def earnings_calendar(start: Optional[str] = None, end: Optional[str] = No
         ]
         return sample
 
-    # Parse dates
-    try:
-        start_d = date.fromisoformat(start) if start else date.today() - timedelta(days=3)
-        end_d = date.fromisoformat(end) if end else date.today() + timedelta(days=7)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid date format; use YYYY-MM-DD")
+    start_d, end_d = _calendar_range(start, end)
+
+    # Served from the DB / in-process cache; stale ranges refresh in the background.
+    # Only an explicit refresh (worker, admin) waits for the providers.
+    rows = await get_calendar(start_d, end_d, refresh=_is_explicit(refresh), version=version, since_version=since_version)
+    return [
+        EarningsEventOut(
+            id=r["id"],
+            ticker=r["ticker"],
+            company=r["company"],
+            event_date=_iso(r["event_date"]),
+            time_of_day=r["time_of_day"],
+            status=r["status"],
+        )
+        for r in rows
+    ]
 
-    with db_session() as s:
-        q = s.query(EarningsEvent).filter(
-            and_(EarningsEvent.event_date >= start_d, EarningsEvent.event_date <= end_d)
-        ).order_by(EarningsEvent.event_date.asc(), EarningsEvent.ticker.asc())
-        rows: List[EarningsEvent] = q.all()
-
-        need_refresh = False
-        if refresh and refresh.strip().lower() in ("1", "true", "yes"):  # explicit refresh
-            need_refresh = True
-        if not rows:  # nothing in DB for range, try to populate
-            need_refresh = True
-
-        if need_refresh:
-            inserted_any = False
-            # Try FMP first
-            fmp_key = (os.getenv("FMP_API_KEY") or "").strip()
-            if fmp_key:
-                try:
-                    items = await fetch_earnings_calendar_fmp(start_d, end_d, fmp_key)
-                except Exception:
-                    items = []
-                for it in items:
-                    try:
-                        ev_date = date.fromisoformat(it["event_date"])  # YYYY-MM-DD
-                    except Exception:
-                        continue
-                    sym = it["ticker"].upper()
-                    ex = (
-                        s.query(EarningsEvent)
-                        .filter(EarningsEvent.ticker == sym, EarningsEvent.event_date == ev_date)
-                        .first()
-                    )
-                    if ex is None:
-                        s.add(
-                            EarningsEvent(
-                                id=str(uuid.uuid4()),
-                                ticker=sym,
-                                company=it.get("company"),
-                                event_date=ev_date,
-                                time_of_day=it.get("time_of_day"),
-                                status=it.get("status") or "upcoming",
-                                source="fmp",
-                            )
-                        )
-                    else:
-                        # update missing fields
-                        if not ex.company and it.get("company"):
-                            ex.company = it.get("company")
-                        if not ex.time_of_day and it.get("time_of_day"):
-                            ex.time_of_day = it.get("time_of_day")
-                        if not ex.status and it.get("status"):
-                            ex.status = it.get("status")
-                if items:
-                    inserted_any = True
-
-            # If FMP didn't return, try Finnhub
-            if not inserted_any:
-                fh_key = (os.getenv("FINNHUB_API_KEY") or "").strip()
-                if fh_key:
-                    try:
-                        items = await fetch_earnings_calendar_finnhub(start_d, end_d, fh_key)
-                    except Exception:
-                        items = []
-                    for it in items:
-                        try:
-                            ev_date = date.fromisoformat(it["event_date"])  # YYYY-MM-DD
-                        except Exception:
-                            continue
-                        sym = it["ticker"].upper()
-                        ex = (
-                            s.query(EarningsEvent)
-                            .filter(EarningsEvent.ticker == sym, EarningsEvent.event_date == ev_date)
-                            .first()
-                        )
-                        if ex is None:
-                            s.add(
-                                EarningsEvent(
-                                    id=str(uuid.uuid4()),
-                                    ticker=sym,
-                                    company=it.get("company"),
-                                    event_date=ev_date,
-                                    time_of_day=it.get("time_of_day"),
-                                    status=it.get("status") or "upcoming",
-                                    source="finnhub",
-                                )
-                            )
-                        else:
-                            if not ex.company and it.get("company"):
-                                ex.company = it.get("company")
-                            if not ex.time_of_day and it.get("time_of_day"):
-                                ex.time_of_day = it.get("time_of_day")
-                            if not ex.status and it.get("status"):
-                                ex.status = it.get("status")
-
-            # requery after attempts
-            rows = q.all()
 
-        return [
-            EarningsEventOut(
-                id=r.id,
-                ticker=r.ticker,
-                company=r.company,
-                event_date=_iso(r.event_date),
-                time_of_day=r.time_of_day,
-                status=r.status,
-            )
-            for r in rows
-        ]
+@router.get("/earnings/calendar", response_model=List[EarningsEventOut])
+async def get_earnings_calendar(
+    request: Request,
+    response: Response,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    refresh: Optional[str] = None,
+    since_version: Optional[int] = Query(default=None, description=_SINCE_VERSION_DOC),
+):
+    if not is_db_enabled() or _is_explicit(refresh):
+        return await earnings_calendar(start, end, refresh, since_version)
+    start_d, end_d = _calendar_range(start, end)
+    # Versioned by the "events" stamp (services.versions): 304 / empty delta without touching rows
+    version = int((await get_versions()).get("events") or 0)
+    token = str(version)
+    not_modified = conditional(request, response, make_etag("calendar", token, start_d, end_d, since_version), token)
+    if not_modified is not None or (since_version is not None and since_version >= version):
+        await revalidate_if_stale(start_d, end_d)
+        return not_modified or []
+    return await earnings_calendar(start, end, refresh, since_version, version)
+
+
+def _summary_out(ticker: str, company: Optional[str], entry: Optional[dict], limit: int) -> EarningsSummaryOut:
+    items = (entry or {}).get("items") or []
+    latest = _pick_latest(items)
+    return EarningsSummaryOut(
+        ticker=ticker,
+        company=company,
+        latest=(EPSSurpriseItem(**latest) if latest else None),
+        eps=[EPSSurpriseItem(**x) for x in items[: max(0, int(limit))]],
+        sources=list((entry or {}).get("sources") or []),
+    )
 
 
 @router.get("/earnings/summary/{ticker}", response_model=EarningsSummaryOut)
@@ -214,32 +172,8 @@ async def earnings_summary(ticker: str, limit: int = 4) -> EarningsSummaryOut:
     t = (ticker or "").upper()
     if not t:
         raise HTTPException(status_code=400, detail="ticker is required")
-    # Keys
-    fh_key = (os.getenv("FINNHUB_API_KEY") or "").strip()
-    av_key = (os.getenv("ALPHA_VANTAGE_API_KEY") or "").strip()
-    # Fetch concurrently
-    tasks = []
-    if fh_key:
-        tasks.append(finnhub_eps(t, fh_key, limit=limit))
-    if av_key:
-        tasks.append(av_eps(t, av_key, limit=limit))
-    results: List[List[dict]] = []
-    if tasks:
-        results = await asyncio.gather(*tasks, return_exceptions=False)
-    # Flatten + annotate providers are already in payload
-    eps_items: List[dict] = []
-    for lst in results:
-        eps_items.extend(lst or [])
-    # Deduplicate by (period, reported_eps) best-effort
-    seen = set()
-    dedup: List[dict] = []
-    for it in eps_items:
-        k = (it.get("period"), it.get("reported_eps"))
-        if k in seen:
-            continue
-        seen.add(k)
-        dedup.append(it)
-    latest = _pick_latest(dedup)
+    # Cached EPS surprises (memory -> DB -> providers, single-flight per ticker)
+    entry = await get_eps_entry(t)
     # Try to enrich company from DB events
     company: Optional[str] = None
     if is_db_enabled():
@@ -251,36 +185,23 @@ async def earnings_summary(ticker: str, limit: int = 4) -> EarningsSummaryOut:
                 .first()
             )
             company = ev.company if ev else None
-    # Sources
-    srcs = []
-    if fh_key:
-        srcs.append("finnhub")
-    if av_key:
-        srcs.append("alpha_vantage")
-    return EarningsSummaryOut(
-        ticker=t,
-        company=company,
-        latest=(EPSSurpriseItem(**latest) if latest else None),
-        eps=[EPSSurpriseItem(**x) for x in dedup[:limit]],
-        sources=srcs,
-    )
+    return _summary_out(t, company, entry, limit)
 
 
 @router.get("/earnings/summaries/today", response_model=List[EarningsSummaryOut])
 async def earnings_summaries_today(limit: int = 10, per_ticker: int = 4) -> List[EarningsSummaryOut]:
-    # Determine today tickers
+    # Determine today tickers, their companies and cached EPS entries in one query
     today = date.today()
     tickers: List[str] = []
+    companies: dict[str, Optional[str]] = {}
+    known: Optional[dict[str, Optional[dict]]] = None
     if is_db_enabled():
-        with db_session() as s:
-            rows = (
-                s.query(EarningsEvent.ticker)
-                .filter(EarningsEvent.event_date == today)
-                .order_by(EarningsEvent.ticker.asc())
-                .all()
-            )
-            tickers = [t for (t,) in rows][: max(1, min(int(limit), len(rows)))]
+        rows = await asyncio.to_thread(load_eps_for_day, today, limit)
+        tickers = [t for t, _, _ in rows]
+        companies = {t: c for t, c, _ in rows}
+        known = {t: e for t, _, e in rows}
     if not tickers:
+        known = None
         # Fallback: query providers for today range to get symbols
         fh_key = (os.getenv("FINNHUB_API_KEY") or "").strip()
         fmp_key = (os.getenv("FMP_API_KEY") or "").strip()
@@ -299,14 +220,12 @@ async def earnings_summaries_today(limit: int = 10, per_ticker: int = 4) -> List
                 pass
     if not tickers:
         return []
-    # Build summaries concurrently
-    async def _one(tk: str):
-        try:
-            return await earnings_summary(tk, limit=per_ticker)
-        except Exception:
-            return EarningsSummaryOut(ticker=tk, company=None, latest=None, eps=[], sources=[])
-    outs = await asyncio.gather(*[_one(t) for t in tickers])
-    return outs
+    # Stale / missing entries are fetched concurrently (bounded, single-flight per ticker)
+    try:
+        entries = await get_eps_entries(tickers, known)
+    except Exception:
+        entries = {}
+    return [_summary_out(t, companies.get(t), entries.get(t), per_ticker) for t in tickers]
 
 
 def _highlights_range(kind: str) -> tuple[date, date]:
@@ -319,18 +238,66 @@ def _highlights_range(kind: str) -> tuple[date, date]:
     return start, end
 
 
+async def _conditional_highlights(request: Request, response: Response, params: tuple, since_version: Optional[int], load):
+    """Highlights are versioned by the "highlights" stamp (the delta cursor) and, for the
+    ETag, "events" too (company names come from events).
+    """
+    if not is_db_enabled():
+        return await load(None)
+    versions = await get_versions()
+    version = int(versions.get("highlights") or 0)
+    etag = make_etag("highlights", version_token(versions, ("highlights", "events")), *params, since_version)
+    not_modified = conditional(request, response, etag, str(version))
+    if not_modified is not None:
+        return not_modified
+    if since_version is not None and since_version >= version:
+        return []
+    return await load(since_version)
+
+
+async def highlights_today(limit: int = 20, since_version: Optional[int] = None) -> List[HighlightOut]:
+    return await _highlights_generic("today", limit, since_version)
+
+
+async def highlights_this_week(limit: int = 50, since_version: Optional[int] = None) -> List[HighlightOut]:
+    return await _highlights_generic("this_week", limit, since_version)
+
+
 @router.get("/highlights/today", response_model=List[HighlightOut])
-async def highlights_today(limit: int = 20) -> List[HighlightOut]:
-    return await _highlights_generic("today", limit)
+async def get_highlights_today(
+    request: Request,
+    response: Response,
+    limit: int = 20,
+    since_version: Optional[int] = Query(default=None, description=_SINCE_VERSION_DOC),
+):
+    params = ("today", _highlights_range("today"), limit)
+    return await _conditional_highlights(request, response, params, since_version, lambda since: highlights_today(limit, since))
 
 
 @router.get("/highlights/this_week", response_model=List[HighlightOut])
-async def highlights_this_week(limit: int = 50) -> List[HighlightOut]:
-    return await _highlights_generic("this_week", limit)
+async def get_highlights_this_week(
+    request: Request,
+    response: Response,
+    limit: int = 50,
+    since_version: Optional[int] = Query(default=None, description=_SINCE_VERSION_DOC),
+):
+    params = ("this_week", _highlights_range("this_week"), limit)
+    return await _conditional_highlights(request, response, params, since_version, lambda since: highlights_this_week(limit, since))
 
 
 @router.get("/ticker/{ticker}/highlights", response_model=List[HighlightOut])
-async def highlights_for_ticker(ticker: str, limit: int = 10) -> List[HighlightOut]:
+async def get_highlights_for_ticker(
+    request: Request,
+    response: Response,
+    ticker: str,
+    limit: int = 10,
+    since_version: Optional[int] = Query(default=None, description=_SINCE_VERSION_DOC),
+):
+    params = ("ticker", ticker.upper(), limit)
+    return await _conditional_highlights(request, response, params, since_version, lambda since: highlights_for_ticker(ticker, limit, since))
+
+
+async def highlights_for_ticker(ticker: str, limit: int = 10, since_version: Optional[int] = None) -> List[HighlightOut]:
     if not is_db_enabled():
         # Fallback placeholder
         now = datetime.utcnow()
@@ -345,13 +312,10 @@ async def highlights_for_ticker(ticker: str, limit: int = 10) -> List[HighlightO
             )
         ]
     with db_session() as s:
-        rows: List[Highlight] = (
-            s.query(Highlight)
-            .filter(Highlight.ticker == ticker.upper())
-            .order_by(Highlight.created_at.desc())
-            .limit(limit)
-            .all()
-        )
+        q = s.query(Highlight).filter(Highlight.ticker == ticker.upper())
+        if since_version is not None:
+            q = q.filter(Highlight.version > since_version)
+        rows: List[Highlight] = q.order_by(Highlight.created_at.desc()).limit(limit).all()
         out: List[HighlightOut] = []
         # Optionally join to events to obtain company; for now use last event if exists
         # (Simple approach to avoid an extra join)
@@ -372,7 +336,7 @@ async def highlights_for_ticker(ticker: str, limit: int = 10) -> List[HighlightO
         return out
 
 
-async def _highlights_generic(kind: str, limit: int) -> List[HighlightOut]:
+async def _highlights_generic(kind: str, limit: int, since_version: Optional[int] = None) -> List[HighlightOut]:
     if not is_db_enabled():
         now = datetime.utcnow()
         return [
@@ -387,10 +351,11 @@ async def _highlights_generic(kind: str, limit: int) -> List[HighlightOut]:
         ]
     start, end = _highlights_range("today" if kind == "today" else "this_week")
     with db_session() as s:
+        q = s.query(Highlight).filter(func.date(Highlight.created_at) >= start, func.date(Highlight.created_at) <= end)
+        if since_version is not None:
+            q = q.filter(Highlight.version > since_version)
         rows: List[Highlight] = (
-            s.query(Highlight)
-            .filter(func.date(Highlight.created_at) >= start, func.date(Highlight.created_at) <= end)
-            .order_by(Highlight.rank_score.desc().nullslast(), Highlight.created_at.desc())
+            q.order_by(Highlight.rank_score.desc().nullslast(), Highlight.created_at.desc())
             .limit(limit)
             .all()
         )
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.db.persistence import is_db_enabled, load_ingest_jobs
+from app.routes.discovery import IngestUrlRequest
+from app.services.ingest_queue import batch_status, submit
+
+router = APIRouter()
+
+BATCH_MAX_JOBS = 500
+
+
+class IngestBatchRequest(BaseModel):
+    tickers: List[str] = []
+    urls: List[IngestUrlRequest] = []
+    prefer: Optional[str] = None  # passed to ingest_symbol for ticker jobs
+    max_attempts: Optional[int] = None
+
+
+class IngestJobRef(BaseModel):
+    id: str
+    kind: str  # symbol | url
+    target: Optional[str] = None
+
+
+class IngestBatchResponse(BaseModel):
+    batch_id: str
+    jobs: List[IngestJobRef]
+
+
+def _require_queue() -> None:
+    if not is_db_enabled():
+        raise HTTPException(status_code=503, detail="Ingestion queue requires DATABASE_URL")
+
+
+@router.post("/ingest/batch", response_model=IngestBatchResponse)
+async def ingest_batch(req: IngestBatchRequest) -> IngestBatchResponse:
+    """Queue tickers/URLs for background ingestion; poll /ingest/batches/{batch_id} for progress."""
+    _require_queue()
+    if not req.tickers and not req.urls:
+        raise HTTPException(status_code=400, detail="Provide tickers and/or urls")
+    if len(req.tickers) + len(req.urls) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_JOBS} tickers/urls per batch")
+    for u in req.urls:
+        if not u.url.lower().startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail=f"Not an http(s) URL: {u.url}")
+    batch_id, jobs = submit(req.tickers, req.urls, req.prefer, req.max_attempts)
+    return IngestBatchResponse(batch_id=batch_id, jobs=[IngestJobRef(**j) for j in jobs])
+
+
+@router.get("/ingest/batches/{batch_id}")
+async def ingest_batch_status(batch_id: str) -> Dict[str, Any]:
+    _require_queue()
+    status = batch_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown batch_id")
+    return status
+
+
+@router.get("/ingest/jobs/{job_id}")
+async def ingest_job_status(job_id: str) -> Dict[str, Any]:
+    _require_queue()
+    jobs = load_ingest_jobs(job_ids=[job_id])
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    return jobs[0]
@@ -10,67 +10,104 @@ from app.models.types import (
     SeriesResponse,
     GuidanceResponse,
     BuybacksResponse,
+    BatchExtractionRequest,
+    BatchExtractionItem,
+    BatchExtractionResponse,
 )
 from app.memory import store
-from app.db.persistence import load_document, is_db_enabled
+from app.db.persistence import is_db_enabled, latest_doc_ids_for_tickers
 from app.db.base import db_session
 from app.db.models import IngestionRun
-from app.services.metric_extractors import (
-    extract_core_metrics,
-    extract_series_for_metrics,
-    extract_guidance,
-    extract_buybacks,
-)
+from app.services.extractions import get_extractions, get_extractions_many
+from app.services.metric_extractors import series_for_metrics
+from app.services.http_clients import pool_stats
+from app.services.rate_limit import limiter_stats
+from app.services.response_cache import cache_stats
 
 router = APIRouter()
 
+BATCH_MAX_DOCS = 100
+BATCH_SECTIONS = ("metrics", "series", "guidance", "buybacks")
+
 
-def _get_doc_or_404(doc_id: str):
-    doc = store.documents.get(doc_id)
-    if not doc and is_db_enabled():
-        try:
-            loaded = load_document(doc_id)
-            if loaded:
-                doc = loaded
-                store.documents[doc_id] = loaded
-        except Exception:
-            doc = None
-    if not doc:
+def _extractions_or_404(doc_id: str) -> Dict[str, Any]:
+    # Precomputed at ingest; recomputed lazily when missing or stale (see services.extractions)
+    data = get_extractions(doc_id)
+    if data is None:
         raise HTTPException(status_code=404, detail="Unknown doc_id")
-    return doc
+    return data
 
 
 @router.post("/metrics", response_model=MetricsResponse)
 async def metrics(req: DocRequest):
-    doc = _get_doc_or_404(req.doc_id)
-    chunks = doc["chunks"]
-    # For P1, run extractors across all chunks (heuristics are lightweight)
-    metrics = extract_core_metrics(chunks)
-    return {"metrics": metrics}
+    data = _extractions_or_404(req.doc_id)
+    return {"metrics": data["metrics"]}
 
 
 @router.post("/series", response_model=SeriesResponse)
 async def series(req: SeriesRequest):
-    doc = _get_doc_or_404(req.doc_id)
-    chunks = doc["chunks"]
-    series = extract_series_for_metrics(chunks, req.metrics)
+    data = _extractions_or_404(req.doc_id)
+    series = series_for_metrics(data["series"], req.metrics)
     return {"series": series}
 
 
 @router.post("/guidance", response_model=GuidanceResponse)
 async def guidance(req: DocRequest):
-    doc = _get_doc_or_404(req.doc_id)
-    chunks = doc["chunks"]
-    data = extract_guidance(chunks)
-    return {"guidance": data}
+    data = _extractions_or_404(req.doc_id)
+    return {"guidance": data["guidance"]}
 
 
 @router.post("/buybacks", response_model=BuybacksResponse)
 async def buybacks(req: DocRequest):
-    doc = _get_doc_or_404(req.doc_id)
-    chunks = doc["chunks"]
-    data = extract_buybacks(chunks)
-    return {"buybacks": data}
+    data = _extractions_or_404(req.doc_id)
+    return {"buybacks": data["buybacks"]}
+
+
+@router.post("/metrics/batch", response_model=BatchExtractionResponse)
+async def metrics_batch(req: BatchExtractionRequest):
+    """Extraction results for many documents in one call; failures are reported per item."""
+    include = [k for k in req.include if k in BATCH_SECTIONS] or ["metrics", "guidance"]
+    tickers = list(dict.fromkeys(t.strip().upper() for t in req.tickers if t and t.strip()))
+    if len(req.doc_ids) + len(tickers) > BATCH_MAX_DOCS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_DOCS} doc_ids/tickers per request")
+
+    # (doc_id, ticker) targets in request order; tickers resolve in a single query
+    targets: List[tuple] = [(d, None) for d in dict.fromkeys(req.doc_ids) if d]
+    if tickers:
+        latest: Dict[str, str] = {}
+        if is_db_enabled():
+            try:
+                latest = latest_doc_ids_for_tickers(tickers)
+            except Exception:
+                latest = {}
+        else:
+            latest = _latest_in_memory(tickers)
+        targets += [(latest.get(t), t) for t in tickers]
+
+    results = await get_extractions_many([d for d, _ in targets if d])
+    items: List[BatchExtractionItem] = []
+    for doc_id, ticker in targets:
+        res = results.get(doc_id) if doc_id else LookupError(f"No document for {ticker}")
+        if isinstance(res, dict):
+            items.append(BatchExtractionItem(doc_id=doc_id, ticker=ticker, ok=True, data={k: res.get(k) for k in include}))
+        else:
+            items.append(BatchExtractionItem(doc_id=doc_id, ticker=ticker, ok=False, error=str(res) or type(res).__name__))
+    return BatchExtractionResponse(items=items, requested=len(targets), success=sum(1 for it in items if it.ok))
+
+
+def _latest_in_memory(tickers: List[str]) -> Dict[str, str]:
+    # P0 fallback: in-memory docs keep insertion order, so the last match is the newest
+    out: Dict[str, str] = {}
+    for did, d in store.documents.items():
+        t = ((d.get("meta") or {}).get("ticker") or "").upper()
+        if t in tickers:
+            out[t] = did
+    return out
+
+
+@router.get("/metrics/http_pools")
+async def http_pools() -> Dict[str, Any]:
+    return {"pools": pool_stats(), "rate_limits": limiter_stats(), "response_cache": cache_stats()}
 
 
 # Ingestion metrics
@@ -88,6 +125,8 @@ def _normalize_run(r: IngestionRun) -> Dict[str, Any]:
         # convenient top-level aliases for UI
         if r.job_type == "ingest_today":
             d["tickers"] = r.data.get("tickers") or []
+            d["processed"] = r.data.get("processed")
+            d["skipped"] = r.data.get("skipped")
         if r.job_type == "refresh_next_14_days":
             d["count"] = r.data.get("count")
             d["range"] = {"start": r.data.get("start"), "end": r.data.get("end")}
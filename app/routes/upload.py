@@ -6,6 +6,7 @@ from app.services.embedder import embed_texts
 from app.services.retriever import build_index
 from app.memory import store
 from app.db.persistence import is_db_enabled, save_document
+from app.services.extractions import materialise_extractions
 import numpy as np
 import uuid
 import logging
@@ -41,6 +42,7 @@ async def upload_pdf(file: UploadFile = File(...)):
                 )
         except Exception as pe:
             logger.warning("upload: db persist error for doc_id=%s: %s", doc_id, pe)
+        materialise_extractions(doc_id, chunks)
         logger.info("upload: stored doc_id=%s chunks=%d embs_shape=%s total_docs=%d",
                     doc_id, len(chunks), getattr(embs, 'shape', None), len(store.documents))
         return UploadResponse(doc_id=doc_id, chunk_count=len(chunks))
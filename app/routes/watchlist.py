@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 import uuid
 from datetime import date, timedelta
 from typing import List, Optional
@@ -10,9 +11,19 @@ from sqlalchemy import and_
 
 from app.db.base import db_session
 from app.db.models import Watchlist, EarningsEvent
-from app.db.persistence import is_db_enabled
+from app.db.persistence import bump_versions, is_db_enabled
+from app.services.dashboard import update_snapshot as update_dashboard_snapshot
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+async def _refresh_dashboard() -> None:
+    # Followed tickers changed: recompute the snapshot's event sections (risk, today's alerts)
+    try:
+        await update_dashboard_snapshot(events=True, documents=False)
+    except Exception as e:
+        logger.warning("watchlist: dashboard snapshot update failed: %s", e)
 
 
 class WatchlistOut(BaseModel):
@@ -41,7 +52,10 @@ async def add_watchlist(ticker: str, user_id: Optional[str] = Query(default=None
         w = Watchlist(id=str(uuid.uuid4()), user_id=user_id, ticker=sym)
         s.add(w)
         s.flush()
-        return WatchlistOut(id=w.id, ticker=w.ticker)
+        bump_versions(s, "watchlist")
+        out = WatchlistOut(id=w.id, ticker=w.ticker)
+    await _refresh_dashboard()
+    return out
 
 
 @router.delete("/watchlist/{ticker}")
@@ -51,9 +65,13 @@ async def remove_watchlist(ticker: str, user_id: Optional[str] = Query(default=N
     sym = ticker.upper()
     with db_session() as s:
         ex = s.query(Watchlist).filter(Watchlist.ticker == sym).first()
-        if ex:
-            s.delete(ex)
-        return {"status": "ok"}
+        if not ex:
+            return {"status": "ok"}
+        s.delete(ex)
+        s.flush()
+        bump_versions(s, "watchlist")
+    await _refresh_dashboard()
+    return {"status": "ok"}
 
 
 class EventOut(BaseModel):
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.models.types import Chunk
+
+# Prompt context builder for QA.
+# Retrieval hands us the top chunks plus their neighbours; the chunker overlaps
+# consecutive chunks by ~200 chars, so naive concatenation repeats text. Here we:
+#   1. drop duplicate chunks and merge chunks whose text overlaps (adjacent chunks)
+#   2. split merged blocks into sentences and rank them by query-term overlap
+#   3. keep the best sentences that fit the token budget; blocks are emitted most
+#      relevant first, sentences within a block in document order
+
+QA_CONTEXT_TOKEN_BUDGET = int(os.getenv("QA_CONTEXT_TOKEN_BUDGET", "1800") or "1800")
+
+_CHARS_PER_TOKEN = 4  # rough average for English prose with the OpenAI tokenizers
+_MIN_OVERLAP = 32
+_MAX_SENTENCE_CHARS = 400
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\n\s*\n")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9&\-]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from had has have how in is it its of on or our "
+    "over than that the their this to was were what when which who why will with".split()
+)
+
+
+class ContextBlock(NamedTuple):
+    section: Optional[str]
+    page_start: int
+    page_end: int
+    text: str
+    rank: int  # best retrieval position among the merged chunks (0 = most relevant)
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text) / _CHARS_PER_TOKEN)) if text else 0
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right` (0 if < _MIN_OVERLAP)."""
+    probe = right[:_MIN_OVERLAP]
+    if len(probe) < _MIN_OVERLAP:
+        return 0
+    pos = left.find(probe)
+    while pos != -1:
+        n = len(left) - pos
+        if right[:n] == left[pos:]:
+            return n
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+def merge_chunks(chunks: List[Chunk]) -> List[ContextBlock]:
+    """Deduplicate chunks and merge those whose text overlaps, keeping retrieval rank."""
+    blocks: List[ContextBlock] = []
+    seen_ids = set()
+    for rank, c in enumerate(chunks):
+        if c.id in seen_ids or not c.text.strip():
+            continue
+        seen_ids.add(c.id)
+        text = c.text
+        merged = False
+        for i, b in enumerate(blocks):
+            # Only neighbours can overlap; repeated boilerplate elsewhere must not merge
+            if c.page_start > b.page_end + 1 or c.page_end < b.page_start - 1:
+                continue
+            if text in b.text:
+                merged = True
+            elif (n := _overlap(b.text, text)):
+                blocks[i] = b._replace(text=b.text + text[n:], page_end=max(b.page_end, c.page_end))
+                merged = True
+            elif (n := _overlap(text, b.text)):
+                blocks[i] = b._replace(text=text + b.text[n:], page_start=min(b.page_start, c.page_start))
+                merged = True
+            if merged:
+                break
+        if not merged:
+            blocks.append(ContextBlock(c.section, c.page_start, c.page_end, text, rank))
+    # A merge can make a block contain (or overlap) another one; fold those too
+    out: List[ContextBlock] = []
+    for b in blocks:
+        for i, o in enumerate(out):
+            if b.text in o.text:
+                break
+            if o.text in b.text:
+                out[i] = b._replace(rank=min(b.rank, o.rank))
+                break
+        else:
+            out.append(b)
+    return out
+
+
+def _sentences(text: str) -> List[str]:
+    out: List[str] = []
+    for s in _SENT_SPLIT_RE.split(text):
+        s = " ".join(s.split())
+        # Tables and lists often lack punctuation; cap pieces so one can't eat the budget
+        while len(s) > _MAX_SENTENCE_CHARS:
+            cut = s.rfind(" ", 0, _MAX_SENTENCE_CHARS)
+            cut = cut if cut > 0 else _MAX_SENTENCE_CHARS
+            out.append(s[:cut])
+            s = s[cut:].lstrip()
+        if s:
+            out.append(s)
+    return out
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 1]
+
+
+def _label(i: int, b: ContextBlock) -> str:
+    return f"[ctx{i} | p.{b.page_start}-{b.page_end} | {b.section or 'N/A'}]"
+
+
+def build_context(question: str, chunks: List[Chunk], token_budget: Optional[int] = None) -> Tuple[str, int]:
+    """Return (prompt context, estimated tokens) for `question` within `token_budget`."""
+    budget = QA_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    blocks = merge_chunks(chunks)
+    sents: List[Tuple[int, int, str]] = []  # (block idx, sentence idx, text)
+    for bi, b in enumerate(blocks):
+        sents += [(bi, si, s) for si, s in enumerate(_sentences(b.text))]
+    if not sents:
+        return "", 0
+
+    # IDF over the candidate sentences, so terms that appear everywhere add little
+    sent_terms = [set(_terms(s)) for _, _, s in sents]
+    df: Dict[str, int] = {}
+    for ts in sent_terms:
+        for t in ts:
+            df[t] = df.get(t, 0) + 1
+    q_terms = set(_terms(question))
+    n = len(sents)
+
+    def score(k: int) -> float:
+        return sum(math.log(1 + n / df[t]) for t in q_terms & sent_terms[k])
+
+    # Ties (incl. no query overlap) fall back to retrieval rank, then document order
+    order = sorted(range(n), key=lambda k: (-score(k), blocks[sents[k][0]].rank, sents[k][0], sents[k][1]))
+
+    used = 0
+    keep: Dict[int, List[int]] = {}
+    for k in order:
+        bi, si, s = sents[k]
+        cost = estimate_tokens(s) + 1
+        if bi not in keep:
+            cost += estimate_tokens(_label(len(keep) + 1, blocks[bi])) + 1
+        if used + cost > budget:
+            continue
+        keep.setdefault(bi, []).append(si)
+        used += cost
+
+    by_block: Dict[int, Dict[int, str]] = {}
+    for bi, si, s in sents:
+        if si in keep.get(bi, ()):
+            by_block.setdefault(bi, {})[si] = s
+    parts = []
+    # `keep` is in insertion order, i.e. by each block's best sentence
+    for i, bi in enumerate(keep, 1):
+        picked = by_block[bi]
+        text, prev = "", None
+        for si in sorted(picked):
+            sep = "" if prev is None else (" " if si == prev + 1 else " … ")
+            text += sep + picked[si]
+            prev = si
+        parts.append(f"{_label(i, blocks[bi])}\n{text}")
+    context = "\n\n".join(parts)
+    return context, estimate_tokens(context)
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func, literal, or_, select, union_all
+
+from app.db.base import db_session
+from app.db.models import Document, EarningsEvent, Watchlist
+from app.db.persistence import load_dashboard_snapshot, load_versions, save_dashboard_snapshot
+from app.services.metrics import record_cache
+from app.services.versions import version_token
+
+# Dashboard overview: a materialised snapshot, maintained by the worker.
+#
+# Sections are computed in SQL instead of loading the 21-day event window
+# into Python:
+#   1. events: today / upcoming / reported buckets, each a limited, ordered
+#      select, combined with UNION ALL; every row carries an EXISTS flag for
+#      "ticker is on the watchlist"
+#   2. risk: the earliest event in the window per followed ticker (the first
+#      `limit` watchlist entries), via row_number() over (partition by ticker
+#      order by event_date) restricted to those tickers
+#   3. report links: latest document per (ticker, source_url) among the newest
+#      limit*3 documents, newest first
+#
+# The snapshot holds these sections at DASHBOARD_SNAPSHOT_LIMIT (the route's
+# largest `limit`; smaller limits are prefixes of it) as JSON in
+# dashboard_snapshots, under one key. It is updated incrementally:
+# - after a calendar refresh (or a watchlist change) only the event sections
+#   are recomputed
+# - after an ingest run only documents created since the snapshot's newest
+#   link are read and merged into the links
+# Alongside the links it keeps `link_times`, their creation times sorted
+# ascending, so "how many reports are new since since_ts" is one bisect.
+# It also records the resource versions (services.versions) its sections were
+# computed at: events + watchlist for the event sections, documents for the
+# links. Those are the route's ETag / since_version token, and a read that
+# finds the stored versions behind the current ones applies the matching
+# incremental update first (e.g. after a document delete, which the worker
+# doesn't see).
+# `/dashboard/overview` reads the snapshot by key (cached in-process for
+# DASHBOARD_CACHE_TTL_SECONDS, concurrent misses share one read). A missing
+# snapshot, one from another day or one older than
+# DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS is rebuilt on read.
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "10") or "10")
+DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS", "1800") or "1800")
+DASHBOARD_SNAPSHOT_LIMIT = 50
+DASHBOARD_PAST_DAYS = 7
+DASHBOARD_AHEAD_DAYS = 14
+SNAPSHOT_KEY = "overview"
+SNAPSHOT_VERSIONS = ("events", "documents", "watchlist")
+_EVENT_VERSIONS = ("events", "watchlist")
+
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_inflight: Dict[str, asyncio.Task] = {}
+
+_EVENT_COLS = (
+    EarningsEvent.id,
+    EarningsEvent.ticker,
+    EarningsEvent.company,
+    EarningsEvent.event_date,
+    EarningsEvent.time_of_day,
+    EarningsEvent.status,
+)
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _bucket(name: str, where: Any, order_by: Tuple[Any, ...], limit: int):
+    sub = select(literal(name).label("bucket"), *_EVENT_COLS).where(where).order_by(*order_by).limit(limit).subquery()
+    # Wrapped so the ORDER BY / LIMIT stay per bucket inside the UNION ALL (portable SQL),
+    # and the watchlist EXISTS runs for the `limit` kept rows only
+    on_watchlist = exists().where(func.upper(Watchlist.ticker) == func.upper(sub.c.ticker))
+    return select(*sub.c, on_watchlist.label("on_watchlist"))
+
+
+def _iso(d: Any) -> Optional[str]:
+    return d.isoformat() if isinstance(d, date) else None
+
+
+def _event_dict(r: Any) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "ticker": r.ticker,
+        "company": r.company,
+        "event_date": _iso(r.event_date),
+        "time_of_day": r.time_of_day,
+        "status": r.status,
+        "on_watchlist": bool(r.on_watchlist),
+    }
+
+
+def load_event_sections(limit: int, today: date) -> Dict[str, Any]:
+    """today / upcoming / reported buckets and watchlist risk (queries 1 and 2), JSON-ready."""
+    range_start = today - timedelta(days=DASHBOARD_PAST_DAYS)
+    range_end = today + timedelta(days=DASHBOARD_AHEAD_DAYS)
+    E = EarningsEvent
+    in_range = and_(E.event_date >= range_start, E.event_date <= range_end)
+
+    events_stmt = union_all(
+        _bucket("today", E.event_date == today, (E.ticker.asc(),), limit),
+        _bucket("upcoming", and_(E.event_date > today, E.event_date <= range_end), (E.event_date.asc(), E.ticker.asc()), limit),
+        _bucket(
+            "reported",
+            and_(in_range, or_(func.lower(E.status) == "reported", E.event_date < today)),
+            (E.event_date.desc(), E.ticker.asc()),
+            limit,
+        ),
+    )
+
+    watchlist = (
+        select(func.upper(Watchlist.ticker).label("ticker"), func.min(Watchlist.created_at).label("added"))
+        .group_by(func.upper(Watchlist.ticker))
+        .order_by(func.min(Watchlist.created_at).asc(), func.upper(Watchlist.ticker).asc())
+        .limit(limit)
+        .subquery()
+    )
+    # No watchlist: follow the first tickers (alphabetically) in the window instead
+    window = (
+        select(func.upper(E.ticker).label("ticker"))
+        .where(in_range)
+        .distinct()
+        .order_by(func.upper(E.ticker))
+        .limit(limit)
+        .subquery()
+    )
+
+    def _risk_stmt(driver: Any, order_col: Any):
+        # Rank only the followed tickers' events, then keep the first per ticker
+        ranked = (
+            select(
+                func.upper(E.ticker).label("ticker"),
+                E.company,
+                E.event_date,
+                E.time_of_day,
+                func.row_number().over(partition_by=func.upper(E.ticker), order_by=(E.event_date.asc(), E.ticker.asc())).label("rn"),
+            )
+            .where(in_range, func.upper(E.ticker).in_(select(driver.c.ticker)))
+            .subquery()
+        )
+        return (
+            select(driver.c.ticker, ranked.c.company, ranked.c.event_date, ranked.c.time_of_day)
+            .select_from(driver.outerjoin(ranked, and_(ranked.c.ticker == driver.c.ticker, ranked.c.rn == 1)))
+            .order_by(order_col)
+        )
+
+    buckets: Dict[str, List[Dict[str, Any]]] = {"today": [], "upcoming": [], "reported": []}
+    with db_session() as s:
+        for r in s.execute(events_stmt).all():
+            buckets[r.bucket].append(_event_dict(r))
+        risk = s.execute(_risk_stmt(watchlist, watchlist.c.added)).all()
+        has_watchlist = bool(risk)
+        if not has_watchlist:
+            risk = s.execute(_risk_stmt(window, window.c.ticker)).all()
+
+    return {
+        **buckets,
+        "risk": [
+            {"ticker": r.ticker, "company": r.company, "event_date": _iso(r.event_date), "time_of_day": r.time_of_day}
+            for r in risk
+        ],
+        "has_watchlist": has_watchlist,
+    }
+
+
+def _as_utc(ts: Any) -> Optional[datetime]:
+    if not isinstance(ts, datetime):
+        return None
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def load_report_links(limit: int, since: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Report links (query 3), newest first; `since` (epoch seconds) keeps documents created at or after it."""
+    cond = [Document.source_url.isnot(None), Document.source_url != ""]
+    if since is not None:
+        cond.append(Document.created_at >= datetime.fromtimestamp(since, tz=timezone.utc))
+    newest = (
+        select(Document.id, Document.ticker, Document.company, Document.source_url, Document.form_type, Document.created_at)
+        .where(*cond)
+        .order_by(Document.created_at.desc(), Document.id.desc())
+        .limit(limit * 3)
+        .subquery()
+    )
+    link_ranked = select(
+        *newest.c,
+        func.row_number().over(
+            partition_by=(func.upper(func.coalesce(newest.c.ticker, "")), newest.c.source_url),
+            order_by=(newest.c.created_at.desc(), newest.c.id.desc()),
+        ).label("rn"),
+    ).subquery()
+    links_stmt = (
+        select(*[c for c in link_ranked.c if c.name != "rn"])
+        .where(link_ranked.c.rn == 1)
+        .order_by(link_ranked.c.created_at.desc(), link_ranked.c.id.desc())
+        .limit(limit * 2)
+    )
+    with db_session() as s:
+        rows = s.execute(links_stmt).all()
+    out = []
+    for r in rows:
+        created = _as_utc(r.created_at)
+        out.append({
+            "doc_id": r.id,
+            "ticker": (r.ticker or "").upper(),
+            "company": r.company,
+            "source_url": r.source_url,
+            "form_type": r.form_type,
+            "created_at": created.isoformat() if created else None,
+            "created_ts": created.timestamp() if created else 0.0,
+        })
+    return out
+
+
+def _link_key(link: Dict[str, Any]) -> Tuple[str, str]:
+    return (link["ticker"], link["source_url"])
+
+
+def _set_links(snap: Dict[str, Any], links: List[Dict[str, Any]], limit: int) -> None:
+    links = sorted(links, key=lambda l: (l["created_ts"], l["doc_id"]), reverse=True)[: limit * 2]
+    snap["report_links"] = links
+    snap["link_times"] = sorted(l["created_ts"] for l in links)
+
+
+def build_snapshot(today: Optional[date] = None, limit: int = DASHBOARD_SNAPSHOT_LIMIT) -> Dict[str, Any]:
+    """All sections from scratch."""
+    today = today or _utc_today()
+    versions = load_versions()  # read first: the stamps may lag the content, never lead it
+    snap: Dict[str, Any] = {"day": today.isoformat(), **load_event_sections(limit, today)}
+    _set_links(snap, load_report_links(limit), limit)
+    snap["versions"] = {n: int(versions.get(n) or 0) for n in SNAPSHOT_VERSIONS}
+    return snap
+
+
+def snapshot_token(snap: Dict[str, Any]) -> str:
+    """The versions the snapshot was computed at, as "events.documents.watchlist"."""
+    return version_token(snap.get("versions") or {}, SNAPSHOT_VERSIONS)
+
+
+def _links_deleted(links: List[Dict[str, Any]]) -> bool:
+    if not links:
+        return False
+    ids = [l["doc_id"] for l in links]
+    with db_session() as s:
+        alive = s.scalars(select(Document.id).where(Document.id.in_(ids))).all()
+    return len(set(alive)) < len(set(ids))
+
+
+def merge_new_documents(snap: Dict[str, Any], limit: int = DASHBOARD_SNAPSHOT_LIMIT) -> int:
+    """Fold documents created since the snapshot's newest link into its links; returns how many were read.
+    Links whose document was deleted are reloaded from scratch."""
+    times = snap.get("link_times") or []
+    if not times or _links_deleted(snap.get("report_links") or []):
+        _set_links(snap, load_report_links(limit), limit)
+        return len(snap["report_links"])
+    fresh = load_report_links(limit, since=times[-1])
+    if fresh:
+        replaced = {_link_key(l) for l in fresh}
+        _set_links(snap, fresh + [l for l in snap.get("report_links") or [] if _link_key(l) not in replaced], limit)
+    return len(fresh)
+
+
+def overview_for(snap: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """The sections for one `limit`, sliced from the snapshot."""
+    today = snap.get("today", [])[:limit]
+    risk = snap.get("risk", [])[:limit]
+    if snap.get("has_watchlist"):
+        wl_today = [e["ticker"].upper() for e in today if e.get("on_watchlist")]
+    else:
+        followed = {r["ticker"] for r in risk}
+        wl_today = [e["ticker"].upper() for e in today if e["ticker"].upper() in followed]
+    return {
+        "today": today,
+        "upcoming": snap.get("upcoming", [])[:limit],
+        "reported": snap.get("reported", [])[:limit],
+        "report_links": snap.get("report_links", [])[: limit * 2],
+        "risk": risk,
+        "today_on_watchlist": wl_today,
+        "followed": len(risk),
+    }
+
+
+def new_report_count(snap: Dict[str, Any], since_ts: Optional[int]) -> int:
+    """Report links created after since_ts (epoch ms). Links are newest first, so these are
+    the first N of them."""
+    if not since_ts:
+        return 0
+    times = snap.get("link_times") or []
+    return len(times) - bisect.bisect_right(times, since_ts / 1000.0)
+
+
+def load_overview(limit: int, today: Optional[date] = None) -> Dict[str, Any]:
+    """Overview sections computed directly (no snapshot)."""
+    return overview_for(build_snapshot(today, limit), limit)
+
+
+def _usable(snap: Optional[Dict[str, Any]]) -> bool:
+    return (
+        snap is not None
+        and snap.get("day") == _utc_today().isoformat()
+        and time.time() - float(snap.get("built_at") or 0) < DASHBOARD_SNAPSHOT_MAX_AGE_SECONDS
+    )
+
+
+def _store(snap: Dict[str, Any]) -> Dict[str, Any]:
+    snap["built_at"] = time.time()
+    save_dashboard_snapshot(SNAPSHOT_KEY, {k: v for k, v in snap.items() if k != "built_at"}, snap["built_at"])
+    return snap
+
+
+def _apply(snap: Dict[str, Any], events: bool, documents: bool, versions: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """Incremental update of a snapshot for today, restamping the versions of what was recomputed."""
+    versions = load_versions() if versions is None else versions
+    stamps = dict(snap.get("versions") or {})
+    if events:
+        snap.update(load_event_sections(DASHBOARD_SNAPSHOT_LIMIT, _utc_today()))
+        stamps.update({n: int(versions.get(n) or 0) for n in _EVENT_VERSIONS})
+    if documents:
+        merge_new_documents(snap)
+        stamps["documents"] = int(versions.get("documents") or 0)
+    snap["versions"] = stamps
+    return snap
+
+
+def _read_snapshot() -> Dict[str, Any]:
+    snap = load_dashboard_snapshot(SNAPSHOT_KEY)
+    if not _usable(snap):
+        return _store(build_snapshot())
+    versions = load_versions()
+    stamps = snap.get("versions") or {}
+    events = any(int(versions.get(n) or 0) != stamps.get(n) for n in _EVENT_VERSIONS)
+    documents = int(versions.get("documents") or 0) != stamps.get("documents")
+    if events or documents:
+        return _store(_apply(snap, events, documents, versions))
+    return snap
+
+
+async def get_snapshot() -> Dict[str, Any]:
+    """The current snapshot: in-process cache, else one key lookup (rebuilt if missing or stale)."""
+    hit = _cache.get(SNAPSHOT_KEY)
+    if hit is not None and time.monotonic() - hit[0] < DASHBOARD_CACHE_TTL_SECONDS:
+        record_cache("dashboard", "hit")
+        return hit[1]
+    task = _inflight.get(SNAPSHOT_KEY)
+    if task is None or task.done():
+        record_cache("dashboard", "miss")
+
+        async def _load() -> Dict[str, Any]:
+            try:
+                snap = await asyncio.to_thread(_read_snapshot)
+                _cache[SNAPSHOT_KEY] = (time.monotonic(), snap)
+                return snap
+            finally:
+                _inflight.pop(SNAPSHOT_KEY, None)
+
+        task = _inflight[SNAPSHOT_KEY] = asyncio.create_task(_load())
+    else:
+        record_cache("dashboard", "joined")
+    return await asyncio.shield(task)
+
+
+async def get_overview(limit: int) -> Dict[str, Any]:
+    return overview_for(await get_snapshot(), limit)
+
+
+def _update(events: bool, documents: bool) -> Dict[str, Any]:
+    today = _utc_today()
+    snap = load_dashboard_snapshot(SNAPSHOT_KEY)
+    if snap is None or snap.get("day") != today.isoformat():
+        return _store(build_snapshot(today))
+    return _store(_apply(snap, events, documents))
+
+
+async def update_snapshot(events: bool = True, documents: bool = True) -> Dict[str, Any]:
+    """Recompute the event sections and/or merge new documents into the stored snapshot
+    (a full rebuild when there is none for today)."""
+    snap = await asyncio.to_thread(_update, events, documents)
+    _cache[SNAPSHOT_KEY] = (time.monotonic(), snap)
+    return snap
+
+
+def invalidate() -> None:
+    _cache.clear()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional
+
+import httpx
+
+from app.services.http_clients import queued_ms
+from app.services.metrics import now, elapsed_ms, record_http
+
+# Streaming document downloads for ingestion.
+# Bodies are streamed into a spooled temp file (in memory up to DOWNLOAD_SPOOL_BYTES,
+# then on disk) with a hard DOWNLOAD_MAX_BYTES cap, sha256 is computed as chunks
+# arrive, and the first bytes are sniffed so bodies that are neither PDF nor HTML
+# are aborted without downloading the rest.
+
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", str(50 * 1024 * 1024)) or str(50 * 1024 * 1024))
+DOWNLOAD_SPOOL_BYTES = int(os.getenv("DOWNLOAD_SPOOL_BYTES", str(8 * 1024 * 1024)) or str(8 * 1024 * 1024))
+SNIFF_BYTES = 1024
+
+_HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body", b"<title", b"<div", b"<table", b"<p>", b"<p ")
+
+
+class DownloadError(Exception):
+    def __init__(self, message: str, reason: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.reason = reason  # http_error | too_large | unsupported_type
+        self.status_code = status_code
+
+
+class Download:
+    """A completed download: body in a spooled temp file plus provenance computed while streaming."""
+
+    def __init__(self, url: str, content_type: str, kind: str, size: int, sha256: str, file) -> None:
+        self.url = url
+        self.content_type = content_type
+        self.kind = kind  # "pdf" | "html"
+        self.size = size
+        self.sha256 = sha256
+        self._file = file
+
+    def read(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    def close(self) -> None:
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+
+def sniff_kind(head: bytes, content_type: str = "", url: str = "") -> Optional[str]:
+    """'pdf' / 'html' from the first bytes of a body (declared type only breaks ties), else None."""
+    if b"%PDF-" in head[:SNIFF_BYTES]:  # the spec allows junk before the header
+        return "pdf"
+    h = head.lstrip(b"\xef\xbb\xbf \t\r\n")[:SNIFF_BYTES].lower()
+    if any(m in h for m in _HTML_MARKERS):
+        return "html"
+    declared_html = "html" in (content_type or "") or (url or "").lower().endswith((".htm", ".html"))
+    if h.startswith(b"<") and declared_html:  # e.g. a long comment or <?xml ...?> preamble
+        return "html"
+    return None
+
+
+async def download(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    provider: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+    max_bytes: Optional[int] = None,
+) -> Download:
+    """Stream `url`; raises DownloadError on HTTP errors, oversized bodies or non-PDF/HTML content."""
+    cap = max_bytes or DOWNLOAD_MAX_BYTES
+    t0 = now()
+    status = 0
+    qms = 0
+    spool = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_BYTES)
+    try:
+        async with client.stream("GET", url, headers=headers, timeout=timeout) as r:
+            status, qms = r.status_code, queued_ms(r)
+            if r.status_code >= 400:
+                raise DownloadError(f"Failed to fetch URL: {r.status_code}", "http_error", r.status_code)
+            ctype = (r.headers.get("content-type", "") or "").lower()
+            declared = r.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > cap:
+                raise DownloadError(f"Document exceeds {cap} bytes (content-length={declared})", "too_large")
+            digest = hashlib.sha256()
+            size = 0
+            head = b""
+            kind: Optional[str] = None
+            async for chunk in r.aiter_bytes():
+                size += len(chunk)
+                if size > cap:
+                    raise DownloadError(f"Document exceeds {cap} bytes", "too_large")
+                digest.update(chunk)
+                spool.write(chunk)
+                if kind is None and len(head) < SNIFF_BYTES:
+                    head += chunk[: SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        kind = sniff_kind(head, ctype, url)
+                        if kind is None:
+                            raise DownloadError(f"URL is not PDF/HTML (content-type={ctype})", "unsupported_type")
+            if kind is None:
+                kind = sniff_kind(head, ctype, url)
+                if kind is None:
+                    raise DownloadError(f"URL is not PDF/HTML (content-type={ctype})", "unsupported_type")
+        return Download(url, ctype, kind, size, digest.hexdigest(), spool)
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        if status:
+            try:
+                record_http(provider, "/download", status, elapsed_ms(t0), queued_ms=qms)
+            except Exception:
+                pass
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_
+
+from app.db.base import db_session
+from app.db.models import EarningsEvent
+from app.db.persistence import is_db_enabled, load_calendar_refreshes, mark_calendar_refreshed, upsert_earnings_events
+from app.services.metrics import now, elapsed_ms, record_cache
+from app.services.providers.fmp import fetch_earnings_calendar as fetch_earnings_calendar_fmp
+from app.services.providers.finnhub import fetch_earnings_calendar as fetch_earnings_calendar_finnhub
+
+# Earnings calendar refresh from all configured providers.
+# Providers are fetched concurrently and before any DB work, so a refresh costs
+# the slowest provider rather than their sum and no connection is held while
+# waiting on the network. Their items are merged per (ticker, event_date): every
+# event any provider reports is kept, and each field takes the first non-empty
+# value in that field's provider precedence. The result is written once with
+# the bulk upsert (which only fills fields still missing in the DB).
+#
+# Reads (get_calendar) never wait on providers: rows come from a short-lived
+# in-process cache or the DB. A range with a day not refreshed within
+# CALENDAR_STALE_SECONDS (or never, e.g. an empty range) schedules a background
+# refresh; concurrent readers of the same range share one in-flight refresh
+# (single-flight), and its completion drops the cached ranges it touched.
+# Freshness is shared: every refresh records per-day refresh times in the DB
+# (calendar_refreshes), and a process that sees a day as stale in its own
+# stamps re-reads them before refreshing, so provider quota doesn't grow with
+# the number of web processes or reset on restart. Only an explicit refresh waits for the result.
+# Cached rows remember the "events" version they were loaded at
+# (services.versions) and aren't served once a write, in any process, has
+# moved it on; a delta read (since_version) goes to the DB.
+# State keyed by requested ranges is bounded: the cache keeps the
+# CALENDAR_CACHE_MAX_ENTRIES most recently used ranges, in-process refresh
+# stamps older than CALENDAR_STALE_SECONDS are dropped (they mean "stale" either way), and
+# the route rejects ranges longer than CALENDAR_MAX_RANGE_DAYS. A cache miss doesn't store
+# its rows if a refresh completed while it was reading them.
+
+CALENDAR_PROVIDERS: List[Tuple[str, str]] = [("fmp", "FMP_API_KEY"), ("finnhub", "FINNHUB_API_KEY")]
+
+# Field -> providers in order of trust; providers not listed come after, in CALENDAR_PROVIDERS order.
+# FMP carries company names (Finnhub's calendar mostly doesn't); Finnhub's `hour` is the
+# more reliable BMO/AMC marker.
+CALENDAR_FIELD_PRECEDENCE: Dict[str, List[str]] = {
+    "company": ["fmp", "finnhub"],
+    "time_of_day": ["finnhub", "fmp"],
+    "status": ["fmp", "finnhub"],
+}
+
+CALENDAR_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "60") or "60")
+CALENDAR_STALE_SECONDS = float(os.getenv("CALENDAR_STALE_SECONDS", "21600") or "21600")
+CALENDAR_CACHE_MAX_ENTRIES = int(os.getenv("CALENDAR_CACHE_MAX_ENTRIES", "256") or "256")
+CALENDAR_MAX_RANGE_DAYS = int(os.getenv("CALENDAR_MAX_RANGE_DAYS", "92") or "92")
+
+logger = logging.getLogger(__name__)
+
+_cache: Dict[Tuple[date, date], Tuple[float, List[dict], Optional[int]]] = {}  # range -> (stamp, rows, events version)
+_refreshed_at: Dict[date, float] = {}  # day -> epoch time of the last completed refresh covering it (as known here)
+_inflight: Dict[Tuple[date, date], asyncio.Task] = {}
+_generation = 0  # bumped by every invalidation
+
+
+def _fetchers() -> Dict[str, Any]:
+    return {"fmp": fetch_earnings_calendar_fmp, "finnhub": fetch_earnings_calendar_finnhub}
+
+
+def configured_providers() -> List[Tuple[str, str]]:
+    """[(provider, api_key)] for providers with a key set."""
+    out: List[Tuple[str, str]] = []
+    for name, env in CALENDAR_PROVIDERS:
+        key = (os.getenv(env) or "").strip()
+        if key:
+            out.append((name, key))
+    return out
+
+
+async def fetch_all(start: date, end: date) -> Dict[str, List[dict]]:
+    """Fetch every configured provider concurrently; a failing provider yields []."""
+    providers = configured_providers()
+    fetchers = _fetchers()
+
+    async def _one(name: str, key: str) -> List[dict]:
+        try:
+            return await fetchers[name](start, end, key) or []
+        except Exception as e:
+            logger.warning("calendar: %s fetch failed: %s", name, e)
+            return []
+
+    results = await asyncio.gather(*[_one(name, key) for name, key in providers])
+    return {name: items for (name, _), items in zip(providers, results)}
+
+
+def merge_items(batches: Dict[str, List[dict]]) -> List[dict]:
+    """Merge provider batches into one item per (ticker, event_date) using the field precedence.
+    `source` lists the providers that reported the event, e.g. "fmp,finnhub".
+    """
+    order = [name for name, _ in CALENDAR_PROVIDERS] + [n for n in batches if n not in dict(CALENDAR_PROVIDERS)]
+    by_key: Dict[Tuple[str, str], Dict[str, dict]] = {}
+    for name in order:
+        for it in batches.get(name) or []:
+            sym = (it.get("ticker") or "").upper()
+            dt = it.get("event_date") or ""
+            if not sym or not dt:
+                continue
+            # First item per provider wins; later duplicates only fill its gaps
+            seen = by_key.setdefault((sym, dt), {}).setdefault(name, {})
+            for field, value in it.items():
+                if value and not seen.get(field):
+                    seen[field] = value
+    merged: List[dict] = []
+    for (sym, dt), per_provider in by_key.items():
+        item: Dict[str, Any] = {"ticker": sym, "event_date": dt, "source": ",".join(per_provider)}
+        for field in ("company", "time_of_day", "status"):
+            prefs = CALENDAR_FIELD_PRECEDENCE.get(field, [])
+            ranked = [n for n in prefs if n in per_provider] + [n for n in per_provider if n not in prefs]
+            item[field] = next((per_provider[n][field] for n in ranked if per_provider[n].get(field)), None)
+        merged.append(item)
+    return merged
+
+
+async def refresh_calendar(start: date, end: date) -> Dict[str, Any]:
+    """Fetch, merge and upsert the calendar for [start, end]; returns a small summary."""
+    t0 = now()
+    batches = await fetch_all(start, end)
+    fetch_ms = elapsed_ms(t0)
+    merged = merge_items(batches)
+    t1 = now()
+    written = await asyncio.to_thread(upsert_earnings_events, merged, "merged") if merged else 0
+    await asyncio.to_thread(mark_calendar_refreshed, start, end, time.time())
+    summary = {
+        "providers": {name: len(items) for name, items in batches.items()},
+        "merged": len(merged),
+        "written": written,
+        "fetch_ms": fetch_ms,
+        "write_ms": elapsed_ms(t1),
+    }
+    logger.info("calendar refresh %s..%s: %s", start, end, summary)
+    return summary
+
+
+def load_calendar(start: date, end: date, since_version: Optional[int] = None) -> List[dict]:
+    """Events in [start, end] from the DB, ordered by date then ticker; with since_version,
+    only those written after that "events" version.
+    """
+    with db_session() as s:
+        q = s.query(EarningsEvent).filter(and_(EarningsEvent.event_date >= start, EarningsEvent.event_date <= end))
+        if since_version is not None:
+            q = q.filter(EarningsEvent.version > since_version)
+        rows: List[EarningsEvent] = q.order_by(EarningsEvent.event_date.asc(), EarningsEvent.ticker.asc()).all()
+        return [
+            {
+                "id": r.id,
+                "ticker": r.ticker,
+                "company": r.company,
+                "event_date": r.event_date,
+                "time_of_day": r.time_of_day,
+                "status": r.status,
+            }
+            for r in rows
+        ]
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def is_stale(start: date, end: date) -> bool:
+    """True if a day in [start, end] has no refresh within CALENDAR_STALE_SECONDS in this process's stamps."""
+    cutoff = time.time() - CALENDAR_STALE_SECONDS
+    return any(_refreshed_at.get(d, float("-inf")) < cutoff for d in _days(start, end))
+
+
+def _invalidate(start: date, end: date) -> None:
+    global _generation
+    _generation += 1
+    for key in [k for k in _cache if k[0] <= end and k[1] >= start]:
+        _cache.pop(key, None)
+
+
+def _cache_put(key: Tuple[date, date], entry: Tuple[float, List[dict], Optional[int]]) -> None:
+    # Plain dict in insertion order as an LRU: re-inserting moves the key to the end
+    _cache.pop(key, None)
+    _cache[key] = entry
+    while len(_cache) > CALENDAR_CACHE_MAX_ENTRIES:
+        _cache.pop(next(iter(_cache)))
+
+
+async def _refresh_and_mark(start: date, end: date) -> Dict[str, Any]:
+    try:
+        summary = await refresh_calendar(start, end)
+    finally:
+        _invalidate(start, end)
+    stamp = time.time()
+    _mark_refreshed({d: stamp for d in _days(start, end)})
+    return summary
+
+
+def _mark_refreshed(stamps: Dict[date, float]) -> None:
+    cutoff = time.time() - CALENDAR_STALE_SECONDS
+    for d in [d for d, at in _refreshed_at.items() if at < cutoff]:
+        _refreshed_at.pop(d, None)
+    for d, at in stamps.items():
+        if at >= cutoff and at > _refreshed_at.get(d, float("-inf")):
+            _refreshed_at[d] = at
+
+
+def refresh_once(start: date, end: date) -> asyncio.Task:
+    """Start a refresh of [start, end] unless one is already running; returns the shared task."""
+    key = (start, end)
+    task = _inflight.get(key)
+    if task is not None and not task.done():
+        record_cache("calendar_refresh", "joined")
+        return task
+    task = asyncio.create_task(_refresh_and_mark(start, end))
+    _inflight[key] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _inflight.get(key) is t:
+            _inflight.pop(key, None)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning("calendar: background refresh %s..%s failed: %s", start, end, t.exception())
+
+    task.add_done_callback(_done)
+    record_cache("calendar_refresh", "started")
+    return task
+
+
+async def revalidate_if_stale(start: date, end: date) -> None:
+    """Schedule a background refresh of [start, end] if any day in it is stale,
+    after catching up on refreshes done by other processes.
+    """
+    if not is_stale(start, end):
+        return
+    task = _inflight.get((start, end))
+    if task is None or task.done():
+        if is_db_enabled():
+            try:
+                _mark_refreshed(await asyncio.to_thread(load_calendar_refreshes, start, end))
+            except Exception as e:
+                logger.warning("calendar: loading refresh times failed: %s", e)
+            if not is_stale(start, end):
+                return
+    refresh_once(start, end)
+
+
+async def get_calendar(
+    start: date,
+    end: date,
+    refresh: bool = False,
+    version: Optional[int] = None,
+    since_version: Optional[int] = None,
+) -> List[dict]:
+    """Calendar rows for [start, end] (stale-while-revalidate; see module comment).
+    `version` is the current "events" version, when the caller knows it; with
+    `since_version`, only rows written after it.
+    """
+    if refresh:
+        await refresh_once(start, end)
+    if since_version is not None:
+        rows = await asyncio.to_thread(load_calendar, start, end, since_version)
+        await revalidate_if_stale(start, end)
+        return rows
+    key = (start, end)
+    hit = _cache.get(key)
+    if (
+        hit is not None
+        and time.monotonic() - hit[0] < CALENDAR_CACHE_TTL_SECONDS
+        and (version is None or hit[2] == version)
+    ):
+        record_cache("calendar", "hit")
+        rows = hit[1]
+        _cache_put(key, hit)
+    else:
+        record_cache("calendar", "miss")
+        generation = _generation
+        rows = await asyncio.to_thread(load_calendar, start, end)
+        if generation == _generation:  # else a refresh landed mid-read: these rows may predate it
+            _cache_put(key, (time.monotonic(), rows, version))
+    await revalidate_if_stale(start, end)
+    return rows
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.db.persistence import is_db_enabled, load_eps_surprises, save_eps_surprises
+from app.services.metrics import record_cache
+from app.services.providers.finnhub import fetch_eps_surprises as finnhub_eps
+from app.services.providers.alpha_vantage import fetch_quarterly_earnings as av_eps
+
+# EPS surprise summaries, read-through cached per ticker.
+# Lookup order: process memory -> `eps_surprises` table -> providers (Finnhub and
+# Alpha Vantage concurrently). An entry is fresh for EPS_SURPRISE_TTL_SECONDS;
+# concurrent misses for a ticker share one provider fetch (single-flight). The
+# worker refreshes the day's calendar at half the TTL so requests rarely reach
+# the providers (Alpha Vantage's free quota is a few calls per minute).
+# Without a database the memory layer is the only store.
+
+EPS_SURPRISE_TTL_SECONDS = float(os.getenv("EPS_SURPRISE_TTL_SECONDS", "14400") or "14400")
+EPS_SURPRISE_KEEP = int(os.getenv("EPS_SURPRISE_KEEP", "8") or "8")  # quarters stored per ticker
+EPS_FETCH_CONCURRENCY = int(os.getenv("EPS_FETCH_CONCURRENCY", "4") or "4")
+
+EPS_PROVIDERS: List[Tuple[str, str]] = [("finnhub", "FINNHUB_API_KEY"), ("alpha_vantage", "ALPHA_VANTAGE_API_KEY")]
+
+logger = logging.getLogger(__name__)
+
+_memory: Dict[str, Dict[str, Any]] = {}  # ticker -> {items, sources, fetched_at}
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def _fetchers() -> Dict[str, Any]:
+    return {"finnhub": finnhub_eps, "alpha_vantage": av_eps}
+
+
+def configured_providers() -> List[Tuple[str, str]]:
+    out: List[Tuple[str, str]] = []
+    for name, env in EPS_PROVIDERS:
+        key = (os.getenv(env) or "").strip()
+        if key:
+            out.append((name, key))
+    return out
+
+
+def is_fresh(entry: Optional[Dict[str, Any]], max_age: Optional[float] = None) -> bool:
+    ttl = EPS_SURPRISE_TTL_SECONDS if max_age is None else max_age
+    return entry is not None and time.time() - float(entry.get("fetched_at") or 0) < ttl
+
+
+def dedupe_items(items: List[dict]) -> List[dict]:
+    """Drop repeats of (period, reported_eps) across providers; newest period first."""
+    seen = set()
+    out: List[dict] = []
+    for it in items:
+        k = (it.get("period"), it.get("reported_eps"))
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(it)
+    return sorted(out, key=lambda it: it.get("period") or "", reverse=True)
+
+
+async def _fetch(ticker: str) -> Dict[str, Any]:
+    providers = configured_providers()
+    fetchers = _fetchers()
+
+    async def _one(name: str, key: str) -> List[dict]:
+        try:
+            return await fetchers[name](ticker, key, limit=EPS_SURPRISE_KEEP) or []
+        except Exception as e:
+            logger.info("eps: %s fetch failed for %s: %s", name, ticker, e)
+            return []
+
+    results = await asyncio.gather(*[_one(name, key) for name, key in providers])
+    items = dedupe_items([it for lst in results for it in lst])[:EPS_SURPRISE_KEEP]
+    prev = _memory.get(ticker)
+    if not items and prev and prev.get("items"):
+        items = prev["items"]  # provider outage / quota: keep serving what we had
+    entry = {"items": items, "sources": [name for name, _ in providers], "fetched_at": time.time()}
+    if is_db_enabled():
+        try:
+            await asyncio.to_thread(save_eps_surprises, ticker, entry["items"], entry["sources"], entry["fetched_at"])
+        except Exception as e:
+            logger.warning("eps: save failed for %s: %s", ticker, e)
+    _memory[ticker] = entry
+    return entry
+
+
+def refresh_once(ticker: str) -> asyncio.Task:
+    """Fetch `ticker` from the providers unless a fetch is already running; returns the shared task."""
+    task = _inflight.get(ticker)
+    if task is not None and not task.done():
+        record_cache("eps", "joined")
+        return task
+    task = asyncio.create_task(_fetch(ticker))
+    _inflight[ticker] = task
+
+    def _done(t: asyncio.Task) -> None:
+        if _inflight.get(ticker) is t:
+            _inflight.pop(ticker, None)
+
+    task.add_done_callback(_done)
+    return task
+
+
+async def get_entries(
+    tickers: List[str],
+    known: Optional[Dict[str, Optional[dict]]] = None,
+    max_age: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """ticker -> {items, sources, fetched_at}. `known` holds entries the caller already read
+    from the DB (None = not cached); otherwise the DB is read with one query for all misses.
+    Entries older than `max_age` (default: the TTL) are refetched.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    misses: List[str] = []
+    for t in tickers:
+        mem = _memory.get(t)
+        if is_fresh(mem, max_age):
+            out[t] = mem
+        else:
+            misses.append(t)
+    if misses:
+        if known is None:
+            known = await asyncio.to_thread(load_eps_surprises, misses) if is_db_enabled() else {}
+        stale: List[str] = []
+        for t in misses:
+            entry = known.get(t)
+            if is_fresh(entry, max_age):
+                _memory[t] = entry
+                out[t] = entry
+            else:
+                if entry is not None and t not in _memory:
+                    _memory[t] = entry  # lets _fetch fall back to it
+                stale.append(t)
+        record_cache("eps", "hit", len(tickers) - len(stale))
+        record_cache("eps", "miss", len(stale))
+        sem = asyncio.Semaphore(max(1, EPS_FETCH_CONCURRENCY))
+
+        async def _refresh(t: str) -> None:
+            async with sem:
+                out[t] = await asyncio.shield(refresh_once(t))
+
+        await asyncio.gather(*[_refresh(t) for t in stale])
+    else:
+        record_cache("eps", "hit", len(tickers))
+    return {t: out[t] for t in tickers if t in out}
+
+
+async def get_entry(ticker: str) -> Dict[str, Any]:
+    return (await get_entries([ticker]))[ticker]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.memory import store
+from app.db.persistence import (
+    is_db_enabled,
+    load_chunks_many,
+    load_document,
+    load_extractions,
+    load_extractions_many,
+    save_extractions,
+    save_extractions_many,
+)
+from app.models.types import Chunk
+from app.services.metric_extractors import (
+    build_trigger_index,
+    extract_buybacks,
+    extract_core_metrics,
+    extract_guidance,
+    extract_series_by_kind,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extractor logic changes; stored rows with another version are recomputed lazily.
+EXTRACTOR_VERSION = 1
+
+# Worker pool for batch extraction (regex heuristics are CPU-bound, so processes not threads)
+EXTRACT_POOL_WORKERS = int(os.getenv("EXTRACT_POOL_WORKERS", "2") or "2")
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and EXTRACT_POOL_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_POOL_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def compute_extractions(chunks: List[Chunk]) -> Dict[str, Any]:
+    """Run every extractor over a document and return a JSON-ready payload."""
+    index = build_trigger_index(chunks)
+    return jsonable_encoder({
+        "metrics": extract_core_metrics(chunks, index),
+        "series": extract_series_by_kind(chunks),
+        "guidance": extract_guidance(chunks, index),
+        "buybacks": extract_buybacks(chunks, index),
+    })
+
+
+def materialise_extractions(doc_id: str, chunks: List[Chunk]) -> Dict[str, Any]:
+    """Compute extractions for a document and persist them if the DB is configured.
+    Called at ingest time; persistence errors are logged, never raised.
+    """
+    data = compute_extractions(chunks)
+    doc = store.documents.get(doc_id)
+    if doc is not None:
+        doc["extractions"] = (EXTRACTOR_VERSION, data)
+    try:
+        save_extractions(doc_id, EXTRACTOR_VERSION, data)
+    except Exception as e:
+        logger.warning("extractions: persist error for doc_id=%s: %s", doc_id, e)
+    return data
+
+
+def get_extractions(doc_id: str) -> Optional[Dict[str, Any]]:
+    """Return extractions for a document, or None if the document is unknown.
+    Lookup order: in-memory doc entry, stored row at the current version, then
+    recompute from chunks (loading them from the DB if needed) and persist.
+    """
+    doc = store.documents.get(doc_id)
+    if doc is not None:
+        cached = doc.get("extractions")
+        if cached and cached[0] == EXTRACTOR_VERSION:
+            return cached[1]
+    if is_db_enabled():
+        try:
+            stored = load_extractions(doc_id, EXTRACTOR_VERSION)
+        except Exception:
+            stored = None
+        if stored is not None:
+            if doc is not None:
+                doc["extractions"] = (EXTRACTOR_VERSION, stored)
+            return stored
+        if doc is None:
+            try:
+                doc = load_document(doc_id)
+            except Exception:
+                doc = None
+            if doc:
+                store.documents[doc_id] = doc
+    if not doc:
+        return None
+    return materialise_extractions(doc_id, doc["chunks"])
+
+
+async def get_extractions_many(doc_ids: List[str]) -> Dict[str, Any]:
+    """Batch variant of get_extractions.
+    Returns doc_id -> extractions dict, or an Exception for documents that are
+    unknown or failed, so callers can return partial results. Stored rows and
+    chunks are each fetched with a single query; missing extractions are
+    computed concurrently in the worker pool and persisted in one transaction.
+    """
+    out: Dict[str, Any] = {}
+    pending: List[str] = []
+    for doc_id in doc_ids:
+        cached = (store.documents.get(doc_id) or {}).get("extractions")
+        if cached and cached[0] == EXTRACTOR_VERSION:
+            out[doc_id] = cached[1]
+        else:
+            pending.append(doc_id)
+
+    if pending and is_db_enabled():
+        try:
+            stored = load_extractions_many(pending, EXTRACTOR_VERSION)
+        except Exception as e:
+            logger.warning("extractions: bulk load failed: %s", e)
+            stored = {}
+        out.update(stored)
+        pending = [d for d in pending if d not in stored]
+
+    chunks_by_doc: Dict[str, List[Chunk]] = {}
+    for doc_id in pending:
+        doc = store.documents.get(doc_id)
+        if doc is not None:
+            chunks_by_doc[doc_id] = doc["chunks"]
+    missing = [d for d in pending if d not in chunks_by_doc]
+    if missing and is_db_enabled():
+        try:
+            chunks_by_doc.update(load_chunks_many(missing))
+        except Exception as e:
+            logger.warning("extractions: bulk chunk load failed: %s", e)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    todo = [d for d in pending if chunks_by_doc.get(d)]
+    results = await asyncio.gather(
+        *[loop.run_in_executor(pool, compute_extractions, chunks_by_doc[d]) for d in todo],
+        return_exceptions=True,
+    )
+    computed: Dict[str, Dict[str, Any]] = {}
+    for doc_id, res in zip(todo, results):
+        out[doc_id] = res
+        if isinstance(res, Exception):
+            continue
+        computed[doc_id] = res
+        doc = store.documents.get(doc_id)
+        if doc is not None:
+            doc["extractions"] = (EXTRACTOR_VERSION, res)
+    try:
+        save_extractions_many(EXTRACTOR_VERSION, computed)
+    except Exception as e:
+        logger.warning("extractions: bulk persist failed: %s", e)
+
+    for doc_id in pending:
+        out.setdefault(doc_id, LookupError("Unknown doc_id"))
+    return out
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
+import logging
 import uuid
 from datetime import date, datetime
 from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import update
+
 from app.db.base import db_session
 from app.db.models import Highlight, EarningsEvent
+from app.db.persistence import bump_versions, ensure_earnings_event
 from app.models.types import Chunk
 from app.services.metric_extractors import (
     extract_core_metrics,
     extract_series_for_metrics,
     extract_guidance,
     extract_buybacks,
+    build_trigger_index,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def _bullets_from_metrics(metrics: Dict[str, Dict]) -> List[str]:
     out: List[str] = []
@@ -49,8 +56,9 @@ def create_highlight_and_event(
     Returns the created highlight id, or None on failure.
     """
     try:
-        metrics = extract_core_metrics(chunks)
-        guidance = extract_guidance(chunks)
+        index = build_trigger_index(chunks)
+        metrics = extract_core_metrics(chunks, index)
+        guidance = extract_guidance(chunks, index)
         # Simple series for charts if needed later
         # series = extract_series_for_metrics(chunks, ["revenue", "eps_gaap", "eps_nongaap"])  # not stored yet
         bullets = _bullets_from_metrics(metrics)
@@ -74,26 +82,25 @@ def create_highlight_and_event(
                     rank_score=_score_from_summary(metrics, {"guidance": guidance.get("guidance")}),
                 )
             )
-            # Ensure an event exists for today (UTC date)
-            today = date.today()
-            existing = (
-                s.query(EarningsEvent)
-                .filter(EarningsEvent.ticker == ticker.upper(), EarningsEvent.event_date == today)
-                .first()
-            )
-            if not existing:
-                s.add(
-                    EarningsEvent(
-                        id=str(uuid.uuid4()),
-                        ticker=ticker.upper(),
-                        company=company,
-                        event_date=today,
-                        time_of_day=None,
-                        status="reported",
-                        source="ingest_symbol",
-                    )
-                )
+            # Ensure an event exists for today (UTC date); race-free where the unique
+            # (ticker, event_date) index exists
+            event_id = ensure_earnings_event(s, {
+                "id": str(uuid.uuid4()),
+                "ticker": ticker.upper(),
+                "company": company,
+                "event_date": date.today(),
+                "time_of_day": None,
+                "status": "reported",
+                "source": "ingest_symbol",
+            })
+            s.flush()
+            # Versions last, so their row locks are held only until commit
+            versions = bump_versions(s, "highlights", *(["events"] if event_id else []))
+            s.execute(update(Highlight).where(Highlight.id == hid).values(version=versions["highlights"]))
+            if event_id:
+                s.execute(update(EarningsEvent).where(EarningsEvent.id == event_id).values(version=versions["events"]))
         return hid
     except Exception:
         # Swallow errors to avoid breaking ingest flow
+        logger.warning("highlights: could not store highlight for %s (doc %s)", ticker, doc_id, exc_info=True)
         return None
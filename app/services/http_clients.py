@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import logging
+import os
+import time
+from functools import partial
+from typing import Any, Dict, Optional, Set, Tuple
+
+import httpx
+
+from app.services.metrics import record_pool
+from app.services.rate_limit import PRIORITY_BACKGROUND, RateLimitTimeout, get_limiter, request_priority
+
+# Application-scoped HTTP clients, one per upstream provider.
+# Each client owns its own connection pool (httpx keeps per-origin connections
+# inside it), so provider calls reuse TLS sessions and keep-alive sockets instead
+# of paying a handshake per request. Clients are created at app/worker startup
+# and closed at shutdown; get_client() also creates them lazily.
+# Requests first take a token from the provider's rate limiter (services.rate_limit).
+# Interactive requests wait for it at most their pool timeout (httpx only starts
+# its own timeouts afterwards) and fail with httpx.PoolTimeout otherwise;
+# background jobs queue without a deadline.
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20") or "20")
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10") or "10")
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30") or "30")
+# HTTP/2 needs the optional `h2` package (httpx[http2]); fall back to HTTP/1.1 without it
+HTTP2_ENABLED = (os.getenv("HTTP2_ENABLED", "1") or "1") not in ("0", "false", "False") and importlib.util.find_spec("h2") is not None
+
+PROVIDERS = ("finnhub", "fmp", "alpha_vantage", "edgar", "generic")
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_closing: Set[asyncio.Task] = set()  # retired clients being closed
+
+
+def _active_connections(client: httpx.AsyncClient) -> int:
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    try:
+        return sum(1 for c in getattr(pool, "connections", []) if not c.is_idle())
+    except Exception:
+        return 0
+
+
+async def _trace(name: str, event_name: str, info: Dict[str, Any]) -> None:
+    # httpcore trace hook: a TCP connect means the request could not reuse a pooled connection
+    if event_name == "connection.connect_tcp.complete":
+        record_pool(name, connects=1)
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return min(60.0, float(response.headers.get("retry-after") or 1.0))
+    except ValueError:
+        return 1.0
+
+
+def _ratelimit_remaining(response: httpx.Response) -> Optional[Tuple[int, float]]:
+    """(remaining, seconds until reset) from X-Ratelimit-* headers (Finnhub, FMP), if sent."""
+    raw = response.headers.get("x-ratelimit-remaining")
+    if raw is None:
+        return None
+    try:
+        remaining = int(float(raw))
+        reset = float(response.headers.get("x-ratelimit-reset") or 60.0)
+    except ValueError:
+        return None
+    # Reset is an epoch timestamp on Finnhub; treat small values as relative seconds
+    reset_in = reset - time.time() if reset > 1e9 else reset
+    return remaining, min(60.0, max(0.0, reset_in))
+
+
+def queued_ms(response: httpx.Response) -> int:
+    """Time the request waited for a rate-limit token (for record_http)."""
+    try:
+        return int(response.request.extensions.get("queued_ms") or 0)
+    except Exception:
+        return 0
+
+
+def _token_timeout(request: httpx.Request) -> Optional[float]:
+    """How long an interactive request may wait for a rate-limit token: its pool timeout."""
+    if request_priority.get() >= PRIORITY_BACKGROUND:
+        return None
+    timeouts = request.extensions.get("timeout") or {}
+    return timeouts.get("pool") or timeouts.get("connect")
+
+
+def _make_client(name: str) -> httpx.AsyncClient:
+    client: httpx.AsyncClient
+    limiter = get_limiter(name)
+
+    async def on_request(request: httpx.Request) -> None:
+        if limiter is not None:
+            try:
+                request.extensions["queued_ms"] = await limiter.acquire(timeout=_token_timeout(request))
+            except RateLimitTimeout as e:
+                raise httpx.PoolTimeout(str(e), request=request) from None
+        request.extensions["trace"] = partial(_trace, name)
+        record_pool(name, requests=1, active=_active_connections(client), max_connections=HTTP_MAX_CONNECTIONS)
+
+    async def on_response(response: httpx.Response) -> None:
+        if limiter is None:
+            return
+        if response.status_code == 429:
+            limiter.backoff(_retry_after(response))
+        remaining = _ratelimit_remaining(response)
+        if remaining is not None:
+            limiter.observe_remaining(*remaining)
+
+    client = httpx.AsyncClient(
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=15.0,
+        follow_redirects=True,
+        event_hooks={"request": [on_request], "response": [on_response]},
+    )
+    return client
+
+
+async def _aclose(name: str, client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.debug("http clients: error closing retired %s: %s", name, e)
+
+
+def _retire_clients(old: Optional[asyncio.AbstractEventLoop], new: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close the previous loop's clients (on that loop while it is still open, so its
+    transports shut down cleanly; else on the new one) before dropping them."""
+    retired = [(name, c) for name, c in _clients.items() if not c.is_closed]
+    _clients.clear()
+    for name, client in retired:
+        if old is not None and not old.is_closed():
+            asyncio.run_coroutine_threadsafe(_aclose(name, client), old)
+        elif new is not None:
+            task = new.create_task(_aclose(name, client))
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+
+
+def get_client(name: str = "generic") -> httpx.AsyncClient:
+    """Shared client for a provider; pass per-call headers/timeout to client.get()."""
+    global _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not _loop:
+        # Pooled connections belong to the loop that opened them (e.g. TestClient runs a loop per request)
+        _retire_clients(_loop, loop)
+        _loop = loop
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _make_client(name)
+    return client
+
+
+def init_clients() -> None:
+    for name in PROVIDERS:
+        get_client(name)
+    logger.info("http clients ready: %s (http2=%s, max_connections=%d)", ",".join(PROVIDERS), HTTP2_ENABLED, HTTP_MAX_CONNECTIONS)
+
+
+async def close_clients() -> None:
+    for name, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("http clients: error closing %s: %s", name, e)
+    _clients.clear()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Current connection counts per provider client."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, client in _clients.items():
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        conns = list(getattr(pool, "connections", []) or [])
+        active = _active_connections(client)
+        out[name] = {
+            "open": len(conns),
+            "active": active,
+            "idle": len(conns) - active,
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "http2": HTTP2_ENABLED,
+        }
+    return out
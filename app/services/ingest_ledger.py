@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.db.persistence import is_db_enabled, load_ingest_ledger, save_ingest_ledger
+from app.routes.discovery import _edgar_latest_filing
+
+# Per-ticker ingest ledger: what was last ingested for a ticker (resolved source
+# URL, latest SEC accession number at the time, doc id). The recurring
+# ingest_today job consults it so only tickers with something new are downloaded:
+#   - SEC filers: the latest 8-K/10-Q/10-K accession from the cached submissions
+#     feed (revalidated with a conditional GET) must differ from the ledger's
+#   - others: skipped if already ingested today
+# After resolving, a ticker whose document URL matches the ledger is skipped too.
+# Without a database the ledger lives in process memory (P0 mode).
+
+INGEST_CHECK_TTL_SECONDS = int(os.getenv("INGEST_CHECK_TTL_SECONDS", "600") or "600")
+INGEST_CHECK_CONCURRENCY = int(os.getenv("INGEST_CHECK_CONCURRENCY", "8") or "8")
+EARNINGS_FORMS = ["8-K", "10-Q", "10-K", "6-K", "20-F", "40-F"]
+
+logger = logging.getLogger(__name__)
+
+_memory_ledger: Dict[str, Dict[str, Any]] = {}
+
+
+class IngestPlan(NamedTuple):
+    tickers: List[str]  # to ingest, in input order
+    skipped: List[Dict[str, Any]]  # [{ticker, reason}]
+    accessions: Dict[str, Optional[str]]  # ticker -> latest accession seen by the check
+    entries: Dict[str, Dict[str, Any]]  # ledger rows of the tickers to ingest that were ingested before
+
+    @property
+    def known_sources(self) -> Dict[str, str]:
+        """ticker -> source URL already ingested (a re-resolved identical URL is skipped)."""
+        return {t: e["source_url"] for t, e in self.entries.items() if e.get("source_url")}
+
+
+def _load(tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+    if is_db_enabled():
+        return load_ingest_ledger(tickers)
+    return {t: _memory_ledger[t] for t in tickers if t in _memory_ledger}
+
+
+def _ingested_today(entry: Dict[str, Any]) -> bool:
+    ts = entry.get("ingested_at")
+    if not isinstance(ts, datetime):
+        return False
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).date() == datetime.now(timezone.utc).date()
+
+
+async def plan(tickers: List[str]) -> IngestPlan:
+    """Split tickers into those with something new to ingest and those to skip."""
+    ledger = _load(tickers)
+    sem = asyncio.Semaphore(max(1, INGEST_CHECK_CONCURRENCY))
+
+    async def _latest(t: str) -> Optional[Dict[str, str]]:
+        # Checked for new tickers too, so their first ledger row carries the accession
+        async with sem:
+            try:
+                return await _edgar_latest_filing(t, EARNINGS_FORMS, ttl=INGEST_CHECK_TTL_SECONDS)
+            except Exception as e:
+                logger.info("ingest ledger: filing check failed for %s: %s", t, e)
+                return None
+
+    latest = await asyncio.gather(*[_latest(t) for t in tickers])
+    todo: List[str] = []
+    skipped: List[Dict[str, Any]] = []
+    accessions: Dict[str, Optional[str]] = {}
+    known: Dict[str, Dict[str, Any]] = {}
+    for t, filing in zip(tickers, latest):
+        entry = ledger.get(t)
+        accessions[t] = filing["accession"] if filing else None
+        if entry is None:
+            todo.append(t)
+            continue
+        if filing is not None:
+            if filing["accession"] == entry.get("accession"):
+                skipped.append({"ticker": t, "reason": "no_new_filing", "accession": filing["accession"]})
+                continue
+        elif _ingested_today(entry):
+            skipped.append({"ticker": t, "reason": "ingested_today"})
+            continue
+        known[t] = entry
+        todo.append(t)
+    return IngestPlan(todo, skipped, accessions, known)
+
+
+def record(ticker: str, accession: Optional[str], source_url: Optional[str], doc_id: Optional[str]) -> None:
+    if is_db_enabled():
+        try:
+            save_ingest_ledger(ticker, accession, source_url, doc_id)
+        except Exception as e:
+            logger.warning("ingest ledger: save failed for %s: %s", ticker, e)
+        return
+    _memory_ledger[ticker] = {
+        "accession": accession,
+        "source_url": source_url,
+        "doc_id": doc_id,
+        "ingested_at": datetime.now(timezone.utc),
+    }
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from app.routes.discovery import (
+    SymbolIngest,
+    resolve_symbol_source,
+    download_symbol_source,
+    parse_symbol_document,
+    embed_symbol_document,
+    persist_symbol_document,
+    highlight_symbol_document,
+)
+
+# Staged ingestion pipeline for batch jobs (worker ingest_today).
+# Each stage has its own pool of coroutines and a bounded input queue, so
+# network-bound stages (resolve, download, embed) overlap with CPU-bound parsing
+# and DB writes, and a slow stage backs up its producers instead of letting
+# downloads pile up in memory. Sync stage functions run in worker threads.
+# A failed item skips the remaining stages and is reported with its error.
+
+class SkipItem(Exception):
+    """Raised by a stage to drop an item without counting it as an error."""
+
+
+StageFn = Callable[[Any], Union[Any, Awaitable[Any]]]
+
+
+class Stage(NamedTuple):
+    name: str
+    fn: StageFn
+    concurrency: int = 1
+    queue_size: int = 4  # bounded input queue: backpressure on the previous stage
+
+
+class _StageStats:
+    def __init__(self, name: str, concurrency: int, queue_size: int) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.processed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.busy_ms = 0.0
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._depth_n = 0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def sample_depth(self, depth: int) -> None:
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_sum += depth
+        self._depth_n += 1
+
+    def summary(self) -> Dict[str, Any]:
+        wall = (self.last_end - self.first_start) if (self.first_start is not None and self.last_end is not None) else 0.0
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "busy_ms": int(self.busy_ms),
+            "wall_ms": int(wall * 1000),
+            "items_per_s": round(self.processed / wall, 3) if wall > 0 else None,
+            "utilisation": round(self.busy_ms / (wall * 1000 * self.concurrency), 3) if wall > 0 else None,
+            "queue_depth_max": self.max_depth,
+            "queue_depth_avg": round(self._depth_sum / self._depth_n, 2) if self._depth_n else 0,
+        }
+
+
+_DONE = object()
+
+
+async def run_pipeline(items: List[Any], stages: List[Stage]) -> Tuple[List[Tuple[Any, Optional[BaseException]]], Dict[str, Any]]:
+    """Push items through the stages; returns ([(item, error or None)] in completion order, per-stage stats).
+    Skipped items are reported with their SkipItem.
+    """
+    queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=max(1, st.queue_size)) for st in stages]
+    stats = [_StageStats(st.name, max(1, st.concurrency), max(1, st.queue_size)) for st in stages]
+    results: List[Tuple[Any, Optional[BaseException]]] = []
+    t0 = time.perf_counter()
+
+    async def _put(k: int, item: Any) -> None:
+        if k == len(stages):
+            results.append((item, None))
+            return
+        await queues[k].put(item)
+        stats[k].sample_depth(queues[k].qsize())
+
+    async def _worker(k: int) -> None:
+        st, ss = stages[k], stats[k]
+        is_async = inspect.iscoroutinefunction(st.fn)
+        while True:
+            item = await queues[k].get()
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            if ss.first_start is None:
+                ss.first_start = start
+            try:
+                out = await st.fn(item) if is_async else await asyncio.to_thread(st.fn, item)
+            except Exception as e:
+                if isinstance(e, SkipItem):
+                    ss.skipped += 1
+                else:
+                    ss.errors += 1
+                results.append((item, e))
+                out = _DONE
+            finally:
+                end = time.perf_counter()
+                ss.busy_ms += (end - start) * 1000
+                ss.last_end = end
+            if out is not _DONE:
+                ss.processed += 1
+                await _put(k + 1, out)
+
+    async def _run_stage(k: int) -> None:
+        await asyncio.gather(*[_worker(k) for _ in range(stats[k].concurrency)])
+        # Stage drained: release the next stage's workers
+        if k + 1 < len(stages):
+            for _ in range(stats[k + 1].concurrency):
+                await queues[k + 1].put(_DONE)
+
+    async def _feed() -> None:
+        for it in items:
+            await _put(0, it)
+        for _ in range(stats[0].concurrency):
+            await queues[0].put(_DONE)
+
+    await asyncio.gather(_feed(), *[_run_stage(k) for k in range(len(stages))])
+    summary = {
+        "wall_ms": int((time.perf_counter() - t0) * 1000),
+        "items": len(items),
+        "stages": {ss.name: ss.summary() for ss in stats},
+    }
+    return results, summary
+
+
+# Per-stage concurrency; override with INGEST_STAGE_CONCURRENCY="download=6,parse=2"
+DEFAULT_STAGE_CONCURRENCY: Dict[str, int] = {
+    "resolve": 4,
+    "download": 4,
+    "parse": 2,
+    "embed": 2,
+    "persist": 2,
+    "highlight": 1,
+}
+INGEST_STAGE_QUEUE_SIZE = int(os.getenv("INGEST_STAGE_QUEUE_SIZE", "4") or "4")
+
+
+def _stage_concurrency() -> Dict[str, int]:
+    out = dict(DEFAULT_STAGE_CONCURRENCY)
+    for part in (os.getenv("INGEST_STAGE_CONCURRENCY") or "").split(","):
+        name, _, n = part.partition("=")
+        if name.strip() in out and n.strip().isdigit():
+            out[name.strip()] = max(1, int(n))
+    return out
+
+
+def symbol_stages(network_concurrency: Optional[int] = None, known_sources: Optional[Dict[str, str]] = None) -> List[Stage]:
+    conc = _stage_concurrency()
+    if network_concurrency:
+        for name in ("resolve", "download"):
+            conc[name] = max(1, min(conc[name], network_concurrency))
+    known = known_sources or {}
+
+    async def resolve(job: SymbolIngest) -> SymbolIngest:
+        await resolve_symbol_source(job)
+        if job.pdf_url and known.get(job.ticker) == job.pdf_url:
+            raise SkipItem("same_source")  # already ingested this document
+        return job
+
+    fns = [
+        ("resolve", resolve),
+        ("download", download_symbol_source),
+        ("parse", parse_symbol_document),
+        ("embed", embed_symbol_document),
+        ("persist", persist_symbol_document),
+        ("highlight", highlight_symbol_document),
+    ]
+    return [Stage(name, fn, conc[name], INGEST_STAGE_QUEUE_SIZE) for name, fn in fns]
+
+
+async def ingest_symbols(
+    tickers: List[str],
+    prefer: Optional[str] = None,
+    network_concurrency: Optional[int] = None,
+    known_sources: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Ingest tickers through the staged pipeline; returns (per-ticker results, pipeline stats).
+    Tickers whose resolved URL equals `known_sources[ticker]` are reported as skipped.
+    """
+    stages = symbol_stages(network_concurrency, known_sources)
+    results, stats = await run_pipeline([SymbolIngest(t, prefer) for t in tickers], stages)
+    items: List[Dict[str, Any]] = []
+    for job, err in results:
+        if err is None:
+            items.append({"ticker": job.ticker, "ok": True, "doc_id": job.doc_id, "source_url": job.pdf_url})
+        elif isinstance(err, SkipItem):
+            items.append({"ticker": job.ticker, "ok": True, "skipped": str(err), "source_url": job.pdf_url})
+        else:
+            if job.dl is not None:
+                job.dl.close()
+            items.append({"ticker": job.ticker, "ok": False, "error": str(err)})
+    return items, stats
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.db.persistence import (
+    claim_ingest_job,
+    enqueue_ingest_jobs,
+    finish_ingest_job,
+    load_ingest_jobs,
+    requeue_stale_ingest_jobs,
+)
+from app.routes.discovery import IngestSymbolRequest, IngestUrlRequest, ingest_symbol, ingest_url
+from app.services.rate_limit import request_priority, PRIORITY_BACKGROUND
+
+# Persistent ingestion queue on Postgres (`ingest_jobs` table).
+# API callers submit tickers/URLs and get job ids back; worker coroutines (in any
+# number of worker processes) claim jobs with SELECT ... FOR UPDATE SKIP LOCKED,
+# run the usual ingest_symbol / ingest_url pipeline and record the result.
+# Transient failures are retried with exponential backoff up to max_attempts;
+# jobs orphaned by a crashed worker are re-queued once their lease expires.
+
+INGEST_QUEUE_WORKERS = int(os.getenv("INGEST_QUEUE_WORKERS", "4") or "4")
+INGEST_JOB_MAX_ATTEMPTS = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS", "3") or "3")
+INGEST_JOB_RETRY_BASE_SECONDS = float(os.getenv("INGEST_JOB_RETRY_BASE_SECONDS", "30") or "30")
+INGEST_JOB_LEASE_SECONDS = int(os.getenv("INGEST_JOB_LEASE_SECONDS", "900") or "900")
+INGEST_QUEUE_POLL_SECONDS = float(os.getenv("INGEST_QUEUE_POLL_SECONDS", "2") or "2")
+
+logger = logging.getLogger(__name__)
+
+
+def submit(tickers: List[str], urls: List[IngestUrlRequest], prefer: Optional[str] = None, max_attempts: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """Queue one job per ticker / URL; returns (batch_id, [{id, kind, target}])."""
+    batch_id = str(uuid.uuid4())
+    jobs: List[Tuple[str, str, dict]] = []
+    for t in dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()):
+        jobs.append((str(uuid.uuid4()), "symbol", {"ticker": t, "prefer": prefer}))
+    for u in urls:
+        jobs.append((str(uuid.uuid4()), "url", u.model_dump()))
+    enqueue_ingest_jobs(batch_id, jobs, max(1, int(max_attempts or INGEST_JOB_MAX_ATTEMPTS)))
+    return batch_id, [{"id": jid, "kind": kind, "target": p.get("ticker") if kind == "symbol" else p.get("url")} for jid, kind, p in jobs]
+
+
+def is_permanent(exc: BaseException) -> bool:
+    """Client-side errors (no document for a ticker, bad URL, not a PDF) won't succeed on retry."""
+    return isinstance(exc, HTTPException) and 400 <= exc.status_code < 500 and exc.status_code != 429
+
+
+def retry_delay(attempts: int) -> float:
+    return min(3600.0, INGEST_JOB_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+async def run_job(job: Dict[str, Any]) -> Optional[str]:
+    """Run one claimed job through the regular ingestion pipeline; returns the new doc_id."""
+    payload = job.get("payload") or {}
+    if job["kind"] == "symbol":
+        resp = await ingest_symbol(IngestSymbolRequest(**payload))
+    elif job["kind"] == "url":
+        resp = await ingest_url(IngestUrlRequest(**payload))
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {job['kind']}")
+    return getattr(resp, "doc_id", None)
+
+
+async def process_one(worker_id: str) -> bool:
+    """Claim and run a single job; False when the queue had nothing runnable."""
+    job = await asyncio.to_thread(claim_ingest_job, worker_id)
+    if job is None:
+        return False
+    try:
+        doc_id = await run_job(job)
+    except Exception as e:
+        err = str(getattr(e, "detail", None) or e) or type(e).__name__
+        retry = None if is_permanent(e) or job["attempts"] >= job["max_attempts"] else retry_delay(job["attempts"])
+        logger.info("ingest job %s (%s) attempt %d failed: %s%s", job["id"], job["kind"], job["attempts"], err, "" if retry is None else f"; retry in {retry:.0f}s")
+        await asyncio.to_thread(finish_ingest_job, job["id"], None, err, retry)
+        return True
+    await asyncio.to_thread(finish_ingest_job, job["id"], doc_id)
+    return True
+
+
+async def worker_loop(worker_id: str, stop: Optional[asyncio.Event] = None) -> None:
+    request_priority.set(PRIORITY_BACKGROUND)
+    while stop is None or not stop.is_set():
+        try:
+            if await process_one(worker_id):
+                continue
+        except Exception as e:
+            logger.warning("ingest queue %s: %s", worker_id, e)
+        await asyncio.sleep(INGEST_QUEUE_POLL_SECONDS)
+
+
+def start_workers(n: Optional[int] = None, stop: Optional[asyncio.Event] = None) -> List[asyncio.Task]:
+    n = INGEST_QUEUE_WORKERS if n is None else n
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("ingest queue: starting %d workers on %s", n, host)
+    return [asyncio.create_task(worker_loop(f"{host}/{i}", stop)) for i in range(max(0, n))]
+
+
+def requeue_stale() -> int:
+    n = requeue_stale_ingest_jobs(INGEST_JOB_LEASE_SECONDS)
+    if n:
+        logger.info("ingest queue: re-queued %d jobs with expired leases", n)
+    return n
+
+
+def batch_status(batch_id: str) -> Optional[Dict[str, Any]]:
+    jobs = load_ingest_jobs(batch_id=batch_id)
+    if not jobs:
+        return None
+    counts: Dict[str, int] = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+    for j in jobs:
+        counts[j["status"]] = counts.get(j["status"], 0) + 1
+    return {
+        "batch_id": batch_id,
+        "total": len(jobs),
+        "counts": counts,
+        "finished": counts["queued"] + counts["running"] == 0,
+        "jobs": jobs,
+    }
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+from app.models.types import Chunk
+
+# One-pass keyword index over a document's chunks.
+# A single compiled alternation is evaluated at every offset via a zero-width
+# lookahead, so overlapping trigger phrases are all reported in one C-level scan
+# (equivalent to an Aho–Corasick pass for our small, fixed phrase set).
+# Phrases are matched against lowercased text, mirroring `phrase in text.lower()`.
+
+
+class KeywordIndex:
+    def __init__(self, phrases: Iterable[str], chunk_hits: List[FrozenSet[str]]):
+        self.phrases: FrozenSet[str] = frozenset(phrases)
+        self.chunk_hits = chunk_hits  # chunk position -> phrases present in that chunk
+        self.postings: Dict[str, List[int]] = {p: [] for p in self.phrases}
+        for i, hits in enumerate(chunk_hits):
+            for p in hits:
+                self.postings[p].append(i)
+
+    def hits(self, i: int) -> FrozenSet[str]:
+        return self.chunk_hits[i]
+
+    def candidates(self, phrases: Iterable[str]) -> List[int]:
+        """Sorted chunk positions containing at least one of the given phrases."""
+        out: Set[int] = set()
+        for p in phrases:
+            out.update(self.postings.get(p, ()))
+        return sorted(out)
+
+
+def _compile(phrases: Iterable[str]):
+    # Longest first so that, at a shared offset, the longest phrase wins;
+    # shorter phrases it contains are recovered via the containment closure.
+    ordered = sorted(phrases, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(re.escape(p) for p in ordered) + "))")
+    closure = {p: frozenset(q for q in ordered if q in p) for p in ordered}
+    return pattern, closure
+
+
+def build_keyword_index(chunks: List[Chunk], phrases: Iterable[str]) -> KeywordIndex:
+    phrases = sorted({p.lower() for p in phrases if p})
+    pattern, closure = _compile(phrases)
+    chunk_hits: List[FrozenSet[str]] = []
+    for c in chunks:
+        found: Set[str] = set()
+        for m in pattern.finditer(c.text.lower()):
+            found.update(closure[m.group(1)])
+        chunk_hits.append(frozenset(found))
+    return KeywordIndex(phrases, chunk_hits)
@@ -4,15 +4,43 @@ import re
 from typing import Dict, List, Optional, Tuple
 
 from app.models.types import Chunk, Citation
+from app.services.keyword_index import KeywordIndex, build_keyword_index
+from app.services.span_scanner import MONEY, MONEY_RE, PCT_RE, PERCENT, PERIOD, PERIOD_RE, Span, first_spans
 
 # Simple, deterministic heuristic extractors for P1
 # Notes:
 # - We favor deterministic regex-based extraction with clear citations
 # - If OPENAI is available later, we can augment with an LLM pass
 
-MONEY_RE = re.compile(r"\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", re.I)
-PCT_RE = re.compile(r"([0-9]{1,2}(?:\.[0-9]+)?)\s*%")
-PERIOD_RE = re.compile(r"\b((Q[1-4]|FY)\s*\d{4})\b", re.I)
+# MONEY_RE / PCT_RE / PERIOD_RE live in span_scanner and are re-exported here.
+
+# Trigger phrases per extractor; a chunk is only visited if it contains one of them.
+CORE_TRIGGERS = (
+    "revenue",
+    "gross margin",
+    "operating margin",
+    "operating income",
+    "earnings per share",
+    "eps",
+    "cash provided by operating activities",
+    "operating cash flow",
+    "cash flow from operations",
+    "capital expenditures",
+    "capex",
+    "property and equipment",
+    "free cash flow",
+    "fcf",
+)
+# Qualifiers consulted on candidate chunks (never select a chunk on their own)
+CORE_QUALIFIERS = ("deferred", "%", "non-gaap", "non gaap", "adjusted")
+GUIDANCE_TRIGGERS = ("guidance", "outlook", "expects", "forecast")
+BUYBACK_TRIGGERS = ("repurchase", "buyback", "share repurchase")
+ALL_TRIGGERS = CORE_TRIGGERS + CORE_QUALIFIERS + GUIDANCE_TRIGGERS + BUYBACK_TRIGGERS
+
+
+def build_trigger_index(chunks: List[Chunk]) -> KeywordIndex:
+    """Index every extractor trigger phrase across chunks in a single pass."""
+    return build_keyword_index(chunks, ALL_TRIGGERS)
 
 
 def _to_millions(value_str: str, unit: Optional[str]) -> float:
@@ -48,6 +76,22 @@ def _first_period(text: str) -> Optional[str]:
     return m.group(1).upper() if m else None
 
 
+# Span-based equivalents of the helpers above, resolved from one scanner pass
+def _span_money(spans: Dict[str, Span]) -> Optional[float]:
+    sp = spans.get(MONEY)
+    return _to_millions(sp.text, sp.unit) if sp else None
+
+
+def _span_pct(spans: Dict[str, Span]) -> Optional[float]:
+    sp = spans.get(PERCENT)
+    return float(sp.text) if sp else None
+
+
+def _span_period(spans: Dict[str, Span]) -> Optional[str]:
+    sp = spans.get(PERIOD)
+    return sp.text if sp else None
+
+
 class MetricMatch:
     def __init__(self, name: str, value: float, unit: str, period: Optional[str], chunk: Chunk):
         self.name = name
@@ -67,7 +111,7 @@ class MetricMatch:
         }
 
 
-def extract_core_metrics(chunks: List[Chunk]) -> Dict[str, Dict]:
+def extract_core_metrics(chunks: List[Chunk], index: Optional[KeywordIndex] = None) -> Dict[str, Dict]:
     """
     Extract core metrics with simple rules and provide citations from the matched chunk.
     Metrics:
@@ -80,60 +124,63 @@ def extract_core_metrics(chunks: List[Chunk]) -> Dict[str, Dict]:
       - capex (USD millions)
       - fcf (USD millions; cfo - capex if both found)
       - fcf_margin (%)
+    Pass a prebuilt `index` (see build_trigger_index) to skip chunks without triggers.
     """
     found: Dict[str, MetricMatch] = {}
+    index = index or build_trigger_index(chunks)
 
-    for c in chunks:
-        txt = c.text
-        ltxt = txt.lower()
-        period = _first_period(txt)
+    for i in index.candidates(CORE_TRIGGERS):
+        c = chunks[i]
+        hits = index.hits(i)
+        spans = first_spans(c.text)
+        period = _span_period(spans)
 
         # Revenue
-        if "revenue" in ltxt and "deferred" not in ltxt:
-            val = _first_money(txt)
+        if "revenue" in hits and "deferred" not in hits:
+            val = _span_money(spans)
             if val is not None and "revenue" not in found:
                 found["revenue"] = MetricMatch("revenue", val, "USD_millions", period, c)
 
         # Gross margin
-        if "gross margin" in ltxt:
-            pct = _first_pct(txt)
+        if "gross margin" in hits:
+            pct = _span_pct(spans)
             if pct is not None and "gross_margin" not in found:
                 found["gross_margin"] = MetricMatch("gross_margin", pct, "percent", period, c)
 
         # Operating margin
-        if "operating margin" in ltxt or ("operating income" in ltxt and "%" in ltxt):
-            pct = _first_pct(txt)
+        if "operating margin" in hits or ("operating income" in hits and "%" in hits):
+            pct = _span_pct(spans)
             if pct is not None and "operating_margin" not in found:
                 found["operating_margin"] = MetricMatch("operating_margin", pct, "percent", period, c)
 
         # EPS GAAP / Non-GAAP
-        if "earnings per share" in ltxt or "eps" in ltxt:
-            val = _first_money(txt)
+        if "earnings per share" in hits or "eps" in hits:
+            val = _span_money(spans)
             if val is not None:
                 # EPS values in text are already per-share USD (e.g., $1.23), not millions
-                if ("non-gaap" in ltxt or "adjusted" in ltxt or "non gaap" in ltxt) and "eps_nongaap" not in found:
+                if ("non-gaap" in hits or "adjusted" in hits or "non gaap" in hits) and "eps_nongaap" not in found:
                     found["eps_nongaap"] = MetricMatch("eps_nongaap", val, "USD", period, c)
                 elif "eps_gaap" not in found:
                     found["eps_gaap"] = MetricMatch("eps_gaap", val, "USD", period, c)
 
         # CFO
-        if "cash provided by operating activities" in ltxt or "operating cash flow" in ltxt or "cash flow from operations" in ltxt:
-            val = _first_money(txt)
+        if "cash provided by operating activities" in hits or "operating cash flow" in hits or "cash flow from operations" in hits:
+            val = _span_money(spans)
             if val is not None and "cfo" not in found:
                 found["cfo"] = MetricMatch("cfo", val, "USD_millions", period, c)
 
         # CAPEX
-        if "capital expenditures" in ltxt or "capex" in ltxt or "property and equipment" in ltxt:
-            val = _first_money(txt)
+        if "capital expenditures" in hits or "capex" in hits or "property and equipment" in hits:
+            val = _span_money(spans)
             if val is not None and "capex" not in found:
                 found["capex"] = MetricMatch("capex", val, "USD_millions", period, c)
 
         # FCF / FCF margin
-        if "free cash flow" in ltxt or "fcf" in ltxt:
-            mval = _first_money(txt)
+        if "free cash flow" in hits or "fcf" in hits:
+            mval = _span_money(spans)
             if mval is not None and "fcf" not in found:
                 found["fcf"] = MetricMatch("fcf", mval, "USD_millions", period, c)
-            mpct = _first_pct(txt)
+            mpct = _span_pct(spans)
             if mpct is not None and "fcf_margin" not in found:
                 found["fcf_margin"] = MetricMatch("fcf_margin", mpct, "percent", period, c)
 
@@ -149,40 +196,44 @@ def extract_core_metrics(chunks: List[Chunk]) -> Dict[str, Dict]:
     return {name: mm.to_dict() for name, mm in found.items()}
 
 
-def extract_series_for_metrics(chunks: List[Chunk], metrics: List[str]) -> Dict[str, Dict[str, List]]:
-    """Very simple series extractor: scan lines for period+value pairs.
-    Returns mapping metric -> {labels:[], values:[], citations:[Citation]}
+SERIES_KINDS = ("money", "pct", "eps")
+
+
+def metric_kind(m: str) -> str:
+    """Series kind for a metric name: revenue-like metrics are money, margins pct, EPS non-scaled money."""
+    m = m.lower()
+    if "margin" in m:
+        return "pct"
+    if m.startswith("eps"):
+        return "eps"
+    return "money"
+
+
+def extract_series_by_kind(chunks: List[Chunk], kinds: Tuple[str, ...] = SERIES_KINDS) -> Dict[str, Dict[str, List]]:
+    """Scan lines for period+value pairs once per value kind.
+    Series depend only on the kind, so metrics sharing a kind share a series.
+    Returns mapping kind -> {labels:[], values:[], citations:[Citation]} (kinds without values omitted)
     """
-    series_map: Dict[str, Dict[str, List]] = {}
+    out: Dict[str, Dict[str, List]] = {}
 
     text = "\n".join(c.text for c in chunks)
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
 
-    # For now, treat revenue-like metrics as money, margins as pct, EPS as money but non-scaled
-    def metric_kind(m: str) -> str:
-        m = m.lower()
-        if "margin" in m:
-            return "pct"
-        if m.startswith("eps"):
-            return "eps"
-        return "money"
+    # One scanner pass per line serves every requested kind
+    line_spans = [first_spans(ln) for ln in lines]
 
-    for mname in metrics:
+    for kind in kinds:
         labels: List[str] = []
         values: List[float] = []
         cit: Optional[Citation] = None
-        kind = metric_kind(mname)
-        for line in lines:
-            per = _first_period(line)
+        for spans in line_spans:
+            per = _span_period(spans)
             if not per:
                 continue
             if kind == "pct":
-                val = _first_pct(line)
-            elif kind == "eps":
-                mv = _first_money(line)
-                val = mv if mv is not None else None
+                val = _span_pct(spans)
             else:
-                val = _first_money(line)
+                val = _span_money(spans)
             if val is not None:
                 labels.append(per)
                 values.append(val)
@@ -192,62 +243,75 @@ def extract_series_for_metrics(chunks: List[Chunk], metrics: List[str]) -> Dict[
                 if labels[0] in c.text:
                     cit = Citation(section=c.section, page=c.page_start, snippet=c.text[:160])
                     break
-            series_map[mname] = {
+            out[kind] = {
                 "labels": labels[:8],
                 "values": values[:8],
                 "citations": [cit] if cit else [],
             }
-    return series_map
+    return out
+
+
+def series_for_metrics(series_by_kind: Dict[str, Dict[str, List]], metrics: List[str]) -> Dict[str, Dict[str, List]]:
+    """Resolve requested metric names against precomputed per-kind series."""
+    return {m: series_by_kind[metric_kind(m)] for m in metrics if metric_kind(m) in series_by_kind}
+
+
+def extract_series_for_metrics(chunks: List[Chunk], metrics: List[str]) -> Dict[str, Dict[str, List]]:
+    """Very simple series extractor: scan lines for period+value pairs.
+    Returns mapping metric -> {labels:[], values:[], citations:[Citation]}
+    """
+    kinds = tuple(k for k in SERIES_KINDS if any(metric_kind(m) == k for m in metrics))
+    return series_for_metrics(extract_series_by_kind(chunks, kinds), metrics)
 
 
-def extract_guidance(chunks: List[Chunk]) -> Dict:
+def extract_guidance(chunks: List[Chunk], index: Optional[KeywordIndex] = None) -> Dict:
     """Extract simple forward-looking guidance heuristics with citations."""
     out: List[Dict] = []
-    for c in chunks:
+    index = index or build_trigger_index(chunks)
+    for i in index.candidates(GUIDANCE_TRIGGERS):
+        c = chunks[i]
         txt = c.text
-        ltxt = txt.lower()
-        if any(k in ltxt for k in ["guidance", "outlook", "expects", "forecast"]):
-            # Try to capture any range like $X to $Y or A% to B%
-            m_money = re.search(r"\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?\s*(?:to|-)\s*\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", txt, re.I)
-            m_pct = re.search(r"([0-9]{1,2}(?:\.[0-9]+)?)\s*%\s*(?:to|-)\s*([0-9]{1,2}(?:\.[0-9]+)?)\s*%", txt, re.I)
-            per = _first_period(txt)
-            if m_money:
-                lo = _to_millions(m_money.group(1), m_money.group(2))
-                hi = _to_millions(m_money.group(3), m_money.group(4))
-                out.append({
-                    "type": "revenue",
-                    "range": [lo, hi],
-                    "unit": "USD_millions",
-                    "period": per,
-                    "citations": [Citation(section=c.section, page=c.page_start, snippet=txt[:160])],
-                })
-            if m_pct:
-                lo = float(m_pct.group(1))
-                hi = float(m_pct.group(2))
-                out.append({
-                    "type": "margin",
-                    "range": [lo, hi],
-                    "unit": "percent",
-                    "period": per,
-                    "citations": [Citation(section=c.section, page=c.page_start, snippet=txt[:160])],
-                })
+        # Try to capture any range like $X to $Y or A% to B%
+        m_money = re.search(r"\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?\s*(?:to|-)\s*\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", txt, re.I)
+        m_pct = re.search(r"([0-9]{1,2}(?:\.[0-9]+)?)\s*%\s*(?:to|-)\s*([0-9]{1,2}(?:\.[0-9]+)?)\s*%", txt, re.I)
+        per = _first_period(txt)
+        if m_money:
+            lo = _to_millions(m_money.group(1), m_money.group(2))
+            hi = _to_millions(m_money.group(3), m_money.group(4))
+            out.append({
+                "type": "revenue",
+                "range": [lo, hi],
+                "unit": "USD_millions",
+                "period": per,
+                "citations": [Citation(section=c.section, page=c.page_start, snippet=txt[:160])],
+            })
+        if m_pct:
+            lo = float(m_pct.group(1))
+            hi = float(m_pct.group(2))
+            out.append({
+                "type": "margin",
+                "range": [lo, hi],
+                "unit": "percent",
+                "period": per,
+                "citations": [Citation(section=c.section, page=c.page_start, snippet=txt[:160])],
+            })
     return {"guidance": out}
 
 
-def extract_buybacks(chunks: List[Chunk]) -> Dict:
+def extract_buybacks(chunks: List[Chunk], index: Optional[KeywordIndex] = None) -> Dict:
     out: Dict = {"buybacks": []}
-    for c in chunks:
-        ltxt = c.text.lower()
-        if "repurchase" in ltxt or "buyback" in ltxt or "share repurchase" in ltxt:
-            m_auth = re.search(r"authorize(?:d|s|tion).*?\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", c.text, re.I)
-            m_exec = re.search(r"repurchase(?:d)?.*?\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", c.text, re.I)
-            per = _first_period(c.text)
-            item: Dict = {"period": per, "citations": [Citation(section=c.section, page=c.page_start, snippet=c.text[:160])]} 
-            if m_auth:
-                item["authorization_amount"] = _to_millions(m_auth.group(1), m_auth.group(2))
-                item["unit"] = "USD_millions"
-            if m_exec:
-                item["repurchased_amount"] = _to_millions(m_exec.group(1), m_exec.group(2))
-                item["unit"] = "USD_millions"
-            out["buybacks"].append(item)
+    index = index or build_trigger_index(chunks)
+    for i in index.candidates(BUYBACK_TRIGGERS):
+        c = chunks[i]
+        m_auth = re.search(r"authorize(?:d|s|tion).*?\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", c.text, re.I)
+        m_exec = re.search(r"repurchase(?:d)?.*?\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", c.text, re.I)
+        per = _first_period(c.text)
+        item: Dict = {"period": per, "citations": [Citation(section=c.section, page=c.page_start, snippet=c.text[:160])]} 
+        if m_auth:
+            item["authorization_amount"] = _to_millions(m_auth.group(1), m_auth.group(2))
+            item["unit"] = "USD_millions"
+        if m_exec:
+            item["repurchased_amount"] = _to_millions(m_exec.group(1), m_exec.group(2))
+            item["unit"] = "USD_millions"
+        out["buybacks"].append(item)
     return out
@@ -21,6 +21,8 @@ def make_aggregator() -> Dict[str, Any]:
     return {
         "provider": {},   # provider -> { req, status: {code: n}, latency_ms: [ms], endpoints: {path: {...}} }
         "llm": {},        # provider/model -> { calls, tokens_in, tokens_out, cost_usd, latency_ms: [ms], errors }
+        "pool": {},       # http client -> { requests, new_connections, peak_active, max_connections }
+        "cache": {},      # cache name -> { hits, misses, stale, conditional, revalidated, bytes_saved, bytes_downloaded }
     }
 
 
@@ -49,7 +51,7 @@ def _summarize_latencies(values: List[int]) -> Dict[str, Optional[int]]:
 
 def end_run() -> Dict[str, Any]:
     agg = metrics_ctx.get() or {}
-    out: Dict[str, Any] = {"provider": {}, "llm": {}}
+    out: Dict[str, Any] = {"provider": {}, "llm": {}, "pool": {}, "cache": {}}
     prov: Dict[str, Any] = agg.get("provider") or {}
     for name, v in prov.items():
         if not isinstance(v, dict):
@@ -62,6 +64,7 @@ def end_run() -> Dict[str, Any]:
             "req": int(v.get("req", 0)),
             "status": v.get("status", {}),
             "latency": _summarize_latencies(v.get("latency_ms", []) or []),
+            "queued": _summarize_latencies(v.get("queued_ms", []) or []),
         }
         eps = {}
         for ep, ev in (v.get("endpoints") or {}).items():
@@ -84,10 +87,33 @@ def end_run() -> Dict[str, Any]:
             "errors": int(v.get("errors", 0)),
             "latency": _summarize_latencies(v.get("latency_ms", []) or []),
         }
+
+    pool: Dict[str, Any] = agg.get("pool") or {}
+    for name, v in pool.items():
+        reqs = int(v.get("requests", 0))
+        conns = int(v.get("new_connections", 0))
+        out["pool"][name] = {
+            "requests": reqs,
+            "new_connections": conns,
+            "reuse_ratio": round(1.0 - conns / reqs, 3) if reqs else None,
+            "peak_active": int(v.get("peak_active", 0)),
+            "max_connections": v.get("max_connections"),
+        }
+
+    cache: Dict[str, Any] = agg.get("cache") or {}
+    for name, v in cache.items():
+        lookups = int(v.get("hits", 0)) + int(v.get("misses", 0)) + int(v.get("stale", 0))
+        cond = int(v.get("conditional", 0))
+        out["cache"][name] = {
+            **v,
+            "hit_rate": round(int(v.get("hits", 0)) / lookups, 3) if lookups else None,
+            "not_modified_rate": round(int(v.get("revalidated", 0)) / cond, 3) if cond else None,
+        }
     return out
 
 
-def record_http(provider: str, endpoint: str, status: int, latency_ms: int) -> None:
+def record_http(provider: str, endpoint: str, status: int, latency_ms: int, queued_ms: int = 0) -> None:
+    # latency_ms includes queued_ms (time spent waiting for a rate-limit token)
     agg = metrics_ctx.get()
     if agg is None:
         return
@@ -96,6 +122,7 @@ def record_http(provider: str, endpoint: str, status: int, latency_ms: int) -> N
     code_key = str(int(status))
     prov["status"][code_key] = int(prov["status"].get(code_key, 0)) + 1
     prov["latency_ms"].append(int(latency_ms))
+    prov.setdefault("queued_ms", []).append(int(queued_ms))
     ep = prov["endpoints"].setdefault(endpoint, {"req": 0, "status": {}, "latency_ms": []})
     ep["req"] += 1
     ep["status"][code_key] = int(ep["status"].get(code_key, 0)) + 1
@@ -124,3 +151,25 @@ def record_llm(provider: str, model: str, *, tokens_in: int = 0, tokens_out: int
         llm["latency_ms"].append(int(latency_ms))
     if not ok:
         llm["errors"] += 1
+
+
+def record_pool(client: str, *, requests: int = 0, connects: int = 0, active: int = 0, max_connections: Optional[int] = None) -> None:
+    agg = metrics_ctx.get()
+    if agg is None:
+        return
+    p = agg.setdefault("pool", {}).setdefault(client, {"requests": 0, "new_connections": 0, "peak_active": 0, "max_connections": None})
+    p["requests"] += int(requests)
+    p["new_connections"] += int(connects)
+    # `active` is sampled before the request is sent, so count the request itself
+    if requests:
+        p["peak_active"] = max(int(p["peak_active"]), int(active) + 1)
+    if max_connections is not None:
+        p["max_connections"] = int(max_connections)
+
+
+def record_cache(cache: str, event: str, n: int = 1) -> None:
+    agg = metrics_ctx.get()
+    if agg is None:
+        return
+    c = agg.setdefault("cache", {}).setdefault(cache, {})
+    c[event] = int(c.get(event, 0)) + int(n)
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from typing import List, Dict, Any
-import httpx
 
+from app.services.http_clients import get_client, queued_ms
 from app.services.metrics import now, elapsed_ms, record_http
 
 ALPHAVANTAGE_BASE = "https://www.alphavantage.co/query"
@@ -17,32 +17,32 @@ async def fetch_quarterly_earnings(ticker: str, api_key: str, limit: int = 4) ->
     if not api_key or not ticker:
         return []
     params = {"function": "EARNINGS", "symbol": ticker.upper(), "apikey": api_key}
-    async with httpx.AsyncClient(timeout=12.0, follow_redirects=True) as client:
-        t0 = now()
+    client = get_client("alpha_vantage")
+    t0 = now()
+    try:
+        resp = await client.get(ALPHAVANTAGE_BASE, params=params, timeout=12.0)
+        record_http("alpha_vantage", "/query/EARNINGS", resp.status_code, elapsed_ms(t0), queued_ms=queued_ms(resp))
+        if resp.status_code >= 400:
+            return []
+        data = resp.json() or {}
+    except Exception:
+        record_http("alpha_vantage", "/query/EARNINGS", 0, elapsed_ms(t0))
+        return []
+    q = data.get("quarterlyEarnings") or []
+    out: List[Dict[str, Any]] = []
+    for it in q[: max(1, min(int(limit), len(q)) )]:
         try:
-            resp = await client.get(ALPHAVANTAGE_BASE, params=params)
-            record_http("alpha_vantage", "/query/EARNINGS", resp.status_code, elapsed_ms(t0))
-            if resp.status_code >= 400:
-                return []
-            data = resp.json() or {}
+            out.append({
+                "period": (it.get("fiscalDateEnding") or ""),
+                "reported_eps": _to_float(it.get("reportedEPS")),
+                "estimated_eps": _to_float(it.get("estimatedEPS")),
+                "surprise": _to_float(it.get("surprise")),
+                "surprise_pct": _to_float(it.get("surprisePercentage")),
+                "provider": "alpha_vantage",
+            })
         except Exception:
-            record_http("alpha_vantage", "/query/EARNINGS", 0, elapsed_ms(t0))
-            return []
-        q = data.get("quarterlyEarnings") or []
-        out: List[Dict[str, Any]] = []
-        for it in q[: max(1, min(int(limit), len(q)) )]:
-            try:
-                out.append({
-                    "period": (it.get("fiscalDateEnding") or ""),
-                    "reported_eps": _to_float(it.get("reportedEPS")),
-                    "estimated_eps": _to_float(it.get("estimatedEPS")),
-                    "surprise": _to_float(it.get("surprise")),
-                    "surprise_pct": _to_float(it.get("surprisePercentage")),
-                    "provider": "alpha_vantage",
-                })
-            except Exception:
-                continue
-        return out
+            continue
+    return out
 
 
 def _to_float(v: Any) -> float | None:
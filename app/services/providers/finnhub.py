@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date
 from typing import List, Dict, Any
-import httpx
+from app.services.http_clients import get_client, queued_ms
 from app.services.metrics import now, elapsed_ms, record_http
 
 FINNHUB_BASE = "https://finnhub.io/api/v1"
@@ -34,35 +34,71 @@ async def fetch_earnings_calendar(start: date, end: date, api_key: str) -> List[
     params = {"from": _iso(start), "to": _iso(end), "token": api_key}
     url = f"{FINNHUB_BASE}/calendar/earnings"
     headers = {"Accept": "application/json"}
-    async with httpx.AsyncClient(timeout=12.0, headers=headers, follow_redirects=True) as client:
-        t0 = now()
-        try:
-            resp = await client.get(url, params=params)
-            record_http("finnhub", "/calendar/earnings", resp.status_code, elapsed_ms(t0))
-            if resp.status_code >= 400:
-                return []
-            data = resp.json() or {}
-        except Exception:
-            record_http("finnhub", "/calendar/earnings", 0, elapsed_ms(t0))
+    client = get_client("finnhub")
+    t0 = now()
+    try:
+        resp = await client.get(url, params=params, headers=headers, timeout=12.0)
+        record_http("finnhub", "/calendar/earnings", resp.status_code, elapsed_ms(t0), queued_ms=queued_ms(resp))
+        if resp.status_code >= 400:
             return []
-        cal = data.get("earningsCalendar") or []
-        out: List[Dict[str, Any]] = []
-        for it in cal:
-            sym = (it.get("symbol") or "").upper()
-            dt = (it.get("date") or "").split("T")[0]
-            tod = _norm_time_of_day(it.get("hour"))
-            comp = it.get("company") or None
-            if not sym or not dt:
-                continue
-            out.append({
-                "ticker": sym,
-                "company": comp,
-                "event_date": dt,
-                "time_of_day": tod,
-                "status": "upcoming",
-                "source": "finnhub",
-            })
-        return out
+        data = resp.json() or {}
+    except Exception:
+        record_http("finnhub", "/calendar/earnings", 0, elapsed_ms(t0))
+        return []
+    cal = data.get("earningsCalendar") or []
+    out: List[Dict[str, Any]] = []
+    for it in cal:
+        sym = (it.get("symbol") or "").upper()
+        dt = (it.get("date") or "").split("T")[0]
+        tod = _norm_time_of_day(it.get("hour"))
+        comp = it.get("company") or None
+        if not sym or not dt:
+            continue
+        out.append({
+            "ticker": sym,
+            "company": comp,
+            "event_date": dt,
+            "time_of_day": tod,
+            "status": "upcoming",
+            "source": "finnhub",
+        })
+    return out
+
+
+async def fetch_quote(symbol: str, api_key: str) -> Dict[str, Any] | None:
+    """Fetch a real-time quote from Finnhub (one symbol per request).
+    Normalized fields: { ticker, price, change, change_percent, direction, source }; None on failure.
+    Docs: https://finnhub.io/docs/api/quote
+    """
+    if not api_key or not symbol:
+        return None
+    client = get_client("finnhub")
+    t0 = now()
+    try:
+        resp = await client.get(f"{FINNHUB_BASE}/quote", params={"symbol": symbol, "token": api_key}, timeout=8.0)
+        record_http("finnhub", "/quote", resp.status_code, elapsed_ms(t0), queued_ms=queued_ms(resp))
+        if resp.status_code >= 400:
+            return None
+        q = resp.json() or {}
+    except Exception:
+        record_http("finnhub", "/quote", 0, elapsed_ms(t0))
+        return None
+    c = _to_float(q.get("c"))  # current
+    pc = _to_float(q.get("pc"))  # prev close
+    dp = _to_float(q.get("dp"))
+    if dp is None and c is not None and pc:
+        dp = (c - pc) / pc * 100.0
+    direction = "flat"
+    if dp is not None:
+        direction = "up" if dp >= 0 else "down"
+    return {
+        "ticker": symbol,
+        "price": c,
+        "change": _to_float(q.get("d")),
+        "change_percent": dp,
+        "direction": direction,
+        "source": "finnhub",
+    }
 
 
 def _to_float(v: Any) -> float | None:
@@ -89,29 +125,29 @@ async def fetch_eps_surprises(ticker: str, api_key: str, limit: int = 4) -> List
         return []
     params = {"symbol": ticker.upper(), "token": api_key}
     url = f"{FINNHUB_BASE}/stock/earnings"
-    async with httpx.AsyncClient(timeout=12.0, follow_redirects=True) as client:
-        t0 = now()
+    client = get_client("finnhub")
+    t0 = now()
+    try:
+        resp = await client.get(url, params=params, timeout=12.0)
+        record_http("finnhub", "/stock/earnings", resp.status_code, elapsed_ms(t0), queued_ms=queued_ms(resp))
+        if resp.status_code >= 400:
+            return []
+        data = resp.json() or []
+    except Exception:
+        record_http("finnhub", "/stock/earnings", 0, elapsed_ms(t0))
+        return []
+    out: List[Dict[str, Any]] = []
+    # API returns most-recent first typically; enforce limit
+    for it in data[: max(1, min(int(limit), len(data)) )]:
         try:
-            resp = await client.get(url, params=params)
-            record_http("finnhub", "/stock/earnings", resp.status_code, elapsed_ms(t0))
-            if resp.status_code >= 400:
-                return []
-            data = resp.json() or []
+            out.append({
+                "period": (it.get("period") or it.get("date") or ""),
+                "reported_eps": _to_float(it.get("actual")),
+                "estimated_eps": _to_float(it.get("estimate")),
+                "surprise": _to_float(it.get("surprise")),
+                "surprise_pct": _to_float(it.get("surprisePercent")),
+                "provider": "finnhub",
+            })
         except Exception:
-            record_http("finnhub", "/stock/earnings", 0, elapsed_ms(t0))
-            return []
-        out: List[Dict[str, Any]] = []
-        # API returns most-recent first typically; enforce limit
-        for it in data[: max(1, min(int(limit), len(data)) )]:
-            try:
-                out.append({
-                    "period": (it.get("period") or it.get("date") or ""),
-                    "reported_eps": _to_float(it.get("actual")),
-                    "estimated_eps": _to_float(it.get("estimate")),
-                    "surprise": _to_float(it.get("surprise")),
-                    "surprise_pct": _to_float(it.get("surprisePercent")),
-                    "provider": "finnhub",
-                })
-            except Exception:
-                continue
-        return out
+            continue
+    return out
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date
 from typing import List, Dict, Any
-import httpx
+from app.services.http_clients import get_client, queued_ms
 from app.services.metrics import now, elapsed_ms, record_http
 
 FMP_BASE = "https://financialmodelingprep.com/api/v3"
@@ -33,32 +33,32 @@ async def fetch_earnings_calendar(start: date, end: date, api_key: str) -> List[
         return []
     params = {"from": _iso(start), "to": _iso(end), "apikey": api_key}
     url = f"{FMP_BASE}/earning_calendar"
-    async with httpx.AsyncClient(timeout=12.0, follow_redirects=True) as client:
-        t0 = now()
-        try:
-            resp = await client.get(url, params=params)
-            record_http("fmp", "/earning_calendar", resp.status_code, elapsed_ms(t0))
-            if resp.status_code >= 400:
-                return []
-            data = resp.json() or []
-        except Exception:
-            record_http("fmp", "/earning_calendar", 0, elapsed_ms(t0))
+    client = get_client("fmp")
+    t0 = now()
+    try:
+        resp = await client.get(url, params=params, timeout=12.0)
+        record_http("fmp", "/earning_calendar", resp.status_code, elapsed_ms(t0), queued_ms=queued_ms(resp))
+        if resp.status_code >= 400:
             return []
-        out: List[Dict[str, Any]] = []
-        for it in data:
-            # FMP fields: symbol, date, time, company?
-            sym = (it.get("symbol") or it.get("ticker") or "").upper()
-            dt = (it.get("date") or it.get("dateTime") or "").split("T")[0]
-            tod = _norm_time_of_day(it.get("time"))
-            comp = it.get("company") or it.get("companyName") or None
-            if not sym or not dt:
-                continue
-            out.append({
-                "ticker": sym,
-                "company": comp,
-                "event_date": dt,
-                "time_of_day": tod,
-                "status": "upcoming",
-                "source": "fmp",
-            })
-        return out
+        data = resp.json() or []
+    except Exception:
+        record_http("fmp", "/earning_calendar", 0, elapsed_ms(t0))
+        return []
+    out: List[Dict[str, Any]] = []
+    for it in data:
+        # FMP fields: symbol, date, time, company?
+        sym = (it.get("symbol") or it.get("ticker") or "").upper()
+        dt = (it.get("date") or it.get("dateTime") or "").split("T")[0]
+        tod = _norm_time_of_day(it.get("time"))
+        comp = it.get("company") or it.get("companyName") or None
+        if not sym or not dt:
+            continue
+        out.append({
+            "ticker": sym,
+            "company": comp,
+            "event_date": dt,
+            "time_of_day": tod,
+            "status": "upcoming",
+            "source": "fmp",
+        })
+    return out
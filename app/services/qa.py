@@ -2,6 +2,10 @@ import os
 from typing import List, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 from app.models.types import Chunk, AnswerBullet, Citation
+from app.services.context_builder import build_context, estimate_tokens
+from app.services.metrics import now, elapsed_ms, record_llm
+
+QA_MODEL = "gpt-4o-mini"
 
 SYSTEM_PROMPT = (
     "You are an earnings research assistant. Answer in <=5 concise bullets. "
@@ -10,13 +14,10 @@ SYSTEM_PROMPT = (
 )
 
 
-def _contexts_to_prompt(chunks: List[Chunk]) -> str:
-    parts = []
-    for i, c in enumerate(chunks, 1):
-        label = f"[ctx{i} | p.{c.page_start}-{c.page_end} | {c.section or 'N/A'}]"
-        snippet = c.text[:1200]
-        parts.append(f"{label}\n{snippet}")
-    return "\n\n".join(parts)
+def _contexts_to_prompt(chunks: List[Chunk], question: str = "") -> str:
+    # Deduplicated, merged and ranked context trimmed to QA_CONTEXT_TOKEN_BUDGET
+    context, _ = build_context(question, chunks)
+    return context
 
 
 def _fallback_answer(chunks: List[Chunk]) -> List[AnswerBullet]:
@@ -50,13 +51,24 @@ def _client():
 @retry(reraise=True, stop=stop_after_attempt(2), wait=wait_exponential(multiplier=0.5, min=0.5, max=2))
 def _chat(question: str, chunks: List[Chunk]) -> str:
     client = _client()
-    context = _contexts_to_prompt(chunks)
+    context = _contexts_to_prompt(chunks, question)
     msgs = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
     ]
-    resp = client.chat.completions.create(model="gpt-4o-mini", messages=msgs, temperature=0.2)
-    return resp.choices[0].message.content or ""
+    t0 = now()
+    try:
+        resp = client.chat.completions.create(model=QA_MODEL, messages=msgs, temperature=0.2)
+    except Exception:
+        est_in = sum(estimate_tokens(m["content"]) for m in msgs)
+        record_llm("openai", QA_MODEL, tokens_in=est_in, latency_ms=elapsed_ms(t0), ok=False)
+        raise
+    content = resp.choices[0].message.content or ""
+    usage = getattr(resp, "usage", None)
+    tokens_in = getattr(usage, "prompt_tokens", None) or sum(estimate_tokens(m["content"]) for m in msgs)
+    tokens_out = getattr(usage, "completion_tokens", None) or estimate_tokens(content)
+    record_llm("openai", QA_MODEL, tokens_in=tokens_in, tokens_out=tokens_out, latency_ms=elapsed_ms(t0), ok=True)
+    return content
 
 
 def answer_question(question: str, chunks: List[Chunk]) -> List[AnswerBullet]:
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.services.quotes import get_quotes, movers_universe
+
+# Live quote hub: one upstream subscription per process, fanned out to clients.
+# The symbol set is the movers universe (today's earnings events + watchlist),
+# reloaded every QUOTE_HUB_SYMBOLS_REFRESH_SECONDS and capped at
+# QUOTE_HUB_MAX_SYMBOLS (Finnhub's websocket limit on the free tier).
+# - Upstream: Finnhub's trade websocket (subscribe/unsubscribe as the set
+#   changes, reconnect with backoff). Without an API key or the `websockets`
+#   package it polls the cached quote service instead.
+# - New symbols are seeded from a REST quote, which also gives the previous
+#   close that trade prices are compared against.
+# - Every symbol keeps a ring buffer of its last QUOTE_HUB_RING_SIZE ticks.
+# - Clients don't get a queue each: they wait on a shared "changed" event, then
+#   diff the latest quotes against what they last sent, so a slow client skips
+#   intermediate ticks and only ever receives quotes whose value changed.
+# The upstream runs while at least one client is attached (plus a grace period).
+
+QUOTE_HUB_RING_SIZE = int(os.getenv("QUOTE_HUB_RING_SIZE", "256") or "256")
+QUOTE_HUB_MAX_SYMBOLS = int(os.getenv("QUOTE_HUB_MAX_SYMBOLS", "50") or "50")
+QUOTE_HUB_SYMBOLS_REFRESH_SECONDS = float(os.getenv("QUOTE_HUB_SYMBOLS_REFRESH_SECONDS", "300") or "300")
+QUOTE_HUB_POLL_SECONDS = float(os.getenv("QUOTE_HUB_POLL_SECONDS", "5") or "5")
+QUOTE_HUB_KEEPALIVE_SECONDS = float(os.getenv("QUOTE_HUB_KEEPALIVE_SECONDS", "15") or "15")
+QUOTE_HUB_IDLE_SECONDS = float(os.getenv("QUOTE_HUB_IDLE_SECONDS", "30") or "30")
+FINNHUB_WS_URL = os.getenv("FINNHUB_WS_URL", "wss://ws.finnhub.io") or "wss://ws.finnhub.io"
+WEBSOCKETS_AVAILABLE = importlib.util.find_spec("websockets") is not None
+
+logger = logging.getLogger(__name__)
+
+
+class Tick(NamedTuple):
+    ts: float  # epoch seconds
+    price: float
+    volume: Optional[float] = None
+
+
+SymbolsLoader = Callable[[], List[str]]
+
+
+def _default_symbols() -> List[str]:
+    return list(movers_universe())
+
+
+class QuoteHub:
+    def __init__(self, symbols_loader: Optional[SymbolsLoader] = None, api_key: Optional[str] = None) -> None:
+        self.symbols_loader = symbols_loader or _default_symbols
+        self.api_key = api_key
+        self.symbols: Set[str] = set()
+        self.quotes: Dict[str, Dict[str, Any]] = {}  # symbol -> latest quote (MoverOut fields + ts)
+        self.ticks: Dict[str, Deque[Tick]] = {}
+        self._prev_close: Dict[str, float] = {}
+        self._changed = asyncio.Event()
+        self._symbols_changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._idle: Optional[asyncio.TimerHandle] = None
+        self.clients = 0
+        self.upstream_messages = 0
+
+    # ---- state ----
+    def _notify(self) -> None:
+        # Wake every waiting client; later waiters get a fresh event
+        ev, self._changed = self._changed, asyncio.Event()
+        ev.set()
+
+    def seed(self, quote: Dict[str, Any]) -> None:
+        """Initial / polled REST quote for a symbol (sets the previous close)."""
+        sym = quote["ticker"]
+        price, change = quote.get("price"), quote.get("change")
+        if isinstance(price, (int, float)) and isinstance(change, (int, float)):
+            self._prev_close[sym] = float(price) - float(change)
+        if isinstance(price, (int, float)):
+            self.apply_tick(sym, float(price), time.time())
+
+    def _ring(self, sym: str) -> Deque[Tick]:
+        ring = self.ticks.get(sym)
+        if ring is None:
+            ring = self.ticks[sym] = deque(maxlen=max(1, QUOTE_HUB_RING_SIZE))
+        return ring
+
+    def apply_tick(self, sym: str, price: float, ts: float, volume: Optional[float] = None) -> None:
+        self._ring(sym).append(Tick(ts, price, volume))
+        pc = self._prev_close.get(sym)
+        change = change_pct = None
+        if pc:
+            change = round(price - pc, 4)
+            change_pct = round(change / pc * 100.0, 4)
+        self.quotes[sym] = {
+            "ticker": sym,
+            "price": price,
+            "change": change,
+            "change_percent": change_pct,
+            "direction": "flat" if change_pct is None else ("up" if change_pct >= 0 else "down"),
+            "source": "finnhub",
+            "ts": ts,
+        }
+        self._notify()
+
+    def recent_ticks(self, sym: str, limit: Optional[int] = None) -> List[Tick]:
+        ring = self.ticks.get(sym) or ()
+        items = list(ring)
+        return items[-limit:] if limit else items
+
+    def _on_message(self, raw: Any) -> None:
+        # Finnhub: {"type": "trade", "data": [{"s": "AAPL", "p": 227.1, "t": 1729000000000, "v": 100}, ...]}
+        self.upstream_messages += 1
+        try:
+            msg = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        if msg.get("type") != "trade":
+            return
+        last: Dict[str, Tuple[float, float, Optional[float]]] = {}
+        for tr in msg.get("data") or []:
+            sym, price = tr.get("s"), tr.get("p")
+            if sym in self.symbols and isinstance(price, (int, float)):
+                ts = float(tr.get("t") or time.time() * 1000) / 1000.0
+                if sym in last:
+                    self._ring(sym).append(Tick(*last[sym]))
+                last[sym] = (ts, float(price), tr.get("v"))
+        # A message can carry many trades per symbol: buffer them all, publish the last
+        for sym, (ts, price, vol) in last.items():
+            self.apply_tick(sym, price, ts, vol)
+
+    # ---- symbol set ----
+    async def refresh_symbols(self) -> None:
+        try:
+            loaded = await asyncio.to_thread(self.symbols_loader)
+        except Exception as e:
+            logger.warning("quote hub: symbol load failed: %s", e)
+            return
+        wanted = set(list(dict.fromkeys(s.upper() for s in loaded if s))[: max(1, QUOTE_HUB_MAX_SYMBOLS)])
+        added = wanted - self.symbols
+        self.symbols = wanted
+        for sym in [s for s in self.quotes if s not in wanted]:
+            self.quotes.pop(sym, None)
+            self.ticks.pop(sym, None)
+            self._prev_close.pop(sym, None)
+        if added and self.api_key:
+            quotes = await get_quotes(sorted(added), self.api_key)
+            for q in quotes.values():
+                if q is not None:
+                    self.seed(q)
+        self._symbols_changed.set()
+
+    # ---- upstream ----
+    async def _run(self) -> None:
+        refresher = asyncio.create_task(self._refresh_loop())
+        try:
+            if self.api_key and WEBSOCKETS_AVAILABLE:
+                await self._stream()
+            else:
+                await self._poll()
+        finally:
+            refresher.cancel()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh_symbols()
+            await asyncio.sleep(QUOTE_HUB_SYMBOLS_REFRESH_SECONDS)
+
+    async def _stream(self) -> None:
+        import websockets  # optional dependency (ships with uvicorn[standard])
+
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(f"{FINNHUB_WS_URL}?token={self.api_key}") as ws:
+                    backoff = 1.0
+                    subscribed: Set[str] = set()
+                    while True:
+                        if self._symbols_changed.is_set() or subscribed != self.symbols:
+                            self._symbols_changed.clear()
+                            for sym in sorted(self.symbols - subscribed):
+                                await ws.send(json.dumps({"type": "subscribe", "symbol": sym}))
+                            for sym in sorted(subscribed - self.symbols):
+                                await ws.send(json.dumps({"type": "unsubscribe", "symbol": sym}))
+                            subscribed = set(self.symbols)
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        self._on_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("quote hub: upstream disconnected (%s); reconnecting in %.0fs", e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(60.0, backoff * 2)
+
+    async def _poll(self) -> None:
+        while True:
+            if self.api_key and self.symbols:
+                quotes = await get_quotes(sorted(self.symbols), self.api_key)
+                for q in quotes.values():
+                    if q is not None:
+                        self.seed(q)
+            await asyncio.sleep(QUOTE_HUB_POLL_SECONDS)
+
+    def _attach(self) -> None:
+        self.clients += 1
+        if self._idle is not None:
+            self._idle.cancel()
+            self._idle = None
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _detach(self) -> None:
+        self.clients -= 1
+        if self.clients <= 0 and self._task is not None:
+            self._idle = asyncio.get_running_loop().call_later(QUOTE_HUB_IDLE_SECONDS, self._stop_if_idle)
+
+    def _stop_if_idle(self) -> None:
+        self._idle = None
+        if self.clients <= 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    # ---- clients ----
+    async def updates(self, symbols: Optional[Set[str]] = None, keepalive: Optional[float] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield lists of quotes that changed since this client's last batch (the first batch is a
+        full snapshot); yields [] after `keepalive` seconds without changes.
+        """
+        keepalive = QUOTE_HUB_KEEPALIVE_SECONDS if keepalive is None else keepalive
+        sent: Dict[str, Tuple[Any, Any]] = {}
+        self._attach()
+        try:
+            while True:
+                waiter = self._changed
+                wanted = symbols if symbols else self.symbols
+                changed = []
+                for sym in wanted:
+                    q = self.quotes.get(sym)
+                    if q is None:
+                        continue
+                    val = (q["price"], q["change_percent"])
+                    if sent.get(sym) != val:
+                        sent[sym] = val
+                        changed.append(q)
+                if changed:
+                    yield changed
+                    continue
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield []
+        finally:
+            self._detach()
+
+
+_hub: Optional[QuoteHub] = None
+
+
+def get_hub() -> QuoteHub:
+    global _hub
+    if _hub is None:
+        _hub = QuoteHub(api_key=(os.getenv("FINNHUB_API_KEY") or "").strip() or None)
+    return _hub
+
+
+async def stop_hub() -> None:
+    if _hub is not None:
+        await _hub.stop()
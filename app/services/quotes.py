@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, literal, select, union_all
+
+from app.db.base import db_session
+from app.db.models import EarningsEvent, Watchlist
+from app.db.persistence import is_db_enabled
+from app.services.metrics import record_cache
+from app.services.providers.finnhub import fetch_quote
+from app.services.rate_limit import get_limiter
+
+# Quote service for movers views (market_movers, chat "pre-market movers", dashboard).
+# - Quotes are cached for QUOTE_TTL_SECONDS; failed fetches are not cached.
+# - Concurrent callers asking for the same symbol share one upstream request
+#   (coalescing through per-symbol futures).
+# - Misses are fetched in waves sized to the Finnhub limiter's headroom (tokens
+#   left, capped by the upstream's X-Ratelimit-Remaining), between
+#   QUOTE_MIN_BATCH and QUOTE_MAX_BATCH, so a large scan doesn't queue a burst
+#   ahead of interactive calls.
+
+QUOTE_TTL_SECONDS = float(os.getenv("QUOTE_TTL_SECONDS", "5") or "5")
+QUOTE_MIN_BATCH = int(os.getenv("QUOTE_MIN_BATCH", "2") or "2")
+QUOTE_MAX_BATCH = int(os.getenv("QUOTE_MAX_BATCH", "16") or "16")
+
+logger = logging.getLogger(__name__)
+
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_inflight: Dict[str, asyncio.Future] = {}
+_tasks: set = set()  # strong refs to running fetches
+
+
+def batch_size() -> int:
+    lim = get_limiter("finnhub")
+    room = lim.headroom() if lim is not None else QUOTE_MAX_BATCH
+    return max(max(1, QUOTE_MIN_BATCH), min(QUOTE_MAX_BATCH, room))
+
+
+async def _fetch_waves(symbols: List[str], api_key: str) -> None:
+    pending = list(symbols)
+    wave: List[str] = []
+    try:
+        while pending:
+            n = batch_size()
+            wave, pending = pending[:n], pending[n:]
+            quotes = await asyncio.gather(*[fetch_quote(s, api_key) for s in wave], return_exceptions=True)
+            stamp = time.monotonic()
+            for sym, q in zip(wave, quotes):
+                if isinstance(q, BaseException):
+                    q = None
+                if q is not None:
+                    _cache[sym] = (stamp, q)
+                fut = _inflight.pop(sym, None)
+                if fut is not None and not fut.done():
+                    fut.set_result(q)
+    finally:
+        # Cancelled or failed mid-way: release anyone still waiting
+        for sym in wave + pending:
+            fut = _inflight.pop(sym, None)
+            if fut is not None and not fut.done():
+                fut.set_result(None)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("quotes: fetch failed: %s", task.exception())
+
+
+async def get_quotes(symbols: List[str], api_key: str) -> Dict[str, Optional[Dict[str, Any]]]:
+    """symbol -> normalized quote (None when the upstream had nothing), via cache and coalescing."""
+    now_ts = time.monotonic()
+    out: Dict[str, Optional[Dict[str, Any]]] = {}
+    waits: Dict[str, asyncio.Future] = {}
+    to_fetch: List[str] = []
+    loop = asyncio.get_running_loop()
+    for sym in dict.fromkeys(symbols):
+        hit = _cache.get(sym)
+        if hit is not None and now_ts - hit[0] < QUOTE_TTL_SECONDS:
+            out[sym] = hit[1]
+            continue
+        fut = _inflight.get(sym)
+        if fut is not None and not fut.done() and fut.get_loop() is loop:
+            waits[sym] = fut
+            continue
+        fut = loop.create_future()
+        _inflight[sym] = fut
+        waits[sym] = fut
+        to_fetch.append(sym)
+    record_cache("quotes", "hit", len(out))
+    record_cache("quotes", "joined", len(waits) - len(to_fetch))
+    record_cache("quotes", "miss", len(to_fetch))
+    if to_fetch:
+        # Own task: a caller that goes away doesn't cancel the fetch others are waiting on
+        task = asyncio.create_task(_fetch_waves(to_fetch, api_key))
+        _tasks.add(task)
+        task.add_done_callback(_log_failure)
+    for sym, fut in waits.items():
+        out[sym] = await asyncio.shield(fut)
+    return {s: out.get(s) for s in dict.fromkeys(symbols)}
+
+
+def movers_universe(tickers: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    """ticker -> company for the movers scan, from one query: today's earnings events
+    UNION ALL watchlist (or just today's events among the given tickers, for company names).
+    """
+    if not is_db_enabled():
+        return {t: None for t in tickers or []}
+    today = date.today()
+    ev = select(EarningsEvent.ticker, EarningsEvent.company).where(EarningsEvent.event_date == today)
+    if tickers:
+        stmt = ev.where(EarningsEvent.ticker.in_(tickers))
+    else:
+        stmt = union_all(ev, select(Watchlist.ticker, literal(None, String).label("company")))
+    with db_session() as s:
+        rows = s.execute(stmt).all()
+    found: Dict[str, Optional[str]] = {}
+    for t, company in rows:
+        if t and (t not in found or (company and not found[t])):
+            found[t] = company
+    if tickers:
+        return {t: found.get(t) for t in tickers}
+    return found
+
+
+def _abs_change(q: Dict[str, Any]) -> float:
+    dp = q.get("change_percent")
+    return abs(float(dp)) if isinstance(dp, (int, float)) else -1.0
+
+
+def top_movers(quotes: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """The k quotes with the largest absolute % change (O(n log k)); quotes without a change sort last."""
+    return heapq.nlargest(max(0, int(k)), quotes, key=_abs_change)
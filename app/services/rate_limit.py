@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Per-provider token buckets with a priority wait queue.
+# Every request through the shared provider clients (services.http_clients)
+# takes a token from its provider's bucket. When the bucket is empty, callers
+# queue and are released in priority order as tokens refill, so interactive API
+# requests overtake background ingestion instead of both hammering into 429s.
+# A caller can bound its wait (acquire(timeout=...)): it fails at once with
+# RateLimitTimeout when the queue ahead of it can't drain in time (e.g. during
+# a 429 backoff), and otherwise gives up its place when the time runs out.
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Priority of the current task; API requests default to interactive, worker/admin jobs opt into background
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+# provider -> (default rate spec, default burst); override with RATE_LIMIT_<PROVIDER>="N/s|N/min" and RATE_BURST_<PROVIDER>
+DEFAULT_LIMITS: Dict[str, Tuple[str, int]] = {
+    "edgar": ("8/s", 8),              # SEC fair-access policy: max 10 req/s
+    "finnhub": ("60/min", 30),        # free tier: 60/min, 30/s
+    "fmp": ("300/min", 10),
+    "alpha_vantage": ("5/min", 5),    # free tier: 5/min
+}
+
+
+class RateLimitTimeout(Exception):
+    """No token could be had within the caller's timeout."""
+
+
+def _parse_rate(spec: str) -> float:
+    """'10/s' or '60/min' -> tokens per second."""
+    n, _, unit = (spec or "").partition("/")
+    per = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}.get(unit.strip().lower() or "s", 1.0)
+    return max(float(n) / per, 1e-6)
+
+
+class RateLimiter:
+    def __init__(self, name: str, rate: float, burst: int) -> None:
+        self.name = name
+        self.rate = rate  # tokens per second
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._ts = time.monotonic()
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._upstream: Optional[Tuple[int, float]] = None  # (remaining, valid until) from rate-limit headers
+
+    def _refill(self) -> None:
+        t = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (t - self._ts) * self.rate)
+        self._ts = t
+
+    def expected_wait(self, priority: int) -> float:
+        """Seconds until a new waiter at `priority` would get a token (ignoring later arrivals)."""
+        self._refill()
+        ahead = sum(1 for p, _, f in self._heap if p <= priority and not f.done())
+        return max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    async def acquire(self, priority: Optional[int] = None, timeout: Optional[float] = None) -> int:
+        """Wait for a token; returns the time spent queued in ms. With `timeout` (seconds),
+        raises RateLimitTimeout instead of waiting longer."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Waiters and timers belong to one loop; a new loop starts with an empty queue
+            self._heap, self._timer, self._loop = [], None, loop
+        self._refill()
+        if not self._heap and self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        t0 = time.perf_counter()
+        prio = request_priority.get() if priority is None else priority
+        if timeout is not None and self.expected_wait(prio) > timeout:
+            raise RateLimitTimeout(f"{self.name}: no token within {timeout:g}s ({self.expected_wait(prio):.1f}s queued ahead)")
+        fut = loop.create_future()
+        heapq.heappush(self._heap, (prio, next(self._seq), fut))
+        self._schedule()
+        try:
+            await asyncio.wait_for(fut, timeout)  # cancelled waiters are skipped by _dispatch
+        except asyncio.TimeoutError:
+            self._heap = [w for w in self._heap if w[2] is not fut]
+            heapq.heapify(self._heap)
+            raise RateLimitTimeout(f"{self.name}: no token within {timeout:g}s") from None
+        return int((time.perf_counter() - t0) * 1000)
+
+    def backoff(self, seconds: float) -> None:
+        """Upstream said slow down (429/Retry-After): hold all waiters for `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - max(0.0, seconds) * self.rate
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._schedule()
+
+    def observe_remaining(self, remaining: int, reset_in: float) -> None:
+        """Record the upstream's own count of requests left in its window (X-Ratelimit-Remaining)."""
+        self._upstream = (max(0, int(remaining)), time.monotonic() + max(0.0, reset_in))
+
+    def headroom(self) -> int:
+        """Requests that can start now without queueing: local tokens, capped by the
+        upstream's last reported remaining quota while its window lasts."""
+        self._refill()
+        n = int(self._tokens) - len(self._heap)
+        if self._upstream is not None:
+            remaining, until = self._upstream
+            if time.monotonic() < until:
+                n = min(n, remaining)
+            else:
+                self._upstream = None
+        return max(0, n)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._heap and self._tokens >= 1:
+            _, _, fut = heapq.heappop(self._heap)
+            if fut.done():
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._heap and self._timer is None and self._loop is not None:
+            delay = max(0.0, (1.0 - self._tokens) / self.rate)
+            self._timer = self._loop.call_later(delay, self._dispatch)
+
+    def stats(self) -> Dict[str, float]:
+        self._refill()
+        return {"rate_per_s": round(self.rate, 4), "burst": self.burst, "tokens": round(self._tokens, 2), "queued": len(self._heap)}
+
+
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_limiter(provider: str) -> Optional[RateLimiter]:
+    """Limiter for a known provider, or None for unthrottled hosts (e.g. generic downloads)."""
+    lim = _limiters.get(provider)
+    if lim is None and provider in DEFAULT_LIMITS:
+        spec, burst = DEFAULT_LIMITS[provider]
+        key = provider.upper()
+        rate = _parse_rate(os.getenv(f"RATE_LIMIT_{key}") or spec)
+        burst = int(os.getenv(f"RATE_BURST_{key}") or burst)
+        lim = _limiters[provider] = RateLimiter(provider, rate, burst)
+    return lim
+
+
+def limiter_stats() -> Dict[str, Dict[str, float]]:
+    return {name: lim.stats() for name, lim in _limiters.items()}
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import httpx
+
+from app.db.persistence import is_db_enabled, load_http_cache, save_http_cache, touch_http_cache
+from app.services.http_clients import queued_ms
+from app.services.metrics import now, elapsed_ms, record_http, record_cache
+
+# Shared response cache for upstream GETs (SEC tickers/submissions/filing pages, ...).
+# Two levels: a small in-process LRU in front of a backend shared by all processes
+# (web dynos, uvicorn workers, the ingestion worker) that survives restarts:
+#   - postgres: `http_cache` table (default when DATABASE_URL is set)
+#   - sqlite:   on-disk file, for single-host deployments and local dev
+#   - memory:   process-local only (the old behaviour)
+# Expired entries are kept and revalidated with ETag / Last-Modified.
+# Only the L1 layer is touched on the event loop; shared-backend reads and
+# writes (DB / file I/O) run in a worker thread.
+
+RESPONSE_CACHE_BACKEND = (os.getenv("RESPONSE_CACHE_BACKEND", "auto") or "auto").strip().lower()
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "earningsai-http-cache.sqlite3")
+RESPONSE_CACHE_L1_SIZE = int(os.getenv("RESPONSE_CACHE_L1_SIZE", "512") or "512")
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    ttl: int
+    size: int = 0  # body bytes as downloaded; a 304 saves this much transfer
+
+    def fresh(self, ttl: Optional[int] = None) -> bool:
+        return time.time() - self.stored_at <= (self.ttl if ttl is None else ttl)
+
+
+class CacheBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]: ...
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    @abstractmethod
+    def touch(self, key: str, stored_at: float) -> None: ...
+
+
+class MemoryCache(CacheBackend):
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._data: Dict[str, CacheEntry] = {}
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return self._data.get(key)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._data[key] = entry
+
+    def touch(self, key: str, stored_at: float) -> None:
+        e = self._data.get(key)
+        if e is not None:
+            self._data[key] = e._replace(stored_at=stored_at)
+
+
+class SqliteCache(CacheBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")  # concurrent readers across processes
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                "key TEXT PRIMARY KEY, value TEXT, etag TEXT, last_modified TEXT, stored_at REAL NOT NULL, ttl_seconds INTEGER NOT NULL, size_bytes INTEGER)"
+            )
+            cols = {r[1] for r in self._conn.execute("PRAGMA table_info(http_cache)")}
+            if "size_bytes" not in cols:
+                self._conn.execute("ALTER TABLE http_cache ADD COLUMN size_bytes INTEGER")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, etag, last_modified, stored_at, ttl_seconds, size_bytes FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3], row[4], row[5] or 0)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, value, etag, last_modified, stored_at, ttl_seconds, size_bytes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.value), entry.etag, entry.last_modified, entry.stored_at, entry.ttl, entry.size),
+            )
+
+    def touch(self, key: str, stored_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE http_cache SET stored_at = ? WHERE key = ?", (stored_at, key))
+
+
+class PostgresCache(CacheBackend):
+    name = "postgres"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = load_http_cache(key)
+        if row is None:
+            return None
+        return CacheEntry(row["value"], row["etag"], row["last_modified"], row["stored_at"], row["ttl_seconds"], row["size_bytes"] or 0)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        save_http_cache(key, entry.value, entry.etag, entry.last_modified, entry.stored_at, entry.ttl, entry.size)
+
+    def touch(self, key: str, stored_at: float) -> None:
+        touch_http_cache(key, stored_at)
+
+
+_backend: Optional[CacheBackend] = None
+_l1: "OrderedDict[str, CacheEntry]" = OrderedDict()
+# revalidated = 304 responses to `conditional` requests; bytes_saved = cached body sizes those 304s avoided
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stale": 0, "conditional": 0, "revalidated": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+
+
+def get_backend() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        kind = RESPONSE_CACHE_BACKEND
+        if kind == "auto":
+            kind = "postgres" if is_db_enabled() else "sqlite"
+        try:
+            if kind == "postgres":
+                _backend = PostgresCache()
+            elif kind == "sqlite":
+                _backend = SqliteCache(RESPONSE_CACHE_PATH)
+            else:
+                _backend = MemoryCache()
+        except Exception as e:
+            logger.warning("response cache: %s backend unavailable (%s); using memory", kind, e)
+            _backend = MemoryCache()
+    return _backend
+
+
+def set_backend(backend: Optional[CacheBackend]) -> None:
+    """Swap the shared backend (None = re-resolve from env); clears the in-process layer."""
+    global _backend
+    _backend = backend
+    _l1.clear()
+
+
+def _l1_put(key: str, entry: CacheEntry) -> None:
+    _l1[key] = entry
+    _l1.move_to_end(key)
+    while len(_l1) > RESPONSE_CACHE_L1_SIZE:
+        _l1.popitem(last=False)
+
+
+async def _shared(op: str, *args: Any) -> Any:
+    """Run a shared-backend call off the event loop (inline for the memory backend)."""
+    if isinstance(_backend, MemoryCache):
+        return getattr(_backend, op)(*args)
+    return await asyncio.to_thread(lambda: getattr(get_backend(), op)(*args))
+
+
+async def cache_lookup(key: str) -> Optional[CacheEntry]:
+    """Entry for `key` (fresh or stale), checking the in-process layer before the shared backend."""
+    e = _l1.get(key)
+    if e is not None and e.fresh():
+        _l1.move_to_end(key)
+        return e
+    try:
+        shared = await _shared("get", key)
+    except Exception as ex:
+        logger.warning("response cache: backend get failed: %s", ex)
+        shared = None
+    if shared is not None and (e is None or shared.stored_at >= e.stored_at):
+        e = shared
+        _l1_put(key, e)
+    return e
+
+
+async def cache_store(key: str, value: Any, ttl: int, etag: Optional[str] = None, last_modified: Optional[str] = None, size: int = 0) -> CacheEntry:
+    e = CacheEntry(value, etag, last_modified, time.time(), int(ttl), int(size))
+    _l1_put(key, e)
+    try:
+        await _shared("set", key, e)
+    except Exception as ex:
+        logger.warning("response cache: backend set failed: %s", ex)
+    return e
+
+
+async def cache_touch(key: str, entry: CacheEntry, ttl: Optional[int] = None) -> CacheEntry:
+    e = entry._replace(stored_at=time.time(), ttl=int(ttl if ttl is not None else entry.ttl))
+    _l1_put(key, e)
+    try:
+        await _shared("touch", key, e.stored_at)
+    except Exception as ex:
+        logger.warning("response cache: backend touch failed: %s", ex)
+    return e
+
+
+def _count(event: str, n: int = 1) -> None:
+    _stats[event] = _stats.get(event, 0) + n
+    record_cache("http", event, n)
+
+
+async def fetch_cached(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    ttl: int,
+    provider: str,
+    endpoint: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    as_json: bool = True,
+    parse: Optional[Callable[[str], Any]] = None,
+    key: Optional[str] = None,
+) -> Optional[Any]:
+    """GET `url` through the shared cache; returns the parsed JSON (or text), or None on HTTP errors.
+    Fresh entries are served without a request; stale ones are revalidated conditionally.
+    With `parse`, the body text is parsed once and only its (JSON-able) result is cached;
+    give such entries their own `key` so they never collide with raw-body entries for the URL.
+    """
+    key = key or url
+    entry = await cache_lookup(key)
+    if entry is not None and entry.fresh(ttl):
+        _count("hits")
+        return entry.value
+    h = dict(headers or {})
+    if entry is not None:
+        _count("stale")
+        if entry.etag:
+            h["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            h["If-Modified-Since"] = entry.last_modified
+        if entry.etag or entry.last_modified:
+            _count("conditional")
+    else:
+        _count("misses")
+    t0 = now()
+    r = await client.get(url, headers=h, timeout=timeout)
+    try:
+        record_http(provider, endpoint, r.status_code, elapsed_ms(t0), queued_ms=queued_ms(r))
+    except Exception:
+        pass
+    if r.status_code == 304 and entry is not None:
+        # Not modified: no body transferred, the stored one gets a fresh TTL
+        _count("revalidated")
+        _count("bytes_saved", entry.size)
+        return (await cache_touch(key, entry, ttl)).value
+    if r.status_code >= 400:
+        return None
+    size = len(r.content)
+    _count("bytes_downloaded", size)
+    if parse is not None:
+        value = parse(r.text or "")
+    else:
+        value = r.json() if as_json else (r.text or "")
+    await cache_store(key, value, ttl, r.headers.get("etag"), r.headers.get("last-modified"), size)
+    return value
+
+
+def cache_stats() -> Dict[str, Any]:
+    lookups = _stats["hits"] + _stats["misses"] + _stats["stale"]
+    return {
+        "backend": get_backend().name,
+        **_stats,
+        "l1_entries": len(_l1),
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else None,
+        "not_modified_rate": round(_stats["revalidated"] / _stats["conditional"], 3) if _stats["conditional"] else None,
+    }
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterator, NamedTuple, Optional
+
+# Single-pass tokenising scanner for the metric extractors.
+# Every money, percent and period value starts at a numeric token, so one
+# left-to-right walk over MONEY_RE tokens yields all three span types:
+#   - money:   the token itself (value + optional unit)
+#   - percent: tokens followed by `\s*%`, narrowed with PCT_RE inside the token
+#   - period:  tokens directly preceded by `Q` or `FY\s*`, confirmed with PERIOD_RE
+# The first span of each kind equals the first match of the corresponding regex.
+
+MONEY_RE = re.compile(r"\$?([0-9][0-9,\.]*)\s*(b|bn|billion|m|mm|million|k|thousand)?", re.I)
+PCT_RE = re.compile(r"([0-9]{1,2}(?:\.[0-9]+)?)\s*%")
+PERIOD_RE = re.compile(r"\b((Q[1-4]|FY)\s*\d{4})\b", re.I)
+_PCT_TAIL_RE = re.compile(r"\s*%")
+
+MONEY = "money"
+PERCENT = "percent"
+PERIOD = "period"
+SPAN_KINDS = (MONEY, PERCENT, PERIOD)
+
+
+class Span(NamedTuple):
+    kind: str
+    start: int
+    end: int
+    text: str  # number as written for money/percent; upper-cased label for period
+    unit: Optional[str] = None  # money scale suffix (b/m/k/...), if any
+
+
+def _period_at(text: str, digit_pos: int) -> Optional[re.Match]:
+    if digit_pos >= 1 and text[digit_pos - 1] in "qQ":
+        return PERIOD_RE.match(text, digit_pos - 1)
+    j = digit_pos
+    while j > 0 and text[j - 1].isspace():
+        j -= 1
+    if j >= 2 and text[j - 2 : j].lower() == "fy":
+        return PERIOD_RE.match(text, j - 2)
+    return None
+
+
+def iter_spans(text: str) -> Iterator[Span]:
+    """Yield typed spans in token order (one pass over numeric tokens)."""
+    for m in MONEY_RE.finditer(text):
+        d = m.start(1)
+        p = _period_at(text, d)
+        if p is not None:
+            yield Span(PERIOD, p.start(1), p.end(1), p.group(1).upper())
+        yield Span(MONEY, m.start(), m.end(), m.group(1), m.group(2))
+        tail = _PCT_TAIL_RE.match(text, m.end(1))
+        if tail is not None:
+            pm = PCT_RE.search(text, d, tail.end())
+            if pm is not None:
+                yield Span(PERCENT, pm.start(1), pm.end(), pm.group(1))
+
+
+def first_spans(text: str) -> Dict[str, Span]:
+    """First span of each kind; same walk as iter_spans, stopping once all kinds are seen."""
+    out: Dict[str, Span] = {}
+    for m in MONEY_RE.finditer(text):
+        d = m.start(1)
+        if PERIOD not in out:
+            p = _period_at(text, d)
+            if p is not None:
+                out[PERIOD] = Span(PERIOD, p.start(1), p.end(1), p.group(1).upper())
+        if MONEY not in out:
+            out[MONEY] = Span(MONEY, m.start(), m.end(), m.group(1), m.group(2))
+        if PERCENT not in out:
+            tail = _PCT_TAIL_RE.match(text, m.end(1))
+            if tail is not None:
+                pm = PCT_RE.search(text, d, tail.end())
+                if pm is not None:
+                    out[PERCENT] = Span(PERCENT, pm.start(1), pm.end(), pm.group(1))
+        if len(out) == len(SPAN_KINDS):
+            break
+    return out
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Immutable ticker / CIK / company-name index built from SEC company_tickers.json.
+# Instead of a dict of dicts per ticker it keeps parallel sorted arrays:
+#   - tickers: sorted tuple (exact + prefix lookup by bisect)
+#   - ciks:    array of ints, aligned with tickers
+#   - names:   one joined string + offsets, aligned with tickers
+#   - words:   sorted distinct company-name words with flattened postings (name prefix / fuzzy)
+# The worker rebuilds it daily and saves it to TICKER_INDEX_PATH, so web processes
+# load it at startup without fetching or re-parsing the SEC payload.
+# Fuzzy matching scans every name word (difflib, ~20 ms over the full list), so
+# search() only falls back to it when nothing else matched and the query has a
+# word of at least FUZZY_MIN_LENGTH characters.
+
+TICKER_INDEX_PATH = os.getenv("TICKER_INDEX_PATH") or os.path.join(tempfile.gettempdir(), "earningsai-ticker-index.json")
+TICKER_INDEX_FORMAT = 1
+FUZZY_MIN_LENGTH = 4
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _words(name: str) -> List[str]:
+    return _WORD_RE.findall((name or "").lower())
+
+
+class TickerIndex:
+    def __init__(self, entries: Iterable[Tuple[str, int, str]], built_at: Optional[float] = None) -> None:
+        """entries: (ticker, cik, company); a ticker listed twice keeps its first entry."""
+        rows: Dict[str, Tuple[int, str]] = {}
+        for tic, cik, name in entries:
+            t = (tic or "").strip().upper()
+            if t and t not in rows:
+                rows[t] = (int(cik or 0), name or "")
+        self.built_at = built_at or time.time()
+        self.tickers: Tuple[str, ...] = tuple(sorted(rows))
+        self.ciks = array("L", (rows[t][0] for t in self.tickers))
+        self._names = "".join(rows[t][1] for t in self.tickers)
+        self._name_offsets = array("L", [0])
+        for t in self.tickers:
+            self._name_offsets.append(self._name_offsets[-1] + len(rows[t][1]))
+        # word -> ticker positions, flattened: positions of words[k] are postings[starts[k]:starts[k+1]]
+        by_word: Dict[str, List[int]] = {}
+        for i in range(len(self.tickers)):
+            for w in dict.fromkeys(_words(self.name(i))):
+                by_word.setdefault(w, []).append(i)
+        self.words: Tuple[str, ...] = tuple(sorted(by_word))
+        self._postings = array("L")
+        self._starts = array("L", [0])
+        for w in self.words:
+            self._postings.extend(by_word[w])
+            self._starts.append(len(self._postings))
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def name(self, i: int) -> str:
+        return self._names[self._name_offsets[i]:self._name_offsets[i + 1]]
+
+    def _info(self, i: int) -> Dict[str, Any]:
+        return {"ticker": self.tickers[i], "cik": str(self.ciks[i]), "company": self.name(i) or None}
+
+    def _find(self, ticker: str) -> int:
+        t = (ticker or "").strip().upper()
+        i = bisect.bisect_left(self.tickers, t)
+        return i if t and i < len(self.tickers) and self.tickers[i] == t else -1
+
+    def get(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """{ticker, cik, company} for an exact ticker, or None."""
+        i = self._find(ticker)
+        return self._info(i) if i >= 0 else None
+
+    def _prefix_range(self, keys: Tuple[str, ...], prefix: str) -> range:
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff")
+        return range(lo, hi)
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Tickers starting with `prefix`, shortest first."""
+        p = (prefix or "").strip().upper()
+        if not p:
+            return []
+        hits = sorted(self._prefix_range(self.tickers, p), key=lambda i: (len(self.tickers[i]), self.tickers[i]))
+        return [self._info(i) for i in hits[:limit]]
+
+    def _word_positions(self, k: int) -> array:
+        return self._postings[self._starts[k]:self._starts[k + 1]]
+
+    def name_prefix(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Companies with a name word starting with each query word ("app in" -> Apple Inc.)."""
+        terms = _words(query)
+        if not terms:
+            return []
+        matched: Optional[set] = None
+        for term in terms:
+            found = set()
+            for k in self._prefix_range(self.words, term):
+                found.update(self._word_positions(k))
+            matched = found if matched is None else matched & found
+            if not matched:
+                return []
+        hits = sorted(matched, key=lambda i: (len(self.name(i)), self.tickers[i]))
+        return [self._info(i) for i in hits[:limit]]
+
+    def fuzzy(self, query: str, limit: int = 10, cutoff: float = 0.75) -> List[Dict[str, Any]]:
+        """Typo-tolerant company lookup: close matches of the longest query word against name words."""
+        terms = sorted(_words(query), key=len, reverse=True)
+        if not terms or len(terms[0]) < 3:
+            return []
+        hits: Dict[int, float] = {}
+        for w in difflib.get_close_matches(terms[0], self.words, n=5, cutoff=cutoff):
+            k = bisect.bisect_left(self.words, w)
+            score = difflib.SequenceMatcher(None, terms[0], w).ratio()
+            for i in self._word_positions(k):
+                hits[i] = max(hits.get(i, 0.0), score)
+        ranked = sorted(hits, key=lambda i: (-hits[i], len(self.name(i)), self.tickers[i]))
+        return [self._info(i) for i in ranked[:limit]]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Autocomplete: exact ticker, ticker prefix, company-name prefix; fuzzy name matches
+        only when those found nothing."""
+        out: List[Dict[str, Any]] = []
+        seen: set = set()
+
+        def add(items: List[Dict[str, Any]], match: str) -> None:
+            for it in items:
+                if len(out) < limit and it["ticker"] not in seen:
+                    seen.add(it["ticker"])
+                    out.append({**it, "match": match})
+
+        add([x for x in [self.get(query)] if x], "ticker")
+        add(self.prefix(query, limit), "ticker_prefix")
+        add(self.name_prefix(query, limit), "name")
+        if not out and max(map(len, _words(query)), default=0) >= FUZZY_MIN_LENGTH:
+            add(self.fuzzy(query, limit), "fuzzy")
+        return out
+
+    @classmethod
+    def from_sec_payload(cls, data: Dict[str, Any]) -> "TickerIndex":
+        # Format: { "0": {"ticker":"A","cik_str":123, "title":"..."}, ... }
+        return cls(
+            ((item or {}).get("ticker"), (item or {}).get("cik_str"), (item or {}).get("title"))
+            for item in (data or {}).values()
+        )
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write atomically (temp file + rename) so concurrent loaders never see a partial file."""
+        path = path or TICKER_INDEX_PATH
+        payload = {
+            "format": TICKER_INDEX_FORMAT,
+            "built_at": self.built_at,
+            "tickers": list(self.tickers),
+            "ciks": list(self.ciks),
+            "names": [self.name(i) for i in range(len(self.tickers))],
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["TickerIndex"]:
+        try:
+            with open(path or TICKER_INDEX_PATH, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return None
+        if payload.get("format") != TICKER_INDEX_FORMAT:
+            return None
+        return cls(zip(payload["tickers"], payload["ciks"], payload["names"]), built_at=payload.get("built_at"))
+
+
+_index: Optional[TickerIndex] = None
+
+
+def get_index() -> Optional[TickerIndex]:
+    return _index
+
+
+def set_index(index: Optional[TickerIndex], persist: bool = False) -> None:
+    global _index
+    _index = index
+    if persist and index is not None:
+        try:
+            index.save()
+        except Exception as e:
+            logger.warning("ticker index: save failed: %s", e)
+
+
+def load_index() -> Optional[TickerIndex]:
+    """Load the saved index (if any) into the process; called at app/worker startup."""
+    global _index
+    try:
+        t0 = time.perf_counter()
+        idx = TickerIndex.load()
+        if idx is not None:
+            _index = idx
+            logger.info("ticker index: %d tickers loaded in %.1f ms", len(idx), (time.perf_counter() - t0) * 1000)
+    except Exception as e:
+        logger.warning("ticker index: load failed: %s", e)
+    return _index
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.db.persistence import load_versions
+from app.services.metrics import record_cache
+
+# Version stamps for the resources the frontend polls.
+# Every write bumps its resource's counter in resource_versions, in the same
+# transaction (persistence.bump_versions):
+#   events      calendar upserts, the event ensured by a new highlight
+#   documents   document saves and deletes
+#   highlights  new highlights
+#   watchlist   watchlist adds / removes (dashboard risk rows)
+# and earnings_events / highlights rows carry the version of their last write.
+# Endpoints build an ETag from the versions their response depends on (plus
+# the query parameters), so `If-None-Match` gets a 304 before anything is
+# loaded or serialised, and `since_version=N` returns only rows stamped after
+# N (a delta). The counters are read at most every RESOURCE_VERSION_TTL_SECONDS
+# per process, so most polls cost no query at all.
+
+RESOURCE_VERSION_TTL_SECONDS = float(os.getenv("RESOURCE_VERSION_TTL_SECONDS", "1") or "1")
+
+_cache: Optional[Tuple[float, Dict[str, int]]] = None
+_inflight: Optional[asyncio.Task] = None
+
+
+async def get_versions() -> Dict[str, int]:
+    """name -> current version (0 for resources never written)."""
+    global _cache, _inflight
+    if _cache is not None and time.monotonic() - _cache[0] < RESOURCE_VERSION_TTL_SECONDS:
+        record_cache("versions", "hit")
+        return _cache[1]
+    if _inflight is None or _inflight.done():
+        record_cache("versions", "miss")
+
+        async def _load() -> Dict[str, int]:
+            global _cache
+            versions = await asyncio.to_thread(load_versions)
+            _cache = (time.monotonic(), versions)
+            return versions
+
+        _inflight = asyncio.create_task(_load())
+    else:
+        record_cache("versions", "joined")
+    return await asyncio.shield(_inflight)
+
+
+def version_token(versions: Dict[str, int], names: Iterable[str]) -> str:
+    """The versions of `names`, dot-joined (e.g. "12.40.3"); what clients send back as since_version."""
+    return ".".join(str(int(versions.get(n) or 0)) for n in names)
+
+
+def parse_token(token: Optional[str], names: Iterable[str]) -> Optional[Dict[str, int]]:
+    """Inverse of version_token; None when the token doesn't fit."""
+    names = list(names)
+    parts = (token or "").strip().strip('"').split(".")
+    if len(parts) != len(names):
+        return None
+    try:
+        return {n: int(p) for n, p in zip(names, parts)}
+    except ValueError:
+        return None
+
+
+def make_etag(kind: str, token: str, *params: object) -> str:
+    digest = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()[:12]
+    return f'W/"{kind}-{token}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, lists and "*")."""
+    if not if_none_match:
+        return False
+    want = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == want:
+            return True
+    return False
+
+
+def conditional(request: Request, response: Response, etag: str, token: str) -> Optional[Response]:
+    """Put the ETag / X-Resource-Version headers on `response`; returns the 304 to send
+    instead when the request's If-None-Match already has this ETag.
+    """
+    headers = {"ETag": etag, "X-Resource-Version": token, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        record_cache("conditional", "not_modified")
+        return Response(status_code=304, headers=headers)
+    record_cache("conditional", "full")
+    response.headers.update(headers)
+    return None
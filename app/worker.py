@@ -15,10 +15,18 @@ load_dotenv()
 
 from app.db.base import init_db, db_session
 from app.db.models import EarningsEvent, IngestionRun
-from app.db.persistence import is_db_enabled
+from app.db.persistence import is_db_enabled, load_eps_for_day
 from app.routes.earnings import earnings_calendar
-from app.routes.discovery import ingest_symbol, IngestSymbolRequest
+from app.routes.discovery import _load_ticker_map
 from app.services.metrics import begin_run, end_run
+from app.services.http_clients import init_clients, close_clients
+from app.services.rate_limit import request_priority, PRIORITY_BACKGROUND
+from app.services.ticker_index import get_index, load_index
+from app.services.ingest_queue import start_workers, requeue_stale
+from app.services.ingest_pipeline import ingest_symbols
+from app.services import ingest_ledger
+from app.services.eps_surprises import EPS_SURPRISE_TTL_SECONDS, get_entries as get_eps_entries, is_fresh as eps_is_fresh
+from app.services.dashboard import update_snapshot as update_dashboard_snapshot
 
 log = logging.getLogger("worker")
 logging.basicConfig(level=logging.INFO)
@@ -29,11 +37,13 @@ async def job_refresh_next_14_days() -> None:
     today = date.today()
     start = today
     end = today + timedelta(days=13)
+    request_priority.set(PRIORITY_BACKGROUND)
     begin_run()
     try:
         rows = await earnings_calendar(start=start.isoformat(), end=end.isoformat(), refresh="1")
         count = len(rows) if isinstance(rows, list) else 0
         log.info("calendar refresh ok: %s..%s -> %d rows", start, end, count)
+        await _update_dashboard(events=True, documents=False)
         metrics = end_run()
         _record_run(
             job_type="refresh_next_14_days",
@@ -54,6 +64,7 @@ async def job_ingest_today(batch: int = 6, limit: int = 100) -> Dict:
     """
     today = date.today()
     # Collect tickers within session; return only plain strings
+    request_priority.set(PRIORITY_BACKGROUND)
     begin_run()
     with db_session() as s:
         rows: List[tuple] = (
@@ -72,40 +83,83 @@ async def job_ingest_today(batch: int = 6, limit: int = 100) -> Dict:
 
     if not tickers:
         log.info("ingest_today: no tickers for %s", today)
+        await _update_dashboard(events=False, documents=True)  # documents may come from the ingest queue
         return {"date": today.isoformat(), "requested": 0, "success": 0, "errors": []}
 
     tickers = tickers[: max(1, min(limit, len(tickers)))]
 
-    sem = asyncio.Semaphore(max(1, min(batch, 10)))
-    results: List[Dict] = []
-
-    async def _run_one(t: str):
-        async with sem:
-            try:
-                resp = await ingest_symbol(IngestSymbolRequest(ticker=t))
-                results.append({"ticker": t, "ok": True, "doc_id": getattr(resp, "doc_id", None)})
-            except Exception as e:
-                results.append({"ticker": t, "ok": False, "error": str(e)})
-
-    await asyncio.gather(*[_run_one(t) for t in tickers])
-
+    # Only tickers with something new (per the ingest ledger) go through the
+    # staged pipeline (resolve -> download -> parse -> embed -> persist -> highlight);
+    # `batch` caps the network stages' concurrency
+    plan = await ingest_ledger.plan(tickers)
+    results, pipeline = await ingest_symbols(
+        plan.tickers, network_concurrency=max(1, min(batch, 10)), known_sources=plan.known_sources
+    )
+    for r in results:
+        if not r.get("ok"):
+            continue
+        t = r["ticker"]
+        doc_id = r.get("doc_id") or (plan.entries.get(t) or {}).get("doc_id")
+        ingest_ledger.record(t, plan.accessions.get(t), r.get("source_url"), doc_id)
+
+    processed = [r for r in results if r.get("ok") and not r.get("skipped")]
+    skipped = plan.skipped + [{"ticker": r["ticker"], "reason": r["skipped"]} for r in results if r.get("skipped")]
     ok = sum(1 for r in results if r.get("ok"))
     errs = [r for r in results if not r.get("ok")]
     summary = {
         "date": today.isoformat(),
         "requested": len(tickers),
-        "success": ok,
+        "success": ok + len(plan.skipped),
+        "processed": len(processed),
+        "skipped": len(skipped),
+        "skipped_items": skipped,
         "errors": errs,
         "items": results,
         "tickers": tickers,
     }
-    log.info("ingest_today: %d/%d ok (errors=%d)", ok, len(tickers), len(errs))
+    log.info("ingest_today: %d processed, %d skipped, %d errors of %d", len(processed), len(skipped), len(errs), len(tickers))
     metrics = end_run()
+    metrics["pipeline"] = pipeline
     summary["metrics"] = metrics
     _record_run(job_type="ingest_today", summary=summary)
+    await _update_dashboard(events=False, documents=True)
     return summary
 
 
+async def job_refresh_eps_surprises(limit: int = 200) -> None:
+    """Refresh cached EPS surprises for today's calendar past half their TTL, so API reads stay on the cache."""
+    if not is_db_enabled():
+        return
+    request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        rows = await asyncio.to_thread(load_eps_for_day, date.today(), limit)
+        known = {t: e for t, _, e in rows}
+        max_age = EPS_SURPRISE_TTL_SECONDS / 2
+        stale = [t for t, e in known.items() if not eps_is_fresh(e, max_age)]
+        await get_eps_entries(list(known), known, max_age=max_age)
+        log.info("eps refresh: %d tickers today, %d refreshed", len(known), len(stale))
+    except Exception as e:
+        log.warning("eps refresh failed: %s", e)
+
+
+async def job_rebuild_ticker_index() -> None:
+    """Rebuild the ticker/CIK index from SEC and save it for web processes to load at startup."""
+    request_priority.set(PRIORITY_BACKGROUND)
+    await _load_ticker_map(force=True)
+    idx = get_index()
+    log.info("ticker index: %d tickers", len(idx) if idx is not None else 0)
+
+
+async def _update_dashboard(events: bool, documents: bool) -> None:
+    """Fold a job's writes into the materialised dashboard snapshot (services.dashboard)."""
+    if not is_db_enabled():
+        return
+    try:
+        await update_dashboard_snapshot(events=events, documents=documents)
+    except Exception as e:
+        log.warning("dashboard snapshot update failed: %s", e)
+
+
 def _record_run(job_type: str, summary: dict) -> None:
     if not is_db_enabled():
         return
@@ -127,22 +181,41 @@ def _record_run(job_type: str, summary: dict) -> None:
 
 async def main() -> None:
     init_db()
+    init_clients()
+    load_index()
     scheduler = AsyncIOScheduler(timezone=ZoneInfo("UTC"))
 
     # Daily calendar refresh
     scheduler.add_job(job_refresh_next_14_days, "cron", hour=5, minute=10)  # 05:10 UTC daily
 
+    # Daily ticker/CIK index rebuild
+    scheduler.add_job(job_rebuild_ticker_index, "cron", hour=4, minute=50)  # 04:50 UTC daily
+
     # Ingest today, every 15 minutes
     scheduler.add_job(job_ingest_today, "cron", minute="*/15")
 
+    # EPS surprise cache for today's tickers, hourly
+    scheduler.add_job(job_refresh_eps_surprises, "cron", minute=25)
+
+    # Ingestion job queue: re-queue jobs whose worker died mid-run
+    scheduler.add_job(requeue_stale, "interval", minutes=5)
+
     scheduler.start()
+    queue_workers = start_workers() if is_db_enabled() else []
 
     # Run once on startup to warm things up
+    await job_rebuild_ticker_index()
     await job_refresh_next_14_days()
+    await job_refresh_eps_surprises()
     await job_ingest_today()
 
     # Keep process alive
-    await asyncio.Event().wait()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for t in queue_workers:
+            t.cancel()
+        await close_clients()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""Earnings calendar refresh: per-row check-then-insert vs one bulk upsert.
+
+Writes a synthetic 5k-item provider batch twice (cold: all inserts, warm: all
+conflicts) with the old per-item SELECT + add loop and with
+upsert_earnings_events, and reports wall time per refresh.
+
+Uses an in-memory SQLite database by default; set DATABASE_URL to a scratch
+Postgres database (with the earnings_events unique index, see init_db) to run
+it there. Rows are written under a far-future date range and deleted afterwards.
+
+Run from the repo root:  python tests/bench_calendar_upsert.py
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db import base as db_base  # noqa: E402
+from app.db.base import db_session  # noqa: E402
+from app.db.models import Base, EarningsEvent, ResourceVersion  # noqa: E402
+from app.db.persistence import upsert_earnings_events  # noqa: E402
+
+N = 5_000
+START = date(2099, 1, 1)
+
+
+def _setup():
+    url = os.getenv("DATABASE_URL")
+    if url:
+        engine = create_engine(db_base._normalize_url(url))
+    else:
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[EarningsEvent.__table__, ResourceVersion.__table__])
+    db_base.SessionLocal = sessionmaker(bind=engine)
+    return engine
+
+
+def _items():
+    return [
+        {
+            "ticker": f"BX{i:05d}",
+            "company": f"Bench Co {i}",
+            "event_date": (START + timedelta(days=i % 20)).isoformat(),
+            "time_of_day": "AMC" if i % 2 else "BMO",
+            "status": "upcoming",
+        }
+        for i in range(N)
+    ]
+
+
+def _legacy_refresh(items, source):
+    # The pre-upsert route body: one SELECT per item, then add or fill gaps
+    with db_session() as s:
+        for it in items:
+            ev_date = date.fromisoformat(it["event_date"])
+            sym = it["ticker"].upper()
+            ex = s.query(EarningsEvent).filter(EarningsEvent.ticker == sym, EarningsEvent.event_date == ev_date).first()
+            if ex is None:
+                s.add(EarningsEvent(
+                    id=str(uuid.uuid4()), ticker=sym, company=it.get("company"), event_date=ev_date,
+                    time_of_day=it.get("time_of_day"), status=it.get("status") or "upcoming", source=source,
+                ))
+            else:
+                if not ex.company and it.get("company"):
+                    ex.company = it.get("company")
+                if not ex.time_of_day and it.get("time_of_day"):
+                    ex.time_of_day = it.get("time_of_day")
+                if not ex.status and it.get("status"):
+                    ex.status = it.get("status")
+
+
+def _cleanup():
+    with db_session() as s:
+        s.query(EarningsEvent).filter(EarningsEvent.event_date >= START).delete(synchronize_session=False)
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    engine = _setup()
+    items = _items()
+    print(f"backend: {engine.dialect.name}")
+    try:
+        for name, fn in (("per-row", _legacy_refresh), ("upsert ", upsert_earnings_events)):
+            _cleanup()
+            cold = _timed(fn, items, "bench")
+            warm = _timed(fn, items, "bench")
+            print(f"{name}  {N} rows   cold {cold:8.0f} ms   warm {warm:8.0f} ms")
+    finally:
+        _cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Dashboard overview: load-the-window-into-Python vs SQL sections vs the snapshot.
+
+Seeds 50k earnings events (spread over ~a year, so the 21-day dashboard window
+holds a few thousand), 200 watchlist tickers and 5k documents, then times:
+- the previous route body (query the whole window and every watchlist row,
+  bucket and rank in Python)
+- dashboard.load_overview (the SQL sections, computed directly)
+- the worker's incremental snapshot updates (events only / new documents only)
+- a request's read of the stored snapshot (one key lookup, in-process cache
+  dropped each time), and 50 concurrent get_overview calls
+
+Uses an in-memory SQLite database by default; set DATABASE_URL to a scratch
+Postgres database to run it there (tables are created, and the seeded rows
+deleted afterwards).
+
+Run from the repo root:  python tests/bench_dashboard_overview.py
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from sqlalchemy import and_, create_engine, delete  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db import base as db_base  # noqa: E402
+from app.db.models import Base, DashboardSnapshot, Document, EarningsEvent, ResourceVersion, Watchlist  # noqa: E402
+from app.services import dashboard  # noqa: E402
+
+N_EVENTS = 50_000
+N_TICKERS = 12_000
+N_WATCHLIST = 200
+N_DOCS = 5_000
+LIMIT = 8
+ROUNDS = 10
+PREFIX = "BENCH"
+
+
+def _setup():
+    url = os.getenv("DATABASE_URL")
+    if url:
+        engine = create_engine(url.replace("postgresql://", "postgresql+psycopg://", 1))
+    else:
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    tables = [EarningsEvent.__table__, Watchlist.__table__, Document.__table__, DashboardSnapshot.__table__, ResourceVersion.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    db_base.SessionLocal = sessionmaker(bind=engine)
+    return engine
+
+
+def _seed(today):
+    events = [
+        {
+            "id": f"{PREFIX}-e{i}",
+            "ticker": f"T{i % N_TICKERS:05d}",
+            "company": f"Bench Co {i % N_TICKERS}",
+            "event_date": today + timedelta(days=(i * 7919) % 365 - 180),
+            "time_of_day": "AMC" if i % 2 else "BMO",
+            "status": "reported" if i % 5 == 0 else "upcoming",
+            "source": "bench",
+        }
+        for i in range(N_EVENTS)
+    ]
+    watch = [{"id": f"{PREFIX}-w{i}", "ticker": f"T{i * 37 % N_TICKERS:05d}"} for i in range(N_WATCHLIST)]
+    docs = [
+        {
+            "id": f"{PREFIX}-d{i}",
+            "ticker": f"T{i % 500:05d}",
+            "source_url": f"https://example.com/{PREFIX}/{i % 2000}",
+            "form_type": "8-K",
+            "created_at": datetime(2026, 1, 1) + timedelta(minutes=i),
+        }
+        for i in range(N_DOCS)
+    ]
+    with db_base.db_session() as s:
+        s.execute(EarningsEvent.__table__.insert(), events)
+        s.execute(Watchlist.__table__.insert(), watch)
+        s.execute(Document.__table__.insert(), docs)
+
+
+def _cleanup():
+    with db_base.db_session() as s:
+        s.execute(delete(EarningsEvent).where(EarningsEvent.id.like(f"{PREFIX}-%")))
+        s.execute(delete(Watchlist).where(Watchlist.id.like(f"{PREFIX}-%")))
+        s.execute(delete(Document).where(Document.id.like(f"{PREFIX}-%")))
+        s.execute(delete(DashboardSnapshot).where(DashboardSnapshot.key == dashboard.SNAPSHOT_KEY))
+
+
+def legacy_overview(limit, today):
+    """The previous route's data path, minus the response models."""
+    with db_base.db_session() as s:
+        rows = (
+            s.query(EarningsEvent)
+            .filter(and_(EarningsEvent.event_date >= today - timedelta(days=7), EarningsEvent.event_date <= today + timedelta(days=14)))
+            .order_by(EarningsEvent.event_date.asc(), EarningsEvent.ticker.asc())
+            .all()
+        )
+        today_rows = [r for r in rows if r.event_date == today][:limit]
+        upcoming_rows = [r for r in rows if r.event_date > today][:limit]
+        reported = [r for r in rows if (r.status or "").lower() == "reported" or r.event_date < today]
+        reported = sorted(reported, key=lambda r: r.event_date, reverse=True)[:limit]
+        docs = s.query(Document).filter(Document.source_url.isnot(None)).order_by(Document.created_at.desc()).limit(limit * 3).all()
+        seen, links = set(), []
+        for d in docs:
+            k = f"{d.ticker or ''}|{d.source_url}"
+            if k not in seen:
+                seen.add(k)
+                links.append(d.id)
+        watch = [w.ticker.upper() for w in s.query(Watchlist).all()]
+        risk = []
+        for tk in watch[:limit]:
+            evs = sorted([r for r in rows if (r.ticker or "").upper() == tk], key=lambda r: r.event_date)
+            risk.append(evs[0].id if evs else None)
+        return today_rows, upcoming_rows, reported, links[: limit * 2], risk
+
+
+def _time(fn, rounds=ROUNDS):
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) / rounds * 1000.0
+
+
+def _read_snapshot():
+    dashboard.invalidate()
+    return asyncio.run(dashboard.get_overview(LIMIT))
+
+
+async def _concurrent(n):
+    dashboard.invalidate()
+    t0 = time.perf_counter()
+    await asyncio.gather(*[dashboard.get_overview(LIMIT) for _ in range(n)])
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def main():
+    engine = _setup()
+    today = date.today()
+    _seed(today)
+    try:
+        in_window = len(legacy_overview(LIMIT, today)[0])  # sanity: the window isn't empty
+        legacy_ms = _time(lambda: legacy_overview(LIMIT, today))
+        sql_ms = _time(lambda: dashboard.load_overview(LIMIT, today=today))
+        asyncio.run(dashboard.update_snapshot())
+        events_ms = _time(lambda: asyncio.run(dashboard.update_snapshot(events=True, documents=False)))
+        docs_ms = _time(lambda: asyncio.run(dashboard.update_snapshot(events=False, documents=True)))
+        read_ms = _time(_read_snapshot)
+        conc_ms = asyncio.run(_concurrent(50))
+        print(f"backend: {engine.dialect.name}  events={N_EVENTS}  today_rows={in_window}")
+        print(f"legacy (window in Python): {legacy_ms:8.1f} ms/request")
+        print(f"load_overview (SQL):       {sql_ms:8.1f} ms/request")
+        print(f"snapshot update, events:   {events_ms:8.1f} ms (after a calendar refresh)")
+        print(f"snapshot update, documents:{docs_ms:8.1f} ms (after an ingest run)")
+        print(f"snapshot read (key lookup):{read_ms:8.1f} ms/request")
+        print(f"50 concurrent get_overview:{conc_ms:8.1f} ms total (one snapshot read)")
+    finally:
+        _cleanup()
+
+
+if __name__ == "__main__":
+    main()
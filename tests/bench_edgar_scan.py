@@ -0,0 +1,58 @@
+"""Per-ticker EDGAR resolution latency: serial vs concurrent filing-detail scanning.
+
+Runs `_edgar_pdf_url_for_ticker` against a local stub that adds a fixed latency
+to every filing-detail request (15 filings: 14 Form 4s without exhibits, then
+the 8-K carrying the ex-99 PDF).
+
+Run from the repo root:  python tests/bench_edgar_scan.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app.routes import discovery  # noqa: E402
+from app.services import http_clients, rate_limit, response_cache  # noqa: E402
+from tests.edgar_stub import point_discovery_at, start_edgar_stub  # noqa: E402
+
+LATENCY = 0.05  # seconds per detail page
+
+
+def _resolve_ms(concurrency: int) -> float:
+    discovery.SEC_SCAN_CONCURRENCY = concurrency
+    response_cache.set_backend(response_cache.MemoryCache())  # cold cache for every run
+
+    async def run():
+        await discovery._load_ticker_map()
+        t0 = time.perf_counter()
+        found = await discovery._edgar_pdf_url_for_ticker("AAPL")
+        elapsed = time.perf_counter() - t0
+        await http_clients.close_clients()
+        assert found and found["url"].endswith(".pdf"), found
+        return elapsed * 1000
+
+    return asyncio.run(run())
+
+
+def main() -> None:
+    server, base, hits = start_edgar_stub(noise_filings=14, latency=LATENCY)
+    point_discovery_at(discovery, base)
+    # Measure scanning, not the EDGAR token bucket
+    rate_limit._limiters["edgar"] = rate_limit.RateLimiter("edgar", 1000.0, 1000)
+    try:
+        base_ms = None
+        for conc in (1, 4, 8, 16):
+            hits.clear()
+            ms = min(_resolve_ms(conc) for _ in range(3))
+            base_ms = base_ms or ms
+            print(f"concurrency={conc:<3} {ms:8.1f} ms  detail requests={len(hits) // 3:3d}  speedup x{base_ms / ms:.2f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
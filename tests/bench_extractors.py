@@ -0,0 +1,82 @@
+"""Throughput benchmark: span scanner vs per-metric regex loops.
+
+Run from the repo root:  python tests/bench_extractors.py
+"""
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app.models.types import Chunk  # noqa: E402
+from app.services.metric_extractors import (  # noqa: E402
+    _first_money,
+    _first_pct,
+    _first_period,
+    extract_series_for_metrics,
+)
+from app.services.span_scanner import first_spans  # noqa: E402
+
+SERIES_METRICS = ["revenue", "gross_margin", "operating_margin", "eps_gaap", "eps_nongaap", "cfo", "capex", "fcf", "fcf_margin"]
+
+PARAS = [
+    "Revenue was $12.4 billion for Q3 2024, up 8% year over year.",
+    "Gross margin was 42.1% compared with 40.3% in Q3 2023.",
+    "Non-GAAP EPS was $1.23 per diluted share in Q3 2024.",
+    "Operating cash flow of $3.1 billion and capital expenditures of $900 million.",
+    "The Company continued to invest in its platform and people across all regions.",
+]
+
+
+def _doc(n_chunks: int):
+    return [
+        Chunk(id=str(i), text="\n".join(PARAS[(i + k) % len(PARAS)] for k in range(8)), section="MD&A", page_start=i, page_end=i)
+        for i in range(n_chunks)
+    ]
+
+
+def _legacy_series(chunks, metrics):
+    # Original shape: re-scan every line once per requested metric
+    lines = [ln.strip() for ln in "\n".join(c.text for c in chunks).splitlines() if ln.strip()]
+    out = {}
+    for m in metrics:
+        vals = []
+        for line in lines:
+            if not _first_period(line):
+                continue
+            v = _first_pct(line) if "margin" in m else _first_money(line)
+            if v is not None:
+                vals.append(v)
+        out[m] = vals
+    return out
+
+
+def _bench(label: str, fn, n_bytes: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<38} {best * 1000:8.1f} ms  {n_bytes / best / 1e6:7.1f} MB/s")
+    return best
+
+
+def main() -> None:
+    chunks = _doc(400)
+    lines = [ln for c in chunks for ln in c.text.splitlines()]
+    n_bytes = sum(len(c.text) for c in chunks)
+    print(f"doc: {len(chunks)} chunks, {len(lines)} lines, {n_bytes / 1e6:.2f} MB")
+
+    a = _bench("helpers: 3 regex searches per line", lambda: [(_first_period(ln), _first_pct(ln), _first_money(ln)) for ln in lines], n_bytes)
+    b = _bench("helpers: first_spans per line", lambda: [first_spans(ln) for ln in lines], n_bytes)
+    print(f"  speedup x{a / b:.2f}")
+
+    a = _bench(f"series: legacy loop ({len(SERIES_METRICS)} metrics)", lambda: _legacy_series(chunks, SERIES_METRICS), n_bytes)
+    b = _bench(f"series: span scanner ({len(SERIES_METRICS)} metrics)", lambda: extract_series_for_metrics(chunks, SERIES_METRICS), n_bytes)
+    print(f"  speedup x{a / b:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Ticker/CIK index: memory and load time vs the old dict-of-dicts map.
+
+Builds a synthetic company_tickers.json payload the size of SEC's (~10k
+entries) and compares the retained heap of both structures (tracemalloc), the
+time to load the saved index file, and lookup latency.
+
+Run from the repo root:  python tests/bench_ticker_index.py
+"""
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from app.services.ticker_index import TickerIndex  # noqa: E402
+
+N = 10_000
+WORDS = ["Holdings", "Inc", "Corp", "Group", "Technologies", "Capital", "Bancorp", "Energy", "Pharmaceuticals", "Trust", "International", "Systems"]
+
+
+def _payload():
+    rnd = random.Random(7)
+    out, seen = {}, set()
+    while len(out) < N:
+        tic = "".join(rnd.choice(string.ascii_uppercase) for _ in range(rnd.randint(1, 5)))
+        if tic in seen:
+            continue
+        seen.add(tic)
+        name = " ".join([rnd.choice(string.ascii_uppercase) + "".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(3, 9)))] + rnd.sample(WORDS, 2))
+        out[str(len(out))] = {"ticker": tic, "cik_str": rnd.randint(1000, 2_000_000), "title": name}
+    return out
+
+
+def _old_map(data):
+    index = {}
+    for _, item in data.items():
+        tic = item.get("ticker")
+        index[tic.upper()] = {"cik": str(item.get("cik_str") or "").strip(), "company": item.get("title") or None}
+    return index
+
+
+def _retained_kb(build, data):
+    tracemalloc.start()
+    obj = build(data)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size / 1024
+
+
+def _per_call_us(fn, qs, reps=20):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for q in qs:
+            fn(q)
+    return (time.perf_counter() - t0) / (reps * len(qs)) * 1e6
+
+
+def main() -> None:
+    data = _payload()
+    old, old_kb = _retained_kb(_old_map, data)
+    idx, idx_kb = _retained_kb(TickerIndex.from_sec_payload, data)
+    print(f"entries={len(idx)}  dict-of-dicts {old_kb:8.0f} KB   TickerIndex {idx_kb:8.0f} KB  (incl. name-word index)")
+
+    path = os.path.join(tempfile.mkdtemp(), "idx.json")
+    idx.save(path)
+    t0 = time.perf_counter()
+    TickerIndex.load(path)
+    print(f"load from file: {(time.perf_counter() - t0) * 1000:.1f} ms  ({os.path.getsize(path) // 1024} KB on disk)")
+
+    qs = list(old)[:500]
+    print(f"exact      dict {_per_call_us(old.get, qs):6.2f} us   index {_per_call_us(idx.get, qs):6.2f} us")
+    print(f"prefix            index {_per_call_us(lambda q: idx.prefix(q[:2]), qs[:100]):8.1f} us")
+    names = [data[k]["title"].split()[0][:4] for k in list(data)[:100]]
+    print(f"name prefix       index {_per_call_us(idx.name_prefix, names):8.1f} us")
+    typos = [data[k]["title"].split()[0][:-1] + "x" for k in list(data)[:20]]
+    print(f"fuzzy             index {_per_call_us(idx.fuzzy, typos, reps=2) / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Ensure `import app` works whether tests are run from repo root or tests/
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,62 @@
+"""Local EDGAR stand-in: ticker map, submissions JSON and filing detail pages with optional latency."""
+import json
+import os
+import tempfile
+import time
+
+from app.services import ticker_index
+
+from tests.stub_server import start_stub
+
+CIK = 320193
+EX99_PDF = "ex99-1_pressrelease.pdf"
+
+
+def start_edgar_stub(noise_filings: int = 8, latency: float = 0.0):
+    """Submissions list `noise_filings` Form 4s (XML primary, no index pages) plus one 8-K whose index links an ex-99 PDF."""
+    hits = []
+    forms, accnos, primaries, dates = [], [], [], []
+    for k in range(noise_filings):
+        forms.append("4")
+        accnos.append(f"0000320193-24-{k:06d}")
+        primaries.append("xslF345X05/wk-form4.xml")
+        dates.append(f"2024-10-{k + 1:02d}")
+    forms.append("8-K")
+    accnos.append("0000320193-24-999999")
+    primaries.append("aapl-20241031.htm")
+    dates.append("2024-10-31")
+    acc8k = accnos[-1]
+    subs = {"filings": {"recent": {"form": forms, "accessionNumber": accnos, "primaryDocument": primaries, "filingDate": dates}}}
+    index_html = f'<a href="{EX99_PDF}">Press release</a> <a href="aapl-20241031.htm">8-K</a>'.encode()
+
+    def archives(req):
+        hits.append(req.path)
+        if latency:
+            time.sleep(latency)
+        if acc8k in req.path or acc8k.replace("-", "") in req.path:
+            return 200, {"Content-Type": "text/html"}, index_html
+        return 404, {}, b"not found"
+
+    routes = {
+        "/files/company_tickers.json": (200, {"Content-Type": "application/json"}, json.dumps({"0": {"ticker": "AAPL", "cik_str": CIK, "title": "Apple Inc."}}).encode()),
+        f"/submissions/CIK{CIK:010d}.json": (200, {"Content-Type": "application/json"}, json.dumps(subs).encode()),
+    }
+
+    class Routes(dict):
+        def get(self, path, default=None):
+            if path.startswith("/Archives/"):
+                return 200, {}, archives
+            return dict.get(self, path, default)
+
+    server, base = start_stub(Routes(routes))
+    return server, base, hits
+
+
+def point_discovery_at(discovery, base: str, setattr_=setattr) -> None:
+    setattr_(discovery, "SEC_WWW", base)
+    setattr_(discovery, "SEC_TICKERS_URL", f"{base}/files/company_tickers.json")
+    setattr_(discovery, "SEC_SUBMISSIONS_BASE", f"{base}/submissions")
+    setattr_(discovery, "SEC_ARCHIVES_BASE", f"{base}/Archives/edgar/data")
+    # Fresh ticker index, saved outside the real TICKER_INDEX_PATH
+    setattr_(ticker_index, "_index", None)
+    setattr_(ticker_index, "TICKER_INDEX_PATH", os.path.join(tempfile.mkdtemp(), "ticker-index.json"))
@@ -0,0 +1,32 @@
+"""Tiny keep-alive HTTP server on localhost for provider client tests."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled connections are reused
+    routes = {}
+
+    def do_GET(self):
+        status, headers, body = self.routes.get(self.path.split("?")[0], (404, {}, b"not found"))
+        if callable(body):
+            status, headers, body = body(self)
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled the request
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(routes):
+    handler = type("Handler", (_Handler,), {"routes": routes})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
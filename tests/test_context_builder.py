@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+from app.models.types import Chunk
+from app.services import qa
+from app.services.context_builder import build_context, estimate_tokens, merge_chunks
+from app.services.metrics import begin_run, end_run
+
+FILLER = "The Company continued to invest in its platform and people across all regions this quarter."
+
+
+def _chunk(cid: str, text: str, page: int) -> Chunk:
+    return Chunk(id=cid, text=text, section="MD&A", page_start=page, page_end=page)
+
+
+def test_overlapping_neighbours_are_merged_once():
+    first = f"{FILLER} Revenue was $12.4 billion, up 8% year over year. Gross margin expanded to 42%."
+    tail = first[-60:]
+    second = f"{tail}\n\nOperating cash flow was $3.1 billion for the quarter."
+    blocks = merge_chunks([_chunk("b", second, 2), _chunk("a", first, 1), _chunk("a", first, 1)])
+    assert len(blocks) == 1
+    b = blocks[0]
+    assert (b.page_start, b.page_end, b.rank) == (1, 2, 0)
+    assert b.text.count("Gross margin expanded") == 1
+    assert "Operating cash flow" in b.text
+
+
+def test_budget_keeps_most_relevant_sentences():
+    chunks = [_chunk(str(i), " ".join([FILLER] * 6), i) for i in range(6)]
+    chunks.append(_chunk("hit", f"{FILLER} Free cash flow guidance for FY2025 is $4 billion.", 9))
+    context, tokens = build_context("What is the free cash flow guidance?", chunks, token_budget=60)
+    assert "Free cash flow guidance for FY2025" in context
+    assert tokens <= 60 and tokens == estimate_tokens(context)
+    assert context.startswith("[ctx1 | p.9-9 | MD&A]")
+
+
+def test_chat_records_prompt_and_completion_tokens(monkeypatch):
+    def create(**kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="- Revenue grew [MD&A, p.1]"))],
+            usage=SimpleNamespace(prompt_tokens=321, completion_tokens=12),
+        )
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(qa, "_client", lambda: fake)
+    begin_run()
+    qa._chat("How did revenue grow?", [_chunk("a", f"{FILLER} Revenue grew 8%.", 1)])
+    llm = end_run()["llm"][f"openai:{qa.QA_MODEL}"]
+    assert (llm["calls"], llm["tokens_in"], llm["tokens_out"]) == (1, 321, 12)
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import base as db_base
+from app.db.models import Base, DashboardSnapshot, Document, EarningsEvent, ResourceVersion, Watchlist
+from app.db.persistence import load_dashboard_snapshot
+from app.services import dashboard
+
+TODAY = date(2026, 10, 19)
+
+
+def _day(days):
+    return (TODAY + timedelta(days=days)).isoformat()
+
+
+def _ms(dt):
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+@pytest.fixture()
+def db(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    tables = [EarningsEvent.__table__, Watchlist.__table__, Document.__table__, DashboardSnapshot.__table__, ResourceVersion.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    monkeypatch.setattr(db_base, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(dashboard, "_cache", {})
+    monkeypatch.setattr(dashboard, "_inflight", {})
+    monkeypatch.setattr(dashboard, "_utc_today", lambda: TODAY)
+    with db_base.db_session() as s:
+        for tk in ("AAPL", "MSFT", "NVDA", "TSLA"):
+            for days in (-8, -3, 0, 2, 15):  # -8 and 15 are outside the window
+                d = TODAY + timedelta(days=days)
+                s.add(EarningsEvent(id=f"{tk}{days}", ticker=tk, company=f"{tk} Inc", event_date=d, status="upcoming"))
+        s.add(Document(id="d1", ticker="aapl", source_url="u1", created_at=datetime(2026, 10, 18)))
+        s.add(Document(id="d2", ticker="aapl", source_url="u1", created_at=datetime(2026, 10, 19)))
+        s.add(Document(id="d3", ticker="msft", source_url="u2", form_type="8-K", created_at=datetime(2026, 10, 17)))
+        s.add(Document(id="d4", ticker="msft", source_url=None, created_at=datetime(2026, 10, 19)))
+    return engine
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_buckets_links_and_fallback_risk(db):
+    data = dashboard.load_overview(2, today=TODAY)
+    assert _ids(data["today"]) == ["AAPL0", "MSFT0"]
+    assert _ids(data["upcoming"]) == ["AAPL2", "MSFT2"]
+    assert _ids(data["reported"]) == ["AAPL-3", "MSFT-3"]  # most recent first, never outside the window
+    # Latest document per (ticker, source_url), newest first
+    assert [(r["doc_id"], r["created_at"]) for r in data["report_links"]] == [
+        ("d2", "2026-10-19T00:00:00+00:00"),
+        ("d3", "2026-10-17T00:00:00+00:00"),
+    ]
+    # No watchlist: the first tickers in the window are followed
+    assert [(r["ticker"], r["event_date"]) for r in data["risk"]] == [("AAPL", _day(-3)), ("MSFT", _day(-3))]
+    assert data["today_on_watchlist"] == ["AAPL", "MSFT"] and data["followed"] == 2
+
+
+def test_watchlist_risk_is_next_event_per_ticker(db):
+    with db_base.db_session() as s:
+        s.add(Watchlist(id="w1", ticker="nvda", created_at=datetime(2026, 1, 1)))
+        s.add(Watchlist(id="w2", ticker="ZZZ", created_at=datetime(2026, 1, 2)))
+        s.add(Watchlist(id="w3", ticker="TSLA", created_at=datetime(2026, 1, 3)))
+    data = dashboard.load_overview(2, today=TODAY)
+    assert [(r["ticker"], r["company"], r["event_date"]) for r in data["risk"]] == [
+        ("NVDA", "NVDA Inc", _day(-3)),
+        ("ZZZ", None, None),  # on the watchlist, nothing in range
+    ]
+    assert data["today_on_watchlist"] == []  # NVDA reports today but isn't in the first `limit` of today's bucket
+    assert dashboard.load_overview(4, today=TODAY)["today_on_watchlist"] == ["NVDA", "TSLA"]
+
+
+def test_snapshot_slices_match_direct_computation(db):
+    snap = dashboard.build_snapshot(TODAY)
+    for limit in (1, 2, 3):
+        assert dashboard.overview_for(snap, limit) == dashboard.load_overview(limit, today=TODAY)
+
+
+def test_concurrent_clients_share_one_snapshot_read(db, monkeypatch):
+    asyncio.run(dashboard.update_snapshot())
+    dashboard.invalidate()
+    reads = []
+    real = dashboard.load_dashboard_snapshot
+    monkeypatch.setattr(dashboard, "load_dashboard_snapshot", lambda key: reads.append(key) or real(key))
+    monkeypatch.setattr(dashboard, "build_snapshot", lambda *a, **k: pytest.fail("stored snapshot should be used"))
+
+    async def run():
+        first = await asyncio.gather(*[dashboard.get_snapshot() for _ in range(20)])
+        again = await dashboard.get_snapshot()
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert reads == ["overview"]
+    assert all(d is first[0] for d in first) and again is first[0]
+
+
+def test_incremental_updates_and_new_report_index(db):
+    snap = asyncio.run(dashboard.update_snapshot())
+    assert [l["doc_id"] for l in snap["report_links"]] == ["d2", "d3"]
+    assert snap["link_times"] == sorted(snap["link_times"])
+    assert dashboard.new_report_count(snap, _ms(datetime(2026, 10, 18))) == 1
+    assert dashboard.new_report_count(snap, _ms(datetime(2026, 10, 1))) == 2
+    assert dashboard.new_report_count(snap, None) == 0
+
+    # An ingest run adds a newer document for an existing link and a new one
+    with db_base.db_session() as s:
+        s.add(Document(id="d5", ticker="MSFT", source_url="u2", created_at=datetime(2026, 10, 20)))
+        s.add(Document(id="d6", ticker="NVDA", source_url="u3", created_at=datetime(2026, 10, 19, 12)))
+        s.add(Watchlist(id="w1", ticker="TSLA", created_at=datetime(2026, 1, 1)))
+    snap = asyncio.run(dashboard.update_snapshot(events=False, documents=True))
+    assert [l["doc_id"] for l in snap["report_links"]] == ["d5", "d6", "d2"]
+    assert dashboard.new_report_count(snap, _ms(datetime(2026, 10, 19))) == 2
+    assert snap["has_watchlist"] is False  # event sections untouched by a documents-only update
+
+    # A calendar refresh / watchlist change recomputes the event sections only
+    snap = asyncio.run(dashboard.update_snapshot(events=True, documents=False))
+    assert [r["ticker"] for r in snap["risk"]] == ["TSLA"]
+    stored = load_dashboard_snapshot("overview")
+    assert [l["doc_id"] for l in stored["report_links"]] == ["d5", "d6", "d2"] and stored["risk"] == snap["risk"]
+    assert dashboard.overview_for(stored, 8) == dashboard.load_overview(8, today=TODAY)
@@ -0,0 +1,73 @@
+import asyncio
+import gzip
+import hashlib
+
+import pytest
+
+from app.services import http_clients
+from app.services.downloads import DownloadError, download, sniff_kind
+from tests.stub_server import start_stub
+
+PDF = b"%PDF-1.7\n" + b"0123456789abcdef" * 4096
+HTML = b"<!-- generated -->\n" + b" " * 2000 + b"<html><body><p>Q3 results</p></body></html>"
+
+
+def _get(base, path, **kw):
+    async def run():
+        try:
+            return await download(http_clients.get_client("generic"), base + path, provider="generic", **kw)
+        finally:
+            await http_clients.close_clients()
+    return asyncio.run(run())
+
+
+@pytest.fixture()
+def stub():
+    server, base = start_stub({
+        "/doc.pdf": (200, {"Content-Type": "application/octet-stream"}, PDF),
+        "/release.htm": (200, {"Content-Type": "text/html"}, HTML),
+        "/archive.zip": (200, {"Content-Type": "application/pdf"}, b"PK\x03\x04" + b"\x00" * 500_000),
+        "/bomb.pdf": (200, {"Content-Type": "application/pdf", "Content-Encoding": "gzip"}, gzip.compress(b"%PDF-1.4" + b"\x00" * 3_000_000)),
+        "/gone.pdf": (404, {}, b"not found"),
+    })
+    yield base
+    server.shutdown()
+
+
+def test_streams_pdf_with_incremental_hash(stub):
+    dl = _get(stub, "/doc.pdf")
+    try:
+        assert dl.kind == "pdf" and dl.size == len(PDF)
+        assert dl.sha256 == hashlib.sha256(PDF).hexdigest()
+        assert dl.read() == PDF
+    finally:
+        dl.close()
+
+
+def test_html_sniffed_past_comment_preamble(stub):
+    dl = _get(stub, "/release.htm")
+    assert dl.kind == "html" and dl.read() == HTML
+    dl.close()
+
+
+def test_rejects_non_document_and_oversized_bodies(stub):
+    with pytest.raises(DownloadError) as e:
+        _get(stub, "/archive.zip")
+    assert e.value.reason == "unsupported_type"  # declared application/pdf, but the bytes say otherwise
+    with pytest.raises(DownloadError) as e:
+        _get(stub, "/doc.pdf", max_bytes=1000)
+    assert e.value.reason == "too_large"  # content-length over the cap: no body read
+    with pytest.raises(DownloadError) as e:
+        _get(stub, "/bomb.pdf", max_bytes=1_000_000)
+    assert e.value.reason == "too_large"  # decoded size over the cap while streaming
+    with pytest.raises(DownloadError) as e:
+        _get(stub, "/gone.pdf")
+    assert e.value.reason == "http_error" and e.value.status_code == 404
+
+
+def test_sniff_kind():
+    assert sniff_kind(b"\xef\xbb\xbf\n<!DOCTYPE html><html>") == "html"
+    assert sniff_kind(b"junk%PDF-1.5") == "pdf"
+    assert sniff_kind(b"<?xml version='1.0'?>\n<document>", "text/html") == "html"
+    assert sniff_kind(b"<?xml version='1.0'?>\n<document>", "application/xml") is None
+    assert sniff_kind(b"\x89PNG\r\n", "application/pdf", "x.pdf") is None
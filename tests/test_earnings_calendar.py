@@ -0,0 +1,183 @@
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import base as db_base
+from app.db.models import Base, CalendarRefresh, EarningsEvent, ResourceVersion
+from app.services import earnings_calendar as cal
+
+
+def _fmp_item(t, d, **kw):
+    return {"ticker": t, "company": kw.get("company"), "event_date": d, "time_of_day": kw.get("tod"), "status": "upcoming", "source": "fmp"}
+
+
+def _fh_item(t, d, **kw):
+    return {"ticker": t, "company": kw.get("company"), "event_date": d, "time_of_day": kw.get("tod"), "status": "upcoming", "source": "finnhub"}
+
+
+def test_merge_field_precedence_and_union():
+    merged = cal.merge_items({
+        "finnhub": [
+            _fh_item("AAPL", "2026-10-30", company="APPLE", tod="AMC"),
+            _fh_item("NVDA", "2026-11-19", tod="AMC"),
+        ],
+        "fmp": [
+            _fmp_item("aapl", "2026-10-30", company="Apple Inc.", tod="BMO"),
+            _fmp_item("MSFT", "2026-10-29", company="Microsoft Corp."),
+            _fmp_item("MSFT", "2026-10-29", tod="AMC"),  # duplicate within a provider fills gaps
+        ],
+    })
+    by = {(m["ticker"], m["event_date"]): m for m in merged}
+    assert set(by) == {("AAPL", "2026-10-30"), ("NVDA", "2026-11-19"), ("MSFT", "2026-10-29")}
+    aapl = by[("AAPL", "2026-10-30")]
+    assert aapl["company"] == "Apple Inc."  # FMP wins company
+    assert aapl["time_of_day"] == "AMC"  # Finnhub wins time of day
+    assert aapl["source"] == "fmp,finnhub"
+    assert by[("NVDA", "2026-11-19")]["source"] == "finnhub"
+    assert by[("MSFT", "2026-10-29")]["company"] == "Microsoft Corp." and by[("MSFT", "2026-10-29")]["time_of_day"] == "AMC"
+
+
+def test_refresh_fetches_concurrently_and_writes_once(monkeypatch):
+    monkeypatch.setenv("FMP_API_KEY", "k1")
+    monkeypatch.setenv("FINNHUB_API_KEY", "k2")
+
+    async def slow_fmp(start, end, key):
+        await asyncio.sleep(0.3)
+        return [_fmp_item("AAPL", "2026-10-30", company="Apple Inc.")]
+
+    async def slow_fh(start, end, key):
+        await asyncio.sleep(0.3)
+        return [_fh_item("AAPL", "2026-10-30", tod="AMC"), _fh_item("TSLA", "2026-10-22")]
+
+    async def broken(start, end, key):
+        raise RuntimeError("boom")
+
+    writes = []
+    monkeypatch.setattr(cal, "fetch_earnings_calendar_fmp", slow_fmp)
+    monkeypatch.setattr(cal, "fetch_earnings_calendar_finnhub", slow_fh)
+    monkeypatch.setattr(cal, "upsert_earnings_events", lambda items, source: writes.append(items) or len(items))
+
+    t0 = time.perf_counter()
+    summary = asyncio.run(cal.refresh_calendar(date(2026, 10, 20), date(2026, 11, 2)))
+    assert time.perf_counter() - t0 < 0.55  # slowest provider, not the sum
+    assert summary["providers"] == {"fmp": 1, "finnhub": 2} and summary["written"] == 2
+    assert len(writes) == 1 and len(writes[0]) == 2
+
+    # A failing provider doesn't sink the others
+    monkeypatch.setattr(cal, "fetch_earnings_calendar_fmp", broken)
+    summary = asyncio.run(cal.refresh_calendar(date(2026, 10, 20), date(2026, 11, 2)))
+    assert summary["providers"] == {"fmp": 0, "finnhub": 2} and summary["merged"] == 2
+
+
+def test_unconfigured_providers_are_not_called(monkeypatch):
+    monkeypatch.delenv("FMP_API_KEY", raising=False)
+    monkeypatch.delenv("FINNHUB_API_KEY", raising=False)
+    assert asyncio.run(cal.fetch_all(date(2026, 10, 20), date(2026, 10, 21))) == {}
+
+
+def test_get_calendar_serves_stale_and_refreshes_once_in_background(monkeypatch):
+    for name in ("_cache", "_refreshed_at", "_inflight"):
+        monkeypatch.setattr(cal, name, {})
+    db = {"rows": []}
+    loads, refreshes = [], []
+    release = None
+
+    def fake_load(start, end):
+        loads.append((start, end))
+        return list(db["rows"])
+
+    async def fake_refresh(start, end):
+        refreshes.append((start, end))
+        await release.wait()
+        db["rows"] = [{"id": "1", "ticker": "AAPL", "company": None, "event_date": start, "time_of_day": None, "status": "upcoming"}]
+        return {}
+
+    monkeypatch.setattr(cal, "load_calendar", fake_load)
+    monkeypatch.setattr(cal, "refresh_calendar", fake_refresh)
+    start, end = date(2026, 10, 30), date(2026, 10, 31)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        # Empty, never-refreshed range: readers return at once; one refresh between them
+        first = await asyncio.gather(*[cal.get_calendar(start, end) for _ in range(5)])
+        assert all(r == [] for r in first)
+        assert refreshes == [(start, end)]
+        assert len(loads) <= 5
+        n_loads = len(loads)
+        assert await cal.get_calendar(start, end) == [] and len(loads) == n_loads  # cached
+        task = cal._inflight[(start, end)]
+        release.set()
+        await task
+        # Refresh completion invalidated the cache; range is fresh now
+        rows = await cal.get_calendar(start, end)
+        assert [r["ticker"] for r in rows] == ["AAPL"]
+        assert refreshes == [(start, end)] and not cal.is_stale(start, end)
+
+    asyncio.run(run())
+
+
+def test_cache_is_bounded_and_skips_rows_read_across_a_refresh(monkeypatch):
+    monkeypatch.setattr(cal, "_cache", {})
+    monkeypatch.setattr(cal, "_refreshed_at", {})
+    monkeypatch.setattr(cal, "CALENDAR_CACHE_MAX_ENTRIES", 2)
+    monkeypatch.setattr(cal, "is_stale", lambda start, end: False)
+    invalidate_during_read = []
+
+    def fake_load(start, end):
+        if invalidate_during_read:
+            cal._invalidate(start, end)  # a background refresh completes mid-read
+        return [{"id": str(start)}]
+
+    monkeypatch.setattr(cal, "load_calendar", fake_load)
+    days = [date(2026, 11, d) for d in (1, 2, 3)]
+
+    async def run():
+        for d in days:
+            await cal.get_calendar(d, d)
+        assert list(cal._cache) == [(days[1], days[1]), (days[2], days[2])]  # least recently used dropped
+        await cal.get_calendar(days[1], days[1])
+        assert list(cal._cache)[-1] == (days[1], days[1])
+        invalidate_during_read.append(True)
+        await cal.get_calendar(days[0], days[0])
+        assert (days[0], days[0]) not in cal._cache
+
+    asyncio.run(run())
+
+
+def test_freshness_is_shared_through_the_db(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[CalendarRefresh.__table__, EarningsEvent.__table__, ResourceVersion.__table__])
+    monkeypatch.setattr(db_base, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.delenv("FMP_API_KEY", raising=False)
+    monkeypatch.delenv("FINNHUB_API_KEY", raising=False)
+    for name in ("_cache", "_refreshed_at", "_inflight"):
+        monkeypatch.setattr(cal, name, {})
+    start, end = date(2026, 10, 30), date(2026, 11, 1)
+    real_refresh, refreshes = cal.refresh_calendar, []
+
+    async def counting_refresh(start, end):
+        refreshes.append((start, end))
+        return await real_refresh(start, end)
+
+    monkeypatch.setattr(cal, "refresh_calendar", counting_refresh)
+
+    async def run():
+        await cal.get_calendar(start, end)
+        await cal._inflight[(start, end)]
+        assert refreshes == [(start, end)]
+        # Another process (or a restart): no stamps of its own, but the DB says the range is fresh
+        cal._refreshed_at.clear()
+        cal._cache.clear()
+        await cal.get_calendar(date(2026, 10, 31), end)
+        assert refreshes == [(start, end)] and not cal._inflight
+        # A day nobody has refreshed still triggers one
+        await cal.get_calendar(start, date(2026, 11, 2))
+        await cal._inflight[(start, date(2026, 11, 2))]
+        assert refreshes[-1] == (start, date(2026, 11, 2))
+
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.persistence import earnings_event_rows, earnings_upsert_stmt
+
+
+def test_rows_deduped_within_batch():
+    rows = earnings_event_rows([
+        {"ticker": "aapl", "event_date": "2026-10-30", "company": None, "time_of_day": None},
+        {"ticker": "AAPL", "event_date": "2026-10-30", "company": "Apple Inc.", "time_of_day": "AMC"},
+        {"ticker": "AAPL", "event_date": "2026-10-30", "company": "Apple", "time_of_day": "BMO"},
+        {"ticker": "MSFT", "event_date": "2026-10-31", "status": "reported"},
+        {"ticker": "BAD", "event_date": "10/31/2026"},
+    ], "fmp")
+    assert [(r["ticker"], r["event_date"]) for r in rows] == [("AAPL", date(2026, 10, 30)), ("MSFT", date(2026, 10, 31))]
+    aapl, msft = rows
+    # later duplicates only fill gaps, like the per-row refresh did
+    assert (aapl["company"], aapl["time_of_day"], aapl["status"]) == ("Apple Inc.", "AMC", "upcoming")
+    assert msft["status"] == "reported" and msft["source"] == "fmp"
+
+
+def test_upsert_is_single_statement_filling_missing_fields():
+    rows = earnings_event_rows([{"ticker": f"T{i}", "event_date": "2026-11-02"} for i in range(3)], "finnhub")
+    sql = str(earnings_upsert_stmt(rows).compile(dialect=postgresql.dialect()))
+    assert sql.count("INSERT INTO earnings_events") == 1
+    assert "ON CONFLICT (ticker, event_date) DO UPDATE" in sql
+    assert "company = coalesce(nullif(earnings_events.company" in sql
+    assert "WHERE" in sql.split("DO UPDATE", 1)[1]  # unchanged rows are not rewritten
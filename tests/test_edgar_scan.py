@@ -0,0 +1,103 @@
+import asyncio
+
+from app.routes import discovery
+from app.services import http_clients, rate_limit, response_cache
+from tests.edgar_stub import CIK, EX99_PDF, point_discovery_at, start_edgar_stub
+
+
+def _resolve(concurrency, monkeypatch, base):
+    monkeypatch.setattr(discovery, "SEC_SCAN_CONCURRENCY", concurrency)
+    response_cache.set_backend(response_cache.MemoryCache())
+
+    async def run():
+        try:
+            return await discovery._edgar_pdf_url_for_ticker("AAPL")
+        finally:
+            await http_clients.close_clients()
+
+    return asyncio.run(run())
+
+
+def test_concurrent_scan_matches_serial_and_stops_at_ex99_pdf(monkeypatch):
+    server, base, hits = start_edgar_stub(noise_filings=6)
+    point_discovery_at(discovery, base, monkeypatch.setattr)
+    monkeypatch.setitem(rate_limit._limiters, "edgar", rate_limit.RateLimiter("edgar", 1000.0, 1000))
+    try:
+        serial = _resolve(1, monkeypatch, base)
+        serial_hits = len(hits)
+        hits.clear()
+        concurrent = _resolve(4, monkeypatch, base)
+    finally:
+        server.shutdown()
+        response_cache.set_backend(None)
+    assert serial == concurrent
+    assert serial["url"].endswith(EX99_PDF) and serial["form_type"] == "8-K"
+    assert serial["referer"].startswith(f"{base}/Archives/edgar/data/{CIK}/")
+    # 6 Form 4s x 3 detail pages, then only the first 8-K page: the ex-99 PDF settles it
+    assert serial_hits == 6 * 3 + 1
+    assert len(hits) <= 6 * 3 + 3
+
+
+def test_detail_candidates_single_pass_keeps_kind_order_and_scores():
+    html = (
+        '<a href="d1.htm">Form</a><a href="/Archives/x/ex99-1press.pdf">A</a>'
+        "<a href='Q3-Results.HTML'>B</a><a href=\"https://www.sec.gov/y/logo.pdf\">C</a>"
+        '<a href="ex-99_april.htm">D</a><a href="notes.txt">E</a>'
+    )
+    got = discovery._detail_candidates(html, "https://www.sec.gov/base/")
+    assert got == [
+        ("pdf", discovery.SEC_WWW + "/Archives/x/ex99-1press.pdf", 6),
+        ("pdf", "https://www.sec.gov/y/logo.pdf", 1),
+        ("html", "https://www.sec.gov/base/d1.htm", 1),
+        ("html", "https://www.sec.gov/base/Q3-Results.HTML", 3),
+        ("html", "https://www.sec.gov/base/ex-99_april.htm", 6),  # 'pr' in 'april' counts for HTML
+    ]
+
+
+def test_scored_exhibits_are_cached_instead_of_pages(monkeypatch):
+    server, base, hits = start_edgar_stub(noise_filings=2)
+    point_discovery_at(discovery, base, monkeypatch.setattr)
+    monkeypatch.setitem(rate_limit._limiters, "edgar", rate_limit.RateLimiter("edgar", 1000.0, 1000))
+    backend = response_cache.MemoryCache()
+    try:
+        first = _resolve(1, monkeypatch, base)
+        response_cache.set_backend(backend)
+        hits.clear()
+        asyncio.run(discovery._edgar_pdf_url_for_ticker("AAPL"))
+        cold = len(hits)
+        hits.clear()
+        again = asyncio.run(discovery._edgar_pdf_url_for_ticker("AAPL"))
+    finally:
+        server.shutdown()
+        response_cache.set_backend(None)
+    assert again == first
+    # only the Form 4 pages (404s, never cached) are requested again; the 8-K index comes from the cache
+    assert len(hits) == cold - 1 and not any("999999" in h for h in hits)
+    detail_entries = {k: e.value for k, e in backend._data.items() if k.startswith("exhibits:")}
+    assert detail_entries and all(isinstance(v, list) for v in detail_entries.values())
+    assert all(k.startswith("exhibits:") for k in backend._data if "/Archives/" in k)
+
+
+def test_latest_filing_probe(monkeypatch):
+    server, base, hits = start_edgar_stub(noise_filings=3)
+    point_discovery_at(discovery, base, monkeypatch.setattr)
+    response_cache.set_backend(response_cache.MemoryCache())
+
+    async def run():
+        try:
+            return (
+                await discovery._edgar_latest_filing("AAPL", ["8-K", "10-Q"]),
+                await discovery._edgar_latest_filing("AAPL", ["4"]),
+                await discovery._edgar_latest_filing("NOPE"),
+            )
+        finally:
+            await http_clients.close_clients()
+
+    try:
+        eightk, form4, unknown = asyncio.run(run())
+    finally:
+        server.shutdown()
+        response_cache.set_backend(None)
+    assert eightk == {"accession": "0000320193-24-999999", "form": "8-K", "filed": "2024-10-31"}
+    assert form4["accession"] == "0000320193-24-000002" and unknown is None
+    assert hits == []  # submissions only, no filing pages
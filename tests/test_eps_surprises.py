@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services import eps_surprises as eps
+
+
+@pytest.fixture()
+def providers(monkeypatch):
+    monkeypatch.setenv("FINNHUB_API_KEY", "k1")
+    monkeypatch.setenv("ALPHA_VANTAGE_API_KEY", "k2")
+    monkeypatch.setattr(eps, "_memory", {})
+    monkeypatch.setattr(eps, "_inflight", {})
+    calls = []
+    data = {
+        "finnhub": [{"period": "2026-06-30", "reported_eps": 1.2, "estimated_eps": 1.1, "provider": "finnhub"}],
+        "alpha_vantage": [
+            {"period": "2026-06-30", "reported_eps": 1.2, "estimated_eps": 1.1, "provider": "alpha_vantage"},
+            {"period": "2026-03-31", "reported_eps": 0.9, "estimated_eps": 1.0, "provider": "alpha_vantage"},
+        ],
+    }
+
+    def fake(name):
+        async def fetch(ticker, key, limit=4):
+            calls.append((name, ticker))
+            await asyncio.sleep(0.05)
+            return list(data[name])
+        return fetch
+
+    monkeypatch.setattr(eps, "finnhub_eps", fake("finnhub"))
+    monkeypatch.setattr(eps, "av_eps", fake("alpha_vantage"))
+    return calls, data
+
+
+def test_single_flight_and_ttl_cache(providers):
+    calls, _ = providers
+
+    async def run():
+        first = await asyncio.gather(*[eps.get_entry("AAPL") for _ in range(10)])
+        again = await eps.get_entry("AAPL")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert sorted(calls) == [("alpha_vantage", "AAPL"), ("finnhub", "AAPL")]  # one fetch per provider
+    assert all(e is first[0] for e in first) and again is first[0]
+    assert [it["period"] for it in again["items"]] == ["2026-06-30", "2026-03-31"]  # deduped, newest first
+    assert again["sources"] == ["finnhub", "alpha_vantage"]
+
+
+def test_bulk_read_uses_known_entries_and_refetches_stale(providers, monkeypatch):
+    calls, data = providers
+    fresh = {"items": [{"period": "2026-06-30", "reported_eps": 2.0}], "sources": ["finnhub"], "fetched_at": eps.time.time()}
+    stale = {"items": [{"period": "2025-12-31", "reported_eps": 0.5}], "sources": ["finnhub"], "fetched_at": 0.0}
+    data["finnhub"] = []
+    data["alpha_vantage"] = []  # providers come back empty (quota): stale items are kept
+
+    out = asyncio.run(eps.get_entries(["MSFT", "NVDA", "TSLA"], {"MSFT": fresh, "NVDA": stale, "TSLA": None}))
+    assert out["MSFT"] is fresh
+    assert {t for _, t in calls} == {"NVDA", "TSLA"}
+    assert out["NVDA"]["items"] == stale["items"] and out["NVDA"]["fetched_at"] > 0
+    assert out["TSLA"]["items"] == []
+    # max_age forces a refresh of entries that are still within the TTL
+    calls.clear()
+    asyncio.run(eps.get_entries(["MSFT"], max_age=0))
+    assert {t for _, t in calls} == {"MSFT"}
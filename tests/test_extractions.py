@@ -0,0 +1,58 @@
+from app.memory import store
+from app.models.types import Chunk
+from app.services.extractions import EXTRACTOR_VERSION, get_extractions
+
+
+def _seed(doc_id: str):
+    chunks = [
+        Chunk(id="c1", section="MD&A", page_start=1, page_end=1, text="Revenue was $100 million in Q3 2024. Gross margin was 42%."),
+        Chunk(id="c2", section="Outlook", page_start=2, page_end=2, text="Our outlook: Q4 2024 revenue of $110 to $120 million."),
+    ]
+    store.documents[doc_id] = {"chunks": chunks, "embeddings": []}
+    return chunks
+
+
+def test_extractions_are_memoised_on_the_doc_entry():
+    doc_id = "test-doc-extractions"
+    _seed(doc_id)
+    first = get_extractions(doc_id)
+    assert first["metrics"]["revenue"]["value"] == 100.0
+    assert first["guidance"]["guidance"][0]["range"] == [110.0, 120.0]
+    assert set(first["series"]) >= {"money", "pct"}
+    assert get_extractions(doc_id) is first
+    store.documents.pop(doc_id, None)
+
+
+def test_stale_extractor_version_is_recomputed():
+    doc_id = "test-doc-extractions-stale"
+    _seed(doc_id)
+    store.documents[doc_id]["extractions"] = (EXTRACTOR_VERSION - 1, {"metrics": {}})
+    data = get_extractions(doc_id)
+    assert "revenue" in data["metrics"]
+    assert store.documents[doc_id]["extractions"][0] == EXTRACTOR_VERSION
+    store.documents.pop(doc_id, None)
+
+
+def test_unknown_doc_returns_none():
+    assert get_extractions("missing-doc") is None
+
+
+def test_batch_endpoint_returns_partial_results():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    _seed("test-doc-batch-a")
+    _seed("test-doc-batch-b")
+    store.documents["test-doc-batch-b"]["meta"] = {"ticker": "ACME"}
+    client = TestClient(app)
+    r = client.post("/api/metrics/batch", json={"doc_ids": ["test-doc-batch-a", "missing-doc"], "tickers": ["acme", "NOPE"]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["requested"] == 4 and body["success"] == 2
+    by_key = {(it["doc_id"], it["ticker"]): it for it in body["items"]}
+    assert by_key[("test-doc-batch-a", None)]["data"]["metrics"]["revenue"]["value"] == 100.0
+    assert by_key[("test-doc-batch-b", "ACME")]["ok"]
+    assert not by_key[("missing-doc", None)]["ok"]
+    assert not by_key[(None, "NOPE")]["ok"]
+    for d in ("test-doc-batch-a", "test-doc-batch-b"):
+        store.documents.pop(d, None)
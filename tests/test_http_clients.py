@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import http_clients, rate_limit
+from app.services.metrics import begin_run, end_run
+from app.services.rate_limit import get_limiter
+from tests.stub_server import start_stub
+
+
+def test_shared_client_reuses_pooled_connections():
+    server, base = start_stub({"/ping": (200, {"Content-Type": "application/json"}, b'{"ok": true}')})
+
+    async def run():
+        begin_run()
+        client = http_clients.get_client("generic")
+        assert http_clients.get_client("generic") is client
+        for _ in range(5):
+            r = await client.get(f"{base}/ping")
+            assert r.json() == {"ok": True}
+        stats = http_clients.pool_stats()["generic"]
+        await http_clients.close_clients()
+        return end_run()["pool"]["generic"], stats
+
+    try:
+        pool, stats = asyncio.run(run())
+    finally:
+        server.shutdown()
+    assert pool["requests"] == 5
+    assert pool["new_connections"] == 1
+    assert pool["reuse_ratio"] == 0.8
+    assert stats["open"] == 1 and stats["idle"] == 1
+
+
+def test_loop_change_closes_previous_clients():
+    server, base = start_stub({"/ping": (200, {"Content-Type": "application/json"}, b'{"ok": true}')})
+
+    async def open_client():
+        client = http_clients.get_client("generic")
+        await client.get(f"{base}/ping")
+        return client
+
+    async def switch():
+        return http_clients.get_client("generic")
+
+    first_loop = asyncio.new_event_loop()
+    try:
+        old = first_loop.run_until_complete(open_client())
+        new = asyncio.run(switch())
+        assert new is not old and not old.is_closed
+        first_loop.run_until_complete(asyncio.sleep(0.05))  # closed on the loop that owns its connections
+        assert old.is_closed and not new.is_closed
+    finally:
+        first_loop.close()
+        server.shutdown()
+
+
+def test_interactive_request_does_not_outwait_its_timeout():
+    server, base = start_stub({"/ping": (200, {"Content-Type": "application/json"}, b'{"ok": true}')})
+
+    async def run():
+        get_limiter("alpha_vantage").backoff(120.0)  # e.g. after a 429 with Retry-After
+        client = http_clients.get_client("alpha_vantage")
+        try:
+            with pytest.raises(httpx.PoolTimeout):
+                await client.get(f"{base}/ping", timeout=2.0)
+        finally:
+            await http_clients.close_clients()
+
+    try:
+        asyncio.run(asyncio.wait_for(run(), 1.0))
+    finally:
+        rate_limit._limiters.pop("alpha_vantage", None)
+        server.shutdown()
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services import ingest_ledger, ingest_pipeline
+
+
+def _plan(monkeypatch, ledger, filings):
+    monkeypatch.setattr(ingest_ledger, "_memory_ledger", dict(ledger))
+
+    async def latest(ticker, forms, ttl=None):
+        return filings.get(ticker)
+
+    monkeypatch.setattr(ingest_ledger, "_edgar_latest_filing", latest)
+    return asyncio.run(ingest_ledger.plan(["AAPL", "MSFT", "NVDA", "TSLA", "ACME"]))
+
+
+def test_plan_skips_tickers_without_new_filings(monkeypatch):
+    now = datetime.now(timezone.utc)
+    ledger = {
+        "AAPL": {"accession": "0001-24-1", "source_url": "https://sec/aapl.pdf", "doc_id": "d1", "ingested_at": now},
+        "MSFT": {"accession": "0002-24-1", "source_url": "https://sec/msft.pdf", "doc_id": "d2", "ingested_at": now},
+        "TSLA": {"accession": None, "source_url": "https://cdn/tsla.pdf", "doc_id": "d3", "ingested_at": now},  # not an SEC filer
+        "ACME": {"accession": None, "source_url": "https://cdn/acme.pdf", "doc_id": "d4", "ingested_at": now - timedelta(days=2)},
+    }
+    filings = {
+        "AAPL": {"accession": "0001-24-1", "form": "8-K", "filed": "2026-10-01"},  # unchanged
+        "MSFT": {"accession": "0002-24-9", "form": "8-K", "filed": "2026-10-19"},  # new 8-K
+        "NVDA": {"accession": "0003-24-5", "form": "10-Q", "filed": "2026-10-18"},  # never ingested
+    }
+    plan = _plan(monkeypatch, ledger, filings)
+    assert plan.tickers == ["MSFT", "NVDA", "ACME"]
+    assert plan.skipped == [
+        {"ticker": "AAPL", "reason": "no_new_filing", "accession": "0001-24-1"},
+        {"ticker": "TSLA", "reason": "ingested_today"},
+    ]
+    assert plan.accessions["NVDA"] == "0003-24-5"
+    assert plan.known_sources == {"MSFT": "https://sec/msft.pdf", "ACME": "https://cdn/acme.pdf"}
+
+
+def test_same_resolved_source_is_skipped_before_download(monkeypatch):
+    downloaded = []
+
+    async def resolve(job):
+        job.pdf_url = f"https://cdn/{job.ticker.lower()}.pdf"
+        return job
+
+    async def download(job):
+        downloaded.append(job.ticker)
+        raise RuntimeError("offline")
+
+    monkeypatch.setattr(ingest_pipeline, "resolve_symbol_source", resolve)
+    monkeypatch.setattr(ingest_pipeline, "download_symbol_source", download)
+    items, stats = asyncio.run(ingest_pipeline.ingest_symbols(["ACME", "NEWCO"], known_sources={"ACME": "https://cdn/acme.pdf"}))
+    by = {it["ticker"]: it for it in items}
+    assert by["ACME"] == {"ticker": "ACME", "ok": True, "skipped": "same_source", "source_url": "https://cdn/acme.pdf"}
+    assert by["NEWCO"]["ok"] is False and downloaded == ["NEWCO"]
+    assert stats["stages"]["resolve"]["skipped"] == 1
+
+
+def test_record_updates_memory_ledger(monkeypatch):
+    monkeypatch.setattr(ingest_ledger, "_memory_ledger", {})
+    ingest_ledger.record("NVDA", "0003-24-5", "https://sec/nvda.pdf", "d9")
+    e = ingest_ledger._memory_ledger["NVDA"]
+    assert (e["accession"], e["source_url"], e["doc_id"]) == ("0003-24-5", "https://sec/nvda.pdf", "d9")
+    assert ingest_ledger._ingested_today(e)
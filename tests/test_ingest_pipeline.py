@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from app.services.ingest_pipeline import Stage, run_pipeline
+
+
+def test_stages_overlap_and_failures_skip_later_stages():
+    seen_persist = []
+    spans = {"fetch": [], "parse": []}  # (start, end) per call
+
+    async def fetch(x):
+        t = time.perf_counter()
+        await asyncio.sleep(0.02)
+        spans["fetch"].append((t, time.perf_counter()))
+        if x == 3:
+            raise RuntimeError("404 for 3")
+        return x
+
+    def parse(x):
+        t = time.perf_counter()
+        time.sleep(0.02)  # CPU-ish, runs in a worker thread
+        spans["parse"].append((t, time.perf_counter()))
+        return x * 10
+
+    def persist(x):
+        seen_persist.append(x)
+        return x
+
+    stages = [Stage("fetch", fetch, 4, 2), Stage("parse", parse, 2, 2), Stage("persist", persist, 1, 2)]
+    results, stats = asyncio.run(run_pipeline(list(range(8)), stages))
+
+    ok = sorted(item for item, err in results if err is None)
+    failed = [(item, str(err)) for item, err in results if err is not None]
+    assert ok == [0, 10, 20, 40, 50, 60, 70]
+    assert failed == [(3, "404 for 3")]
+    assert sorted(seen_persist) == ok
+    # Stages overlap: fetches run concurrently, and a parse ran while a fetch was in flight
+    def overlaps(a, b):
+        return a[0] < b[1] and b[0] < a[1]
+
+    fetches = spans["fetch"]
+    assert any(overlaps(a, b) for i, a in enumerate(fetches) for b in fetches[i + 1:])
+    assert any(overlaps(p, f) for p in spans["parse"] for f in fetches)
+    st = stats["stages"]
+    assert st["fetch"]["processed"] == 7 and st["fetch"]["errors"] == 1
+    assert st["parse"]["processed"] == 7 and st["persist"]["processed"] == 7
+    for name in ("fetch", "parse", "persist"):
+        assert st[name]["queue_depth_max"] <= 2  # bounded queues
+        assert st[name]["items_per_s"] > 0
+
+
+def test_empty_input():
+    results, stats = asyncio.run(run_pipeline([], [Stage("a", lambda x: x, 2, 1)]))
+    assert results == [] and stats["stages"]["a"]["processed"] == 0
@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ingest_queue
+
+client = TestClient(app)
+
+
+def test_batch_endpoints_need_database():
+    r = client.post("/api/ingest/batch", json={"tickers": ["AAPL"]})
+    assert r.status_code == 503
+    assert client.get("/api/ingest/jobs/abc").status_code == 503
+
+
+def _run_with(monkeypatch, job, outcome):
+    finished = []
+    monkeypatch.setattr(ingest_queue, "claim_ingest_job", lambda worker_id: job)
+    monkeypatch.setattr(ingest_queue, "finish_ingest_job", lambda *a: finished.append(a))
+
+    async def fake_run(j):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(ingest_queue, "run_job", fake_run)
+    assert asyncio.run(ingest_queue.process_one("w1")) is True
+    return finished
+
+
+def test_process_one_records_success_and_retries(monkeypatch):
+    job = {"id": "j1", "kind": "symbol", "payload": {"ticker": "AAPL"}, "attempts": 1, "max_attempts": 3}
+    assert _run_with(monkeypatch, job, "doc-1") == [("j1", "doc-1")]
+    # transient error: re-queued with backoff
+    [(jid, doc, err, retry)] = _run_with(monkeypatch, job, RuntimeError("connect timeout"))
+    assert (jid, doc, err) == ("j1", None, "connect timeout") and retry == ingest_queue.retry_delay(1)
+    # permanent error: failed immediately
+    [(_, _, err, retry)] = _run_with(monkeypatch, job, HTTPException(status_code=404, detail="No PDF source found for AAPL"))
+    assert err == "No PDF source found for AAPL" and retry is None
+    # last attempt: failed
+    last = dict(job, attempts=3)
+    [(_, _, _, retry)] = _run_with(monkeypatch, last, HTTPException(status_code=502, detail="upstream"))
+    assert retry is None
+
+
+def test_empty_queue_and_backoff(monkeypatch):
+    monkeypatch.setattr(ingest_queue, "claim_ingest_job", lambda worker_id: None)
+    assert asyncio.run(ingest_queue.process_one("w1")) is False
+    delays = [ingest_queue.retry_delay(n) for n in (1, 2, 3, 20)]
+    assert delays[0] < delays[1] < delays[2] and delays[3] == 3600.0
+    assert ingest_queue.is_permanent(HTTPException(status_code=429)) is False
@@ -0,0 +1,39 @@
+from app.models.types import Chunk
+from app.services.keyword_index import build_keyword_index
+from app.services.metric_extractors import (
+    build_trigger_index,
+    extract_buybacks,
+    extract_core_metrics,
+    extract_guidance,
+)
+
+
+def _chunks():
+    return [
+        Chunk(id="a", text="Share Repurchase program expanded.", section="Capital", page_start=1, page_end=1),
+        Chunk(id="b", text="Deferred revenue grew to $40 million.", section="MD&A", page_start=2, page_end=2),
+        Chunk(id="c", text="Revenue was $300 million for Q2 2024.", section="MD&A", page_start=3, page_end=3),
+        Chunk(id="d", text="Nothing relevant here.", section=None, page_start=4, page_end=4),
+        Chunk(id="e", text="Non-GAAP EPS was $0.91 per diluted share", section="MD&A", page_start=5, page_end=5),
+    ]
+
+
+def test_overlapping_phrases_are_all_reported():
+    idx = build_keyword_index(_chunks(), ["repurchase", "share repurchase", "revenue", "eps"])
+    assert idx.hits(0) == {"repurchase", "share repurchase"}
+    assert idx.candidates(["revenue"]) == [1, 2]
+    assert idx.candidates(["eps", "share repurchase"]) == [0, 4]
+    assert idx.hits(3) == frozenset()
+
+
+def test_extractors_match_with_shared_index():
+    chunks = _chunks()
+    idx = build_trigger_index(chunks)
+    m = extract_core_metrics(chunks, idx)
+    # Deferred revenue chunk is skipped; first qualifying revenue comes from chunk c
+    assert m["revenue"]["value"] == 300.0
+    assert m["revenue"]["period"] == "Q2 2024"
+    assert m["eps_nongaap"]["value"] == 0.91
+    assert m == extract_core_metrics(chunks)
+    assert extract_guidance(chunks, idx) == {"guidance": []}
+    assert len(extract_buybacks(chunks, idx)["buybacks"]) == 1
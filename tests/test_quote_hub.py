@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from websockets.asyncio.server import serve
+
+from app.services import quote_hub
+from app.services.quote_hub import QuoteHub
+
+
+class FinnhubWsStub:
+    """Local stand-in for wss://ws.finnhub.io: records subscriptions, lets the test push trades."""
+
+    def __init__(self):
+        self.connections = []
+        self.subscribed = set()
+        self.ready = asyncio.Event()
+
+    async def handler(self, ws):
+        self.connections.append(ws)
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["type"] == "subscribe":
+                self.subscribed.add(msg["symbol"])
+            elif msg["type"] == "unsubscribe":
+                self.subscribed.discard(msg["symbol"])
+            if self.subscribed:
+                self.ready.set()
+
+    async def trades(self, *trades):
+        data = [{"s": s, "p": p, "t": t, "v": 1} for s, p, t in trades]
+        await self.connections[-1].send(json.dumps({"type": "trade", "data": data}))
+
+
+async def _next(updates, timeout=2.0):
+    return await asyncio.wait_for(updates.__anext__(), timeout)
+
+
+def test_hub_fans_out_diffs_from_one_upstream(monkeypatch):
+    async def seed_quotes(symbols, api_key):
+        return {s: {"ticker": s, "price": 100.0, "change": 1.0} for s in symbols}
+
+    monkeypatch.setattr(quote_hub, "get_quotes", seed_quotes)
+    stub = FinnhubWsStub()
+
+    async def run():
+        async with serve(stub.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setattr(quote_hub, "FINNHUB_WS_URL", f"ws://127.0.0.1:{port}")
+            hub = QuoteHub(symbols_loader=lambda: ["aapl", "MSFT"], api_key="k")
+            a = hub.updates(keepalive=0.2)
+            b = hub.updates({"MSFT"}, keepalive=0.2)
+            try:
+                snap_a = await _next(a)
+                while len(snap_a) < 2:  # seeds may land one by one
+                    snap_a += await _next(a)
+                assert {q["ticker"] for q in snap_a} == {"AAPL", "MSFT"}
+                assert all(q["change_percent"] == round(1 / 99 * 100, 4) for q in snap_a)
+                assert [q["ticker"] for q in await _next(b)] == ["MSFT"]
+
+                await asyncio.wait_for(stub.ready.wait(), 2)
+                while stub.subscribed != {"AAPL", "MSFT"}:
+                    await asyncio.sleep(0.01)
+                # Three AAPL trades in one message, MSFT unchanged from its seed
+                await stub.trades(("AAPL", 100.5, 1_000), ("AAPL", 101.0, 2_000), ("MSFT", 100.0, 2_000), ("AAPL", 102.0, 3_000))
+                changed = await _next(a)
+                assert [(q["ticker"], q["price"]) for q in changed] == [("AAPL", 102.0)]
+                assert await _next(b) == []  # MSFT didn't change: only a keepalive
+                assert [t.price for t in hub.recent_ticks("AAPL")] == [100.0, 100.5, 101.0, 102.0]
+                assert hub.recent_ticks("AAPL", 1)[0].ts == 3.0
+
+                # Same price again: nothing sent to anyone
+                await stub.trades(("AAPL", 102.0, 4_000))
+                assert await _next(a) == []
+                assert len(stub.connections) == 1  # one upstream subscription for all clients
+            finally:
+                await a.aclose()
+                await b.aclose()
+                await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_symbol_set_is_capped_and_pruned(monkeypatch):
+    monkeypatch.setattr(quote_hub, "QUOTE_HUB_MAX_SYMBOLS", 2)
+    symbols = ["A", "B", "C"]
+    hub = QuoteHub(symbols_loader=lambda: list(symbols))
+
+    async def run():
+        await hub.refresh_symbols()
+        assert hub.symbols == {"A", "B"}
+        hub._prev_close["A"] = 10.0
+        hub.apply_tick("A", 11.0, 1.0)
+        assert hub.quotes["A"]["change_percent"] == 10.0
+        symbols[:] = ["B", "C"]
+        await hub.refresh_symbols()
+        assert hub.symbols == {"B", "C"} and "A" not in hub.quotes and hub.recent_ticks("A") == []
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import http_clients, quotes
+from app.services.providers import finnhub
+from tests.stub_server import start_stub
+
+CHANGES = {"AAPL": 1.5, "MSFT": -4.0, "NVDA": 0.2, "TSLA": 2.5, "AMD": None}
+
+
+@pytest.fixture()
+def upstream(monkeypatch):
+    hits = []
+
+    def quote(handler):
+        sym = handler.path.split("symbol=")[1].split("&")[0]
+        hits.append(sym)
+        dp = CHANGES.get(sym)
+        body = {"c": 100.0, "pc": 100.0, "d": dp, "dp": dp} if sym in CHANGES else {}
+        status = 200 if sym in CHANGES else 500
+        return status, {"Content-Type": "application/json", "X-Ratelimit-Remaining": "3"}, json.dumps(body).encode()
+
+    server, base = start_stub({"/quote": (200, {}, quote)})
+    monkeypatch.setattr(finnhub, "FINNHUB_BASE", base)
+    monkeypatch.setenv("FINNHUB_API_KEY", "k")
+    monkeypatch.setattr(quotes, "_cache", {})
+    monkeypatch.setattr(quotes, "_inflight", {})
+    yield hits
+    server.shutdown()
+
+
+def test_concurrent_callers_share_requests_and_cache(upstream):
+    async def run():
+        try:
+            first = await asyncio.gather(*[quotes.get_quotes(["AAPL", "MSFT", "BAD"], "k") for _ in range(5)])
+            again = await quotes.get_quotes(["MSFT", "AAPL"], "k")
+            return first, again
+        finally:
+            await http_clients.close_clients()
+
+    first, again = asyncio.run(run())
+    assert sorted(upstream) == ["AAPL", "BAD", "MSFT"]  # one request per symbol for all callers
+    assert all(r["MSFT"]["change_percent"] == -4.0 and r["BAD"] is None for r in first)
+    assert again["AAPL"]["direction"] == "up"
+    assert sorted(upstream) == ["AAPL", "BAD", "MSFT"]  # cached within the TTL
+    # The upstream said 3 requests left: waves shrink from QUOTE_MAX_BATCH to match
+    assert quotes.QUOTE_MIN_BATCH <= quotes.batch_size() <= 3
+
+
+def test_top_movers_heap_selection():
+    qs = [{"ticker": t, "change_percent": dp} for t, dp in CHANGES.items()] + [{"ticker": "X"}]
+    assert [q["ticker"] for q in quotes.top_movers(qs, 3)] == ["MSFT", "TSLA", "AAPL"]
+    assert [q["ticker"] for q in quotes.top_movers(qs, 10)][-2:] in (["AMD", "X"], ["X", "AMD"])
+
+
+def test_movers_endpoint(upstream):
+    r = TestClient(app).get("/api/market/movers", params={"tickers": "aapl,msft,nvda,tsla,amd,aapl", "limit": 2})
+    assert r.status_code == 200
+    assert [m["ticker"] for m in r.json()] == ["MSFT", "TSLA"]
+    assert sorted(upstream) == ["AAPL", "AMD", "MSFT", "NVDA", "TSLA"]
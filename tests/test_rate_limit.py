@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.services.rate_limit import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RateLimiter, RateLimitTimeout, _parse_rate
+
+
+def test_parse_rate():
+    assert _parse_rate("10/s") == 10.0
+    assert _parse_rate("60/min") == 1.0
+
+
+def test_interactive_waiters_overtake_background():
+    async def run():
+        lim = RateLimiter("test", rate=50.0, burst=1)
+        assert await lim.acquire() == 0  # burst token, no queueing
+        order = []
+
+        async def take(label, prio):
+            waited = await lim.acquire(prio)
+            order.append((label, waited))
+
+        bg = [asyncio.create_task(take(f"bg{i}", PRIORITY_BACKGROUND)) for i in range(3)]
+        await asyncio.sleep(0)
+        fg = asyncio.create_task(take("fg", PRIORITY_INTERACTIVE))
+        await asyncio.gather(fg, *bg)
+        return order
+
+    order = asyncio.run(run())
+    assert [label for label, _ in order] == ["fg", "bg0", "bg1", "bg2"]
+    assert all(waited > 0 for _, waited in order)
+
+
+def test_backoff_holds_the_bucket():
+    async def run():
+        lim = RateLimiter("test", rate=100.0, burst=5)
+        lim.backoff(0.05)
+        return await lim.acquire()
+
+    assert asyncio.run(run()) >= 40
+
+
+def test_headroom_capped_by_upstream_remaining():
+    lim = RateLimiter("test", rate=1.0, burst=10)
+    assert lim.headroom() == 10
+    lim.observe_remaining(3, 60.0)
+    assert lim.headroom() == 3
+    lim.observe_remaining(3, 0.0)  # window over: local tokens only
+    assert lim.headroom() == 10
+
+
+def test_acquire_timeout_fails_fast_or_gives_up_its_place():
+    async def run():
+        lim = RateLimiter("test", rate=10.0, burst=1)
+        lim.backoff(60.0)
+        t0 = asyncio.get_running_loop().time()
+        with pytest.raises(RateLimitTimeout):
+            await lim.acquire(timeout=1.0)  # 60s ahead: rejected without waiting
+        assert asyncio.get_running_loop().time() - t0 < 0.1
+
+        # A background waiter that fits its timeout on arrival, then gets overtaken
+        lim = RateLimiter("test", rate=20.0, burst=1)
+        await lim.acquire()
+        bg = asyncio.create_task(lim.acquire(PRIORITY_BACKGROUND, timeout=0.08))
+        await asyncio.sleep(0)
+        fg = [asyncio.create_task(lim.acquire(PRIORITY_INTERACTIVE)) for _ in range(2)]
+        with pytest.raises(RateLimitTimeout):
+            await bg
+        await asyncio.gather(*fg)
+        assert lim.stats()["queued"] == 0  # the abandoned waiter took no token
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+from app.services import http_clients, response_cache
+from app.services.metrics import begin_run, end_run
+from app.services.response_cache import SqliteCache, fetch_cached, set_backend
+from tests.stub_server import start_stub
+
+
+def _tickers_route(calls):
+    def handle(req):
+        calls.append(req.headers.get("If-None-Match"))
+        if req.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"', "Content-Type": "application/json"}, b'{"0": {"ticker": "ACME", "cik_str": 42}}'
+    return handle
+
+
+def test_shared_cache_serves_across_processes_and_revalidates(tmp_path):
+    calls = []
+    server, base = start_stub({"/tickers.json": (200, {}, _tickers_route(calls))})
+    backend = SqliteCache(str(tmp_path / "cache.sqlite3"))
+    url = f"{base}/tickers.json"
+
+    async def get(ttl):
+        return await fetch_cached(http_clients.get_client("generic"), url, ttl=ttl, provider="test", endpoint="/tickers")
+
+    async def run():
+        begin_run()
+        set_backend(backend)
+        first = await get(60)
+        assert await get(60) is first  # fresh in-process hit, no request
+        set_backend(SqliteCache(str(tmp_path / "cache.sqlite3")))  # "another process": empty L1, same file
+        assert (await get(60))["0"]["ticker"] == "ACME"
+        # Expired entry is revalidated with its ETag; the 304 keeps the cached body
+        response_cache._l1.clear()
+        assert (await get(0))["0"]["cik_str"] == 42
+        await http_clients.close_clients()
+        return end_run()
+
+    try:
+        metrics = asyncio.run(run())
+    finally:
+        server.shutdown()
+        set_backend(None)
+    assert calls == [None, '"v1"']
+    stats = metrics["cache"]["http"]
+    assert (stats["hits"], stats["misses"], stats["stale"], stats["revalidated"]) == (2, 1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    # The 304 avoided re-downloading the body fetched by the first request
+    assert stats["bytes_downloaded"] == stats["bytes_saved"] > 0
+    assert stats["not_modified_rate"] == 1.0
+
+
+def test_shared_backend_io_runs_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingCache(SqliteCache):
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, entry):
+            threads.append(threading.get_ident())
+            super().set(key, entry)
+
+    async def run():
+        set_backend(RecordingCache(str(tmp_path / "cache.sqlite3")))
+        assert await response_cache.cache_lookup("k") is None
+        await response_cache.cache_store("k", {"v": 1}, 60)
+        response_cache._l1.clear()
+        assert (await response_cache.cache_lookup("k")).value == {"v": 1}
+        return threading.get_ident()
+
+    try:
+        loop_thread = asyncio.run(run())
+    finally:
+        set_backend(None)
+    assert len(threads) == 3 and loop_thread not in threads
@@ -0,0 +1,73 @@
+from app.memory import store
+from app.services.metric_extractors import (
+    _first_money,
+    _first_pct,
+    _first_period,
+    _span_money,
+    _span_pct,
+    _span_period,
+    extract_core_metrics,
+    extract_series_for_metrics,
+)
+from app.services.span_scanner import MONEY, PERCENT, PERIOD, first_spans, iter_spans
+
+from test_happy_path import seed_doc
+
+
+def _happy_chunks():
+    doc_id = seed_doc()
+    chunks = store.documents[doc_id]["chunks"]
+    store.documents.pop(doc_id, None)
+    return chunks
+
+
+def test_first_spans_match_regex_helpers_on_happy_path_fixtures():
+    samples = []
+    for c in _happy_chunks():
+        samples.append(c.text)
+        samples.extend(ln for ln in c.text.split(". ") if ln)
+    samples += ["FY 2025 capex 3.5 billion", "growth of 142% in q4 2023", "1,25% and $0.91.", "Q32024", ""]
+    for text in samples:
+        spans = first_spans(text)
+        assert _span_period(spans) == _first_period(text), text
+        assert _span_pct(spans) == _first_pct(text), text
+        try:
+            expected = _first_money(text)
+        except ValueError:
+            expected = ValueError
+        try:
+            got = _span_money(spans)
+        except ValueError:
+            got = ValueError
+        assert got == expected, text
+
+
+def test_iter_spans_emits_typed_spans_in_order():
+    kinds = [(sp.kind, sp.text) for sp in iter_spans("Q3 2024 revenue $100 million, margin 42%")]
+    assert kinds == [
+        (PERIOD, "Q3 2024"),
+        (MONEY, "3"),
+        (MONEY, "2024"),
+        (MONEY, "100"),
+        (MONEY, "42"),
+        (PERCENT, "42"),
+    ]
+
+
+def test_happy_path_metrics_and_series_are_unchanged():
+    chunks = _happy_chunks()
+    m = extract_core_metrics(chunks)
+    # Values as produced by the original per-metric regex loops (first numeric token wins)
+    assert {k: (v["value"], v["unit"], v["period"]) for k, v in m.items()} == {
+        "revenue": (3.0, "USD_millions", "Q3 2024"),
+        "gross_margin": (42.0, "percent", "Q3 2024"),
+        "operating_margin": (42.0, "percent", "Q3 2024"),
+        "eps_gaap": (3.0, "USD", "Q3 2024"),
+        "fcf": (3.0, "USD_millions", "Q3 2024"),
+        "fcf_margin": (12.0, "percent", "Q3 2024"),
+    }
+    s = extract_series_for_metrics(chunks, ["revenue", "gross_margin", "eps_gaap"])
+    assert s["revenue"]["labels"] == ["Q3 2024", "Q3 2024", "Q3 2024"]
+    assert s["revenue"]["values"] == [3.0, 3.0, 500.0]
+    assert s["gross_margin"]["values"] == [42.0, 12.0]
+    assert s["eps_gaap"]["values"] == s["revenue"]["values"]
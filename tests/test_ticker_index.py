@@ -0,0 +1,63 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ticker_index
+from app.services.ticker_index import TickerIndex
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "0": {"ticker": "AAPL", "cik_str": 320193, "title": "Apple Inc."},
+    "1": {"ticker": "AAP", "cik_str": 1158449, "title": "ADVANCE AUTO PARTS INC"},
+    "2": {"ticker": "MSFT", "cik_str": 789019, "title": "MICROSOFT CORP"},
+    "3": {"ticker": "APLE", "cik_str": 1418121, "title": "Apple Hospitality REIT, Inc."},
+    "4": {"ticker": "NVDA", "cik_str": 1045810, "title": "NVIDIA CORP"},
+    "5": {"ticker": "aapl", "cik_str": 1, "title": "duplicate row"},
+}
+
+
+def test_exact_and_prefix_lookup():
+    idx = TickerIndex.from_sec_payload(PAYLOAD)
+    assert len(idx) == 5
+    assert idx.get("aapl") == {"ticker": "AAPL", "cik": "320193", "company": "Apple Inc."}
+    assert idx.get("AA") is None and idx.get("") is None
+    assert [x["ticker"] for x in idx.prefix("aa")] == ["AAP", "AAPL"]
+    assert idx.prefix("ZZ") == []
+
+
+def test_name_prefix_and_fuzzy_lookup():
+    idx = TickerIndex.from_sec_payload(PAYLOAD)
+    assert [x["ticker"] for x in idx.name_prefix("apple")] == ["AAPL", "APLE"]
+    assert [x["ticker"] for x in idx.name_prefix("apple hosp")] == ["APLE"]
+    assert [x["ticker"] for x in idx.fuzzy("mircosoft")] == ["MSFT"]
+    assert idx.fuzzy("zz") == []
+
+
+def test_search_orders_match_kinds_and_dedupes():
+    idx = TickerIndex.from_sec_payload(PAYLOAD)
+    got = [(x["ticker"], x["match"]) for x in idx.search("aap")]
+    assert got == [("AAP", "ticker"), ("AAPL", "ticker_prefix")]
+    got = [(x["ticker"], x["match"]) for x in idx.search("apple", limit=3)]
+    assert got == [("AAPL", "name"), ("APLE", "name")]
+    # Fuzzy only when nothing else matched, and for words of 4+ characters
+    assert [(x["ticker"], x["match"]) for x in idx.search("mircosoft")] == [("MSFT", "fuzzy")]
+    assert idx.fuzzy("cop") and idx.search("cop") == []  # too short to go fuzzy
+
+
+def test_save_load_roundtrip(tmp_path):
+    idx = TickerIndex.from_sec_payload(PAYLOAD)
+    path = str(tmp_path / "idx.json")
+    idx.save(path)
+    loaded = TickerIndex.load(path)
+    assert loaded.tickers == idx.tickers and list(loaded.ciks) == list(idx.ciks)
+    assert loaded.built_at == idx.built_at
+    assert loaded.search("nvidia") == idx.search("nvidia")
+    assert TickerIndex.load(str(tmp_path / "missing.json")) is None
+
+
+def test_autocomplete_endpoint(monkeypatch):
+    monkeypatch.setattr(ticker_index, "_index", TickerIndex.from_sec_payload(PAYLOAD))
+    r = client.get("/api/autocomplete", params={"q": "micro"})
+    assert r.status_code == 200
+    assert r.json() == [{"ticker": "MSFT", "cik": "789019", "company": "MICROSOFT CORP", "match": "name"}]
+    assert client.get("/api/autocomplete", params={"q": " "}).json() == []
@@ -0,0 +1,182 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import base as db_base
+from app.db import persistence
+from app.db.models import Base, DashboardSnapshot, Document, EarningsEvent, Highlight, ResourceVersion, Watchlist
+from app.db.persistence import bump_versions, load_versions, upsert_earnings_events
+from app.main import app
+from app.services import dashboard, versions
+from app.services import earnings_calendar as cal
+from app.services.highlights import create_highlight_and_event
+from app.services.versions import etag_matches, parse_token
+
+START, END = "2026-10-26", "2026-10-30"
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    tables = [
+        EarningsEvent.__table__,
+        Watchlist.__table__,
+        Document.__table__,
+        Highlight.__table__,
+        DashboardSnapshot.__table__,
+        ResourceVersion.__table__,
+    ]
+    Base.metadata.create_all(engine, tables=tables)
+    monkeypatch.setattr(db_base, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(versions, "_cache", None)
+    monkeypatch.setattr(versions, "RESOURCE_VERSION_TTL_SECONDS", 0)
+    monkeypatch.setattr(dashboard, "_cache", {})
+    monkeypatch.setattr(dashboard, "_inflight", {})
+    monkeypatch.setattr(cal, "_cache", {})
+    monkeypatch.setattr(cal, "is_stale", lambda start, end: False)  # no provider refreshes
+    return TestClient(app)
+
+
+def _event(ticker, day, **kw):
+    return {"ticker": ticker, "event_date": day, **kw}
+
+
+def test_writes_bump_versions_and_stamp_rows(client):
+    assert load_versions() == {}
+    upsert_earnings_events([_event("AAPL", "2026-10-27"), _event("MSFT", "2026-10-28")], "fmp")
+    # MSFT gains a company (rewritten), AAPL has nothing to fill (untouched), NVDA is new
+    upsert_earnings_events(
+        [_event("AAPL", "2026-10-27"), _event("MSFT", "2026-10-28", company="Microsoft"), _event("NVDA", "2026-10-29")], "fmp"
+    )
+    with db_base.db_session() as s:
+        stamps = {e.ticker: e.version for e in s.query(EarningsEvent).all()}
+        assert bump_versions(s, "documents", "watchlist") == {"documents": 1, "watchlist": 1}
+    assert stamps == {"AAPL": 1, "MSFT": 2, "NVDA": 2}
+    assert load_versions() == {"events": 2, "documents": 1, "watchlist": 1}
+
+
+def test_version_bump_is_taken_after_the_writes(client):
+    statements = []
+    engine = db_base.SessionLocal.kw["bind"]
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt.split()[:3]))
+
+    def table_after_bump():
+        # What the transaction wrote once it held the resource_versions row lock
+        i = next(i for i, st in enumerate(statements) if st[:3] == ["INSERT", "INTO", "resource_versions"])
+        return [st[1] for st in statements[i + 1:] if st[0] in ("INSERT", "UPDATE", "DELETE")]
+
+    upsert_earnings_events([_event("AAPL", "2026-10-27")], "fmp")
+    assert table_after_bump() == ["earnings_events"]  # only the version stamp
+    statements.clear()
+    hid = create_highlight_and_event("msft", "Microsoft", None, [])
+    assert hid is not None and table_after_bump() == ["highlights", "earnings_events"]
+    with db_base.db_session() as s:
+        assert s.get(Highlight, hid).version == 1
+        assert {e.ticker: e.version for e in s.query(EarningsEvent).all()} == {"AAPL": 1, "MSFT": 2}
+    assert load_versions() == {"events": 2, "highlights": 1}
+
+
+def test_etag_helpers():
+    assert etag_matches('W/"a-1-x"', 'W/"a-1-x"') and etag_matches('"a-1-x"', 'W/"a-1-x"')
+    assert etag_matches('W/"b", W/"a-1-x"', 'W/"a-1-x"') and etag_matches("*", 'W/"a-1-x"')
+    assert not etag_matches(None, 'W/"a-1-x"') and not etag_matches('W/"a-2-x"', 'W/"a-1-x"')
+    assert parse_token("3.4.5", ("events", "documents", "watchlist")) == {"events": 3, "documents": 4, "watchlist": 5}
+    assert parse_token("3.4", ("events", "documents", "watchlist")) is None
+    assert parse_token("3.x.5", ("events", "documents", "watchlist")) is None
+
+
+def test_calendar_revalidation_and_delta(client):
+    upsert_earnings_events([_event("AAPL", "2026-10-27"), _event("MSFT", "2026-10-28")], "fmp")
+    params = {"start": START, "end": END}
+    r = client.get("/api/earnings/calendar", params=params)
+    assert r.status_code == 200 and [e["ticker"] for e in r.json()] == ["AAPL", "MSFT"]
+    etag, version = r.headers["etag"], r.headers["x-resource-version"]
+    assert version == "1"
+
+    again = client.get("/api/earnings/calendar", params=params, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["etag"] == etag and not again.content
+    # Another range is another ETag
+    other = client.get("/api/earnings/calendar", params={"start": START, "end": "2026-10-27"}, headers={"If-None-Match": etag})
+    assert other.status_code == 200 and [e["ticker"] for e in other.json()] == ["AAPL"]
+    assert client.get("/api/earnings/calendar", params={**params, "since_version": version}).json() == []
+    too_long = client.get("/api/earnings/calendar", params={"start": "1900-01-01", "end": "2100-01-01"})
+    assert too_long.status_code == 400  # not silently cut short
+
+    upsert_earnings_events([_event("MSFT", "2026-10-28", company="Microsoft"), _event("NVDA", "2026-10-29")], "fmp")
+    fresh = client.get("/api/earnings/calendar", params=params, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["x-resource-version"] == "2"
+    assert [e["ticker"] for e in fresh.json()] == ["AAPL", "MSFT", "NVDA"]  # the cached range isn't served past a write
+    delta = client.get("/api/earnings/calendar", params={**params, "since_version": version})
+    assert [(e["ticker"], e["company"]) for e in delta.json()] == [("MSFT", "Microsoft"), ("NVDA", None)]
+
+
+def test_ticker_highlights_revalidation_and_delta(client):
+    with db_base.db_session() as s:
+        v = bump_versions(s, "highlights")["highlights"]
+        s.add(Highlight(id="h1", ticker="AAPL", summary_json={}, created_at=datetime(2026, 10, 19), version=v))
+    r = client.get("/api/ticker/aapl/highlights")
+    assert r.status_code == 200 and [h["id"] for h in r.json()] == ["h1"]
+    assert client.get("/api/ticker/aapl/highlights", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+    with db_base.db_session() as s:
+        v = bump_versions(s, "highlights")["highlights"]
+        s.add(Highlight(id="h2", ticker="AAPL", summary_json={}, created_at=datetime(2026, 10, 20), version=v))
+    assert client.get("/api/ticker/aapl/highlights", headers={"If-None-Match": r.headers["etag"]}).status_code == 200
+    delta = client.get("/api/ticker/aapl/highlights", params={"since_version": r.headers["x-resource-version"]})
+    assert [h["id"] for h in delta.json()] == ["h2"]
+
+
+def test_dashboard_revalidation_and_delta(client):
+    today = datetime.now(timezone.utc).date()
+    upsert_earnings_events([_event("AAPL", today.isoformat()), _event("MSFT", (today + timedelta(days=2)).isoformat())], "fmp")
+    with db_base.db_session() as s:
+        bump_versions(s, "documents")
+        s.add(Document(id="d1", ticker="AAPL", source_url="u1", created_at=datetime(2026, 10, 18)))
+        s.add(Document(id="d2", ticker="MSFT", source_url="u2", created_at=datetime(2026, 10, 19)))
+
+    r = client.get("/api/dashboard/overview")
+    body = r.json()
+    token = body["version"]
+    assert r.status_code == 200 and token == r.headers["x-resource-version"] == "1.1.0"
+    assert [e["ticker"] for e in body["today"]] == ["AAPL"] and body["unchanged"] == []
+    assert client.get("/api/dashboard/overview", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert client.get("/api/dashboard/overview", params={"limit": 2}, headers={"If-None-Match": r.headers["etag"]}).status_code == 200
+
+    same = client.get("/api/dashboard/overview", params={"since_version": token}).json()
+    assert same["unchanged"] == ["today", "upcoming", "reported", "report_links"]
+    assert same["today"] == same["report_links"] == [] and same["counts"] == body["counts"]
+
+    # A document delete (not seen by the worker) moves "documents": the next snapshot read catches up
+    with db_base.db_session() as s:
+        bump_versions(s, "documents")
+        s.query(Document).filter(Document.id == "d2").delete()
+    dashboard.invalidate()
+    stale = client.get("/api/dashboard/overview", headers={"If-None-Match": r.headers["etag"]})
+    assert stale.status_code == 200 and stale.json()["version"] == "1.2.0"
+    delta = client.get("/api/dashboard/overview", params={"since_version": token}).json()
+    assert delta["unchanged"] == ["today", "upcoming", "reported"]
+    assert [l["doc_id"] for l in delta["report_links"]] == ["d1"]
+
+
+def test_event_writes_without_the_unique_index(client):
+    # A database whose duplicates haven't been cleaned up by the migration yet
+    with db_base.db_session() as s:
+        s.execute(text("DROP INDEX uq_earnings_events_ticker_date"))
+        for i in (1, 2):
+            s.add(EarningsEvent(id=f"dup{i}", ticker="AAPL", event_date=date(2026, 10, 27), status="upcoming"))
+    persistence._events_unique_index.clear()
+    upsert_earnings_events([_event("AAPL", "2026-10-27", company="Apple"), _event("MSFT", "2026-10-28")], "fmp")
+    upsert_earnings_events([_event("MSFT", "2026-10-28")], "fmp")  # nothing to fill: untouched
+    hid = create_highlight_and_event("msft", None, None, [])
+    with db_base.db_session() as s:
+        events = sorted((e.ticker, e.event_date.isoformat(), e.company, e.version) for e in s.query(EarningsEvent).all())
+        assert s.get(Highlight, hid) is not None  # the highlight isn't lost with the event insert
+    today = date.today().isoformat()
+    expected = [("AAPL", "2026-10-27", "Apple", 1), ("AAPL", "2026-10-27", "Apple", 1), ("MSFT", "2026-10-28", None, 1)]
+    if today != "2026-10-28":
+        expected.append(("MSFT", today, None, 2))
+    assert events == sorted(expected)